@@ -0,0 +1,134 @@
+"""
+Per-user activity bitmaps.
+
+Each ActivityBitmap row holds one year as 46 bytes, one bit per day
+(January 1st is bit 0, little-endian). Bitmaps are handled as Python ints,
+so marking a day, counting active days and finding streaks are shifts,
+masks and popcounts over a few hundred bits instead of scans over the
+workouts table.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from models import db, ActivityBitmap
+
+DAY_BYTES = 46
+
+
+def day_index(day):
+    """Bit position of a day within its year's bitmap."""
+    return day.timetuple().tm_yday - 1
+
+
+def to_int(days):
+    return int.from_bytes(days, 'little')
+
+
+def to_bytes(bits):
+    return bits.to_bytes(DAY_BYTES, 'little')
+
+
+def mark_days(days, day_indexes):
+    """Returns the bitmap bytes with the given day bits set."""
+    bits = to_int(days)
+    for index in day_indexes:
+        bits |= 1 << index
+    return to_bytes(bits)
+
+
+def clear_day(days, index):
+    return to_bytes(to_int(days) & ~(1 << index))
+
+
+def build_bitmaps(dates):
+    """Groups dates by year into {year: bitmap bytes}."""
+    bits = {}
+    for day in dates:
+        bits[day.year] = bits.get(day.year, 0) | (1 << day_index(day))
+    return {year: to_bytes(value) for year, value in bits.items()}
+
+
+def load_years(user_id, year=None):
+    """{year: bitmap int} for the user, or for just one year."""
+    query = select(ActivityBitmap.year, ActivityBitmap.days).where(ActivityBitmap.user_id == user_id)
+    if year is not None:
+        query = query.where(ActivityBitmap.year == year)
+    return {row_year: to_int(days) for row_year, days in db.session.execute(query)}
+
+
+def _timeline(years):
+    """
+    Joins the yearly bitmaps into one int whose bit n is the n-th day after
+    January 1st of the earliest year. Returns (bits, first day).
+    """
+    first = date(min(years), 1, 1)
+    bits = 0
+    for year, value in years.items():
+        bits |= value << (date(year, 1, 1) - first).days
+    return bits, first
+
+
+def streaks(years, today):
+    """
+    Current and longest run of consecutive active days. The current streak
+    is still alive if the last active day was yesterday.
+    """
+    if not any(years.values()):
+        return {"current_streak": 0, "longest_streak": 0, "longest_streak_start": None,
+                "longest_streak_end": None, "active_days": 0, "last_active": None}
+
+    bits, first = _timeline(years)
+    last = bits.bit_length() - 1
+    end = (today - first).days
+    if end >= 0 and not (bits >> end) & 1:
+        end -= 1
+
+    current = 0
+    if end >= 0 and (bits >> end) & 1:
+        window = bits & ((1 << (end + 1)) - 1)
+        # The highest unset bit below `end` is where the run starts.
+        gap = ~window & ((1 << (end + 1)) - 1)
+        current = end + 1 - gap.bit_length()
+
+    # Runs of ones, lowest day first.
+    runs = bin(bits)[:1:-1].split('0')
+    longest, start, position = 0, 0, 0
+    for run in runs:
+        if len(run) > longest:
+            longest, start = len(run), position
+        position += len(run) + 1
+
+    return {
+        "current_streak": current,
+        "longest_streak": longest,
+        "longest_streak_start": first + timedelta(days=start),
+        "longest_streak_end": first + timedelta(days=start + longest - 1),
+        "active_days": bits.bit_count(),
+        "last_active": first + timedelta(days=last)
+    }
+
+
+def calendar(bits, year):
+    """Active days of one year as dates, plus per-month counts for a heatmap."""
+    jan1 = date(year, 1, 1)
+    months = []
+    for month in range(1, 13):
+        start = day_index(date(year, month, 1))
+        end = day_index(date(year + 1, 1, 1) - timedelta(days=1)) + 1 if month == 12 \
+            else day_index(date(year, month + 1, 1))
+        months.append(((bits >> start) & ((1 << (end - start)) - 1)).bit_count())
+
+    days = []
+    remaining = bits
+    while remaining:
+        low = remaining & -remaining
+        days.append(jan1 + timedelta(days=low.bit_length() - 1))
+        remaining ^= low
+
+    return {
+        "year": year,
+        "active_days": bits.bit_count(),
+        "months": months,
+        "days": days
+    }
@@ -0,0 +1,427 @@
+from collections import Counter, defaultdict
+
+from sqlalchemy import func, insert, update, delete, select, or_, and_
+
+from models import (
+    db, dialect_insert, User, WaterLog, DailyWaterTotal, Workout, WorkoutExercise,
+    UserTrainingStats, UserExerciseUsage, PersonalRecord, ActivityBitmap
+)
+from activity import DAY_BYTES, day_index, mark_days, clear_day, build_bitmaps
+
+
+def bump_data_version(user_id=None):
+    """
+    Increments the user's data_version so cached responses revalidate. Every
+    write to a user's data calls this in the same transaction; None bumps
+    every user (used by the rebuild commands).
+    """
+    stmt = update(User).values(data_version=User.data_version + 1)
+    if user_id is not None:
+        stmt = stmt.where(User.id == user_id)
+    db.session.execute(stmt.execution_options(synchronize_session=False))
+
+
+def add_to_daily_water_total(user_id, day, amount_ml, entry_count=1):
+    """
+    Adds water to the user's rollup row for the day, creating it if needed.
+    Runs in the caller's transaction so the rollup commits with the raw log.
+    """
+    add_to_daily_water_totals(user_id, {day: (amount_ml, entry_count)})
+
+
+def add_to_daily_water_totals(user_id, totals):
+    """
+    Batch form of add_to_daily_water_total: totals maps day -> (amount_ml,
+    entry_count). All days are upserted with a single multi-row statement.
+    """
+    stmt = dialect_insert(DailyWaterTotal).values([
+        {"user_id": user_id, "day": day, "total_ml": amount_ml, "entry_count": entry_count}
+        for day, (amount_ml, entry_count) in totals.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyWaterTotal.user_id, DailyWaterTotal.day],
+        set_={
+            "total_ml": DailyWaterTotal.total_ml + stmt.excluded.total_ml,
+            "entry_count": DailyWaterTotal.entry_count + stmt.excluded.entry_count
+        }
+    )
+    db.session.execute(stmt)
+
+
+def rebuild_daily_water_totals(user_id=None):
+    """
+    Recomputes daily_water_totals from water_logs in a single INSERT ... SELECT,
+    for one user or for everyone. Returns the number of rollup rows written.
+    The caller commits.
+    """
+    day = func.date(WaterLog.timestamp)
+    source = select(
+        WaterLog.user_id,
+        day,
+        func.sum(WaterLog.amount_ml),
+        func.count(WaterLog.id)
+    ).group_by(WaterLog.user_id, day)
+
+    clear = delete(DailyWaterTotal)
+    if user_id is not None:
+        source = source.where(WaterLog.user_id == user_id)
+        clear = clear.where(DailyWaterTotal.user_id == user_id)
+
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(DailyWaterTotal).from_select(
+            ['user_id', 'day', 'total_ml', 'entry_count'], source
+        )
+    )
+    return result.rowcount
+
+
+def rebuild_user_aggregates(user_id):
+    """
+    Recomputes every workout-derived table for one user. Used after bulk
+    loads, where per-row incremental maintenance would be wasted work.
+    """
+    rebuild_training_stats(user_id)
+    rebuild_personal_records(user_id)
+    rebuild_activity_bitmaps(user_id)
+
+
+def record_workouts_added(user_id, workouts, exercise_rows):
+    """
+    Updates the user's derived training tables for newly inserted workouts.
+    exercise_rows are the WorkoutExercise values (dicts) written with them.
+    Runs in the caller's transaction.
+    """
+    _apply_training_stats(
+        user_id,
+        len(workouts),
+        Counter(row['exercise_id'] for row in exercise_rows)
+    )
+    _raise_personal_records(user_id, workouts, exercise_rows)
+    _mark_activity(user_id, [workout.date for workout in workouts])
+
+
+def record_workout_deleted(user_id, workout, exercise_rows):
+    """
+    Reverses record_workouts_added for a workout about to be deleted.
+    exercise_rows are its WorkoutExercise rows (mappings), read before the
+    delete.
+    """
+    usage = Counter(row['exercise_id'] for row in exercise_rows)
+    _apply_training_stats(user_id, -1, Counter({ex_id: -count for ex_id, count in usage.items()}))
+    _recompute_personal_records_held_by(user_id, workout)
+    _clear_activity_if_last(user_id, workout)
+
+
+def _apply_training_stats(user_id, workout_delta, usage_deltas):
+    stmt = dialect_insert(UserTrainingStats).values(
+        user_id=user_id,
+        workout_count=workout_delta,
+        exercise_count=sum(usage_deltas.values())
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserTrainingStats.user_id],
+        set_={
+            "workout_count": UserTrainingStats.workout_count + stmt.excluded.workout_count,
+            "exercise_count": UserTrainingStats.exercise_count + stmt.excluded.exercise_count
+        }
+    )
+    db.session.execute(stmt)
+
+    if not usage_deltas:
+        return
+
+    stmt = dialect_insert(UserExerciseUsage).values([
+        {"user_id": user_id, "exercise_id": exercise_id, "usage_count": delta}
+        for exercise_id, delta in usage_deltas.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserExerciseUsage.user_id, UserExerciseUsage.exercise_id],
+        set_={"usage_count": UserExerciseUsage.usage_count + stmt.excluded.usage_count}
+    )
+    db.session.execute(stmt)
+
+    if workout_delta < 0:
+        db.session.execute(
+            delete(UserExerciseUsage).where(
+                UserExerciseUsage.user_id == user_id,
+                UserExerciseUsage.usage_count <= 0
+            )
+        )
+
+
+def _training_stats_source(user_id=None):
+    source = select(
+        Workout.user_id,
+        func.count(func.distinct(Workout.id)),
+        func.count(WorkoutExercise.id)
+    ).outerjoin(WorkoutExercise, WorkoutExercise.workout_id == Workout.id) \
+     .group_by(Workout.user_id)
+    if user_id is not None:
+        source = source.where(Workout.user_id == user_id)
+    return source
+
+
+def _exercise_usage_source(user_id=None):
+    source = select(
+        Workout.user_id,
+        WorkoutExercise.exercise_id,
+        func.count(WorkoutExercise.id)
+    ).join(Workout, WorkoutExercise.workout_id == Workout.id) \
+     .group_by(Workout.user_id, WorkoutExercise.exercise_id)
+    if user_id is not None:
+        source = source.where(Workout.user_id == user_id)
+    return source
+
+
+def rebuild_training_stats(user_id=None):
+    """
+    Recomputes user_training_stats and user_exercise_usage from the raw
+    workout tables, for one user or for everyone. The caller commits.
+    Returns the number of (stats, usage) rows written.
+    """
+    clear_stats = delete(UserTrainingStats)
+    clear_usage = delete(UserExerciseUsage)
+    if user_id is not None:
+        clear_stats = clear_stats.where(UserTrainingStats.user_id == user_id)
+        clear_usage = clear_usage.where(UserExerciseUsage.user_id == user_id)
+
+    db.session.execute(clear_stats)
+    db.session.execute(clear_usage)
+
+    stats = db.session.execute(
+        insert(UserTrainingStats).from_select(
+            ['user_id', 'workout_count', 'exercise_count'], _training_stats_source(user_id)
+        )
+    )
+    usage = db.session.execute(
+        insert(UserExerciseUsage).from_select(
+            ['user_id', 'exercise_id', 'usage_count'], _exercise_usage_source(user_id)
+        )
+    )
+    return stats.rowcount, usage.rowcount
+
+
+def check_training_stats(user_id=None):
+    """
+    Diffs the stored training aggregates against a raw recomputation.
+    Returns a list of human-readable mismatches (empty when consistent).
+    """
+    expected_stats = {row[0]: (row[1], row[2]) for row in db.session.execute(_training_stats_source(user_id))}
+    expected_usage = {(row[0], row[1]): row[2] for row in db.session.execute(_exercise_usage_source(user_id))}
+
+    stats_query = select(UserTrainingStats.user_id, UserTrainingStats.workout_count, UserTrainingStats.exercise_count)
+    usage_query = select(UserExerciseUsage.user_id, UserExerciseUsage.exercise_id, UserExerciseUsage.usage_count)
+    if user_id is not None:
+        stats_query = stats_query.where(UserTrainingStats.user_id == user_id)
+        usage_query = usage_query.where(UserExerciseUsage.user_id == user_id)
+
+    # Users with no workouts may legitimately have an all-zero stats row.
+    stored_stats = {row[0]: (row[1], row[2]) for row in db.session.execute(stats_query) if row[1] or row[2]}
+    stored_usage = {(row[0], row[1]): row[2] for row in db.session.execute(usage_query)}
+
+    mismatches = []
+    for uid in sorted(expected_stats.keys() | stored_stats.keys()):
+        if expected_stats.get(uid, (0, 0)) != stored_stats.get(uid, (0, 0)):
+            mismatches.append(
+                f"user {uid}: (workouts, exercises) stored {stored_stats.get(uid, (0, 0))}, "
+                f"expected {expected_stats.get(uid, (0, 0))}"
+            )
+    for key in sorted(expected_usage.keys() | stored_usage.keys()):
+        if expected_usage.get(key, 0) != stored_usage.get(key, 0):
+            mismatches.append(
+                f"user {key[0]} exercise {key[1]}: usage stored {stored_usage.get(key, 0)}, "
+                f"expected {expected_usage.get(key, 0)}"
+            )
+    return mismatches
+
+
+def _raise_personal_records(user_id, workouts, exercise_rows):
+    """
+    Upserts a PR for each exercise whose new best beats the stored one. Ties
+    go to the earliest date, matching rebuild_personal_records. Rows come
+    from payloads that passed validate_workout_data, so weight_lifted is
+    None or a non-negative number.
+    """
+    dates = {workout.id: workout.date for workout in workouts}
+    best = {}
+    for row in exercise_rows:
+        weight = row['weight_lifted']
+        if not weight or weight <= 0:
+            continue
+        current = best.get(row['exercise_id'])
+        achieved_on = dates[row['workout_id']]
+        if current is None or weight > current['max_weight'] or \
+                (weight == current['max_weight'] and achieved_on < current['achieved_on']):
+            best[row['exercise_id']] = {
+                "user_id": user_id,
+                "exercise_id": row['exercise_id'],
+                "max_weight": weight,
+                "workout_id": row['workout_id'],
+                "achieved_on": achieved_on
+            }
+
+    if not best:
+        return
+
+    stmt = dialect_insert(PersonalRecord).values(list(best.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PersonalRecord.user_id, PersonalRecord.exercise_id],
+        set_={
+            "max_weight": stmt.excluded.max_weight,
+            "workout_id": stmt.excluded.workout_id,
+            "achieved_on": stmt.excluded.achieved_on
+        },
+        where=or_(
+            stmt.excluded.max_weight > PersonalRecord.max_weight,
+            and_(
+                stmt.excluded.max_weight == PersonalRecord.max_weight,
+                stmt.excluded.achieved_on < PersonalRecord.achieved_on
+            )
+        )
+    )
+    db.session.execute(stmt)
+
+
+def _recompute_personal_records_held_by(user_id, workout):
+    """
+    Re-derives the PRs that the given (about to be deleted) workout holds
+    from the user's remaining history. PRs held elsewhere are untouched.
+    """
+    held = db.session.execute(
+        select(PersonalRecord.exercise_id).where(
+            PersonalRecord.user_id == user_id,
+            PersonalRecord.workout_id == workout.id
+        )
+    ).scalars().all()
+
+    for exercise_id in held:
+        runner_up = db.session.execute(
+            select(WorkoutExercise.weight_lifted, WorkoutExercise.workout_id, Workout.date)
+            .join(Workout, WorkoutExercise.workout_id == Workout.id)
+            .where(
+                Workout.user_id == user_id,
+                Workout.id != workout.id,
+                WorkoutExercise.exercise_id == exercise_id,
+                WorkoutExercise.weight_lifted > 0
+            )
+            .order_by(WorkoutExercise.weight_lifted.desc(), Workout.date.asc(), WorkoutExercise.id.asc())
+            .limit(1)
+        ).first()
+
+        record = db.session.get(PersonalRecord, (user_id, exercise_id))
+        if runner_up is None:
+            db.session.delete(record)
+        else:
+            record.max_weight, record.workout_id, record.achieved_on = runner_up
+    db.session.flush()
+
+
+def rebuild_personal_records(user_id=None):
+    """
+    Recomputes personal_records from the raw workout tables, for one user or
+    for everyone. The caller commits. Returns the number of rows written.
+    """
+    ranked = select(
+        Workout.user_id,
+        WorkoutExercise.exercise_id,
+        WorkoutExercise.weight_lifted,
+        WorkoutExercise.workout_id,
+        Workout.date,
+        func.row_number().over(
+            partition_by=(Workout.user_id, WorkoutExercise.exercise_id),
+            order_by=(WorkoutExercise.weight_lifted.desc(), Workout.date.asc(), WorkoutExercise.id.asc())
+        ).label('rank')
+    ).join(Workout, WorkoutExercise.workout_id == Workout.id) \
+     .where(WorkoutExercise.weight_lifted > 0)
+
+    clear = delete(PersonalRecord)
+    if user_id is not None:
+        ranked = ranked.where(Workout.user_id == user_id)
+        clear = clear.where(PersonalRecord.user_id == user_id)
+    ranked = ranked.subquery()
+
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(PersonalRecord).from_select(
+            ['user_id', 'exercise_id', 'max_weight', 'workout_id', 'achieved_on'],
+            select(ranked.c.user_id, ranked.c.exercise_id, ranked.c.weight_lifted,
+                   ranked.c.workout_id, ranked.c.date).where(ranked.c.rank == 1)
+        )
+    )
+    return result.rowcount
+
+
+def _mark_activity(user_id, dates):
+    """Sets the bits for the given workout dates, creating year rows as needed."""
+    by_year = defaultdict(set)
+    for day in dates:
+        by_year[day.year].add(day_index(day))
+    if not by_year:
+        return
+
+    stmt = dialect_insert(ActivityBitmap).values([
+        {"user_id": user_id, "year": year, "days": bytes(DAY_BYTES)} for year in by_year
+    ]).on_conflict_do_nothing(index_elements=[ActivityBitmap.user_id, ActivityBitmap.year])
+    db.session.execute(stmt)
+
+    # Row locks keep concurrent writers for the same user from losing bits.
+    bitmaps = db.session.execute(
+        select(ActivityBitmap)
+        .where(ActivityBitmap.user_id == user_id, ActivityBitmap.year.in_(list(by_year)))
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalars()
+    for bitmap in bitmaps:
+        bitmap.days = mark_days(bitmap.days, by_year[bitmap.year])
+    db.session.flush()
+
+
+def _clear_activity_if_last(user_id, workout):
+    """Clears the workout's day unless another of the user's workouts shares it."""
+    other = db.session.execute(
+        select(Workout.id).where(
+            Workout.user_id == user_id,
+            Workout.date == workout.date,
+            Workout.id != workout.id
+        ).limit(1)
+    ).first()
+    if other is not None:
+        return
+
+    bitmap = db.session.execute(
+        select(ActivityBitmap)
+        .where(ActivityBitmap.user_id == user_id, ActivityBitmap.year == workout.date.year)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar()
+    if bitmap is not None:
+        bitmap.days = clear_day(bitmap.days, day_index(workout.date))
+        db.session.flush()
+
+
+def rebuild_activity_bitmaps(user_id=None):
+    """
+    Recomputes activity_bitmaps from the distinct workout dates, for one user
+    or for everyone, in one scan and one bulk INSERT. The caller commits.
+    Returns the number of rows written.
+    """
+    source = select(Workout.user_id, Workout.date).distinct()
+    clear = delete(ActivityBitmap)
+    if user_id is not None:
+        source = source.where(Workout.user_id == user_id)
+        clear = clear.where(ActivityBitmap.user_id == user_id)
+
+    dates = defaultdict(list)
+    for uid, day in db.session.execute(source):
+        dates[uid].append(day)
+
+    rows = [
+        {"user_id": uid, "year": year, "days": days}
+        for uid, user_dates in dates.items()
+        for year, days in build_bitmaps(user_dates).items()
+    ]
+    db.session.execute(clear)
+    if rows:
+        db.session.execute(insert(ActivityBitmap), rows)
+    return len(rows)
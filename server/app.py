@@ -20,6 +20,16 @@ from routes.workouts import workouts_bp
 from routes.profile import profile_bp
 from routes.analytics import analytics_bp
 from routes.metrics import metrics_bp
+from routes.internal import internal_bp
+from commands import aggregates_cli, import_history_command, generate_data_command
+from hashing import HashingPoolSaturated
+from identity import init_identity
+from coalescing import init_coalescing
+from json_provider import FastJSONProvider
+from compression import init_compression
+from instrumentation import init_instrumentation
+from database import init_database
+from routing import init_replicas
 
 migrate = None
 jwt = None
@@ -31,21 +41,29 @@ def create_app(config_class=Config):
     
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
 
     db.init_app(app)
+    init_database(app, db)
+    init_replicas(app, db)
+    init_instrumentation(app, db)
     
     Migrate_class(app, db) 
-    JWTManager_class(app) 
+    jwt = JWTManager_class(app) 
+    init_identity(app, jwt)
+    init_coalescing(app)
     
     CORS_class(app, 
          resources={
              r"/*": {
                  "origins": app.config['CORS_ORIGINS'],
                  "supports_credentials": True,
-                 "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials"],
-                 "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+                 "allow_headers": ["Content-Type", "Authorization", "Access-Control-Allow-Credentials", "If-None-Match"],
+                 "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+                 "expose_headers": ["Link", "X-Next-Cursor", "ETag"]
              }
          })
+    init_compression(app)
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(exercises_bp, url_prefix='/exercises')
@@ -53,6 +71,17 @@ def create_app(config_class=Config):
     app.register_blueprint(profile_bp, url_prefix='/profile')
     app.register_blueprint(analytics_bp, url_prefix='/analytics')
     app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    app.register_blueprint(internal_bp, url_prefix='/internal')
+
+    app.cli.add_command(aggregates_cli)
+    app.cli.add_command(import_history_command)
+    app.cli.add_command(generate_data_command)
+
+    @app.errorhandler(HashingPoolSaturated)
+    def hashing_pool_saturated(e):
+        response = jsonify({"error": "Server is busy, please retry shortly."})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
 
     @app.route("/")
     def index():
@@ -64,7 +93,11 @@ def create_app(config_class=Config):
 
     return app
 
-app = create_app()
+# Spawned hashing-pool workers re-import the script they were started from
+# as __mp_main__. Under `python app.py` they only need the hashing code that
+# is pickled over to them, so they skip building (and connecting) an app.
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == "__main__":
     app.run(debug=True, port=5555)
\ No newline at end of file
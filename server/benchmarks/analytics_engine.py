@@ -0,0 +1,138 @@
+"""
+Training analytics benchmark.
+
+Times the NumPy engine behind /analytics/volume and /analytics/progression
+(one columnar query, array reductions) against a row-by-row baseline that
+walks the user's workouts through the ORM and accumulates the same metrics
+in Python dicts, and checks that both produce the same numbers. Users are
+generated with datagen at each of --years of history. Run from the server
+directory:
+
+    python benchmarks/analytics_engine.py --years 1 5 --workouts-per-week 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _best(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def row_by_row(user_id, date_from, date_to):
+    """Weekly volume, workload ratio and e1RM progression from ORM objects in plain loops."""
+    from sqlalchemy.orm import selectinload
+    from models import Workout, WorkoutExercise
+
+    workouts = Workout.query.options(
+        selectinload(Workout.workout_exercises).joinedload(WorkoutExercise.exercise)
+    ).filter(
+        Workout.user_id == user_id,
+        Workout.date.between(date_from - timedelta(days=28), date_to)
+    ).order_by(Workout.date).all()
+
+    weekly = defaultdict(lambda: defaultdict(float))
+    daily = defaultdict(float)
+    best = defaultdict(dict)
+    for workout in workouts:
+        for we in workout.workout_exercises:
+            load = we.sets * we.reps * (we.weight_lifted or 0.0)
+            daily[workout.date] += load
+            if workout.date >= date_from:
+                week = workout.date - timedelta(days=workout.date.weekday())
+                weekly[week][we.exercise.muscle_group] += load
+            if we.reps > 0 and we.weight_lifted:
+                e1rm = we.weight_lifted if we.reps == 1 else we.weight_lifted * (1 + we.reps / 30.0)
+                sessions = best[we.exercise_id]
+                sessions[workout.date] = max(sessions.get(workout.date, 0.0), e1rm)
+
+    ratios = []
+    day = date_from
+    while day <= date_to:
+        if day.weekday() == 6 or day == date_to:
+            acute = sum(daily.get(day - timedelta(days=i), 0.0) for i in range(7))
+            chronic = sum(daily.get(day - timedelta(days=i), 0.0) for i in range(28)) / 4
+            ratios.append((day, acute / chronic if chronic else None))
+        day += timedelta(days=1)
+
+    return {
+        "weekly": {week: sum(groups.values()) for week, groups in weekly.items()},
+        "ratios": ratios,
+        "best_e1rm": {ex: max(sessions.values()) for ex, sessions in best.items()},
+    }
+
+
+def vectorized(user_id, date_from, date_to):
+    from training_analytics import CHRONIC_DAYS, load_training_frame, progression, volume_report
+
+    report = volume_report(user_id, date_from, date_to)
+    frame = load_training_frame(user_id, date_from - timedelta(days=CHRONIC_DAYS), date_to)
+    return report, progression(frame, limit=50)
+
+
+def check(user_id, date_from, date_to):
+    legacy = row_by_row(user_id, date_from, date_to)
+    report, exercises = vectorized(user_id, date_from, date_to)
+
+    weekly = {week["week_start"]: week["tonnage"] for week in report["weekly"]}
+    assert weekly.keys() == legacy["weekly"].keys(), "weekly buckets differ"
+    assert all(abs(weekly[w] - legacy["weekly"][w]) < 0.1 for w in weekly), "weekly tonnage differs"
+
+    ratios = [(point["date"], point["ratio"]) for point in report["workload"]]
+    assert [d for d, _ in ratios] == [d for d, _ in legacy["ratios"]], "workload dates differ"
+    assert all((a is None and b is None) or abs(a - b) < 0.01
+               for (_, a), (_, b) in zip(ratios, legacy["ratios"])), "workload ratio differs"
+
+    for exercise in exercises:
+        assert abs(exercise["best_e1rm"] - legacy["best_e1rm"][exercise["exercise_id"]]) < 0.1, "e1RM differs"
+
+
+def run(years_list, workouts_per_week, exercises_per_workout, repeat):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('HASH_POOL_WORKERS', '0')
+
+    from app import create_app
+    from models import db, Workout
+    from datagen import generate_history
+
+    app = create_app()
+    print(f"Training analytics, {workouts_per_week} workouts/week x {exercises_per_workout} exercises "
+          f"(best of {repeat})")
+    with app.app_context():
+        db.create_all()
+        for years in years_list:
+            generate_history(1, years=years, workouts_per_week=workouts_per_week,
+                             exercises_per_workout=exercises_per_workout, water_per_day=0,
+                             weigh_ins_per_week=0, prefix=f"analytics{years}y-")
+            user_id = db.session.scalar(db.select(db.func.max(Workout.user_id)))
+            date_to = date.today()
+            date_from = date_to - timedelta(days=int(years * 365))
+            check(user_id, date_from, date_to)
+
+            def fresh(fn):
+                def timed():
+                    db.session.remove()
+                    return fn(user_id, date_from, date_to)
+                return timed
+
+            legacy = _best(fresh(row_by_row), repeat)
+            current = _best(fresh(vectorized), repeat)
+            print(f"  {years} year(s), {years * 52 * workouts_per_week * exercises_per_workout:.0f} sets"
+                  f"   row-by-row: {legacy * 1e3:8.2f} ms   numpy: {current * 1e3:8.2f} ms"
+                  f"   ({legacy / current:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--years', type=float, nargs='+', default=[1, 5])
+    parser.add_argument('--workouts-per-week', type=int, default=5)
+    parser.add_argument('--exercises-per-workout', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    run(args.years, args.workouts_per_week, args.exercises_per_workout, args.repeat)
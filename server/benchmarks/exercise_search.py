@@ -0,0 +1,111 @@
+"""
+Exercise search benchmark.
+
+Builds a synthetic catalog of --size exercises with multi-sentence
+instructions, then times GET /exercises/search's in-memory index over a
+mix of prefix, multi-word, misspelled and filtered queries, against a
+linear scan that lower-cases and substring-matches every exercise (what
+filtering the full GET /exercises/ list amounts to). Reports index build
+time and per-query p50/p99. Run from the server directory:
+
+    python benchmarks/exercise_search.py --size 5000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import ExerciseIndex
+
+MUSCLE_GROUPS = ['Chest', 'Legs', 'Back', 'Shoulders', 'Arms', 'Core']
+EQUIPMENT = ['Barbell', 'Dumbbell', 'Cable', 'Machine', 'Kettlebell', 'Band', 'Smith Machine', 'Bodyweight']
+MOVEMENTS = ['Bench Press', 'Squat', 'Deadlift', 'Row', 'Curl', 'Lunge', 'Fly', 'Pulldown', 'Shrug',
+             'Extension', 'Raise', 'Press', 'Crunch', 'Plank', 'Thrust', 'Pullover', 'Kickback', 'Step Up']
+VARIANTS = ['Incline', 'Decline', 'Seated', 'Standing', 'Single Arm', 'Wide Grip', 'Close Grip', 'Paused',
+            'Tempo', 'Deficit', 'Reverse', 'Lateral', 'Front', 'Overhead', 'Sumo', 'Bulgarian', 'Romanian']
+WORDS = ('keep brace core neutral spine shoulder blades retract squeeze glutes control descent drive '
+         'through heels exhale lockout elbows tucked wrists stacked knees track toes hinge hips tempo '
+         'pause bottom range motion stretch contract hold breathe grip bar handles cable stack').split()
+
+QUERIES = [
+    ('bench', None), ('benc', None), ('squat', None), ('bulgarian split', None), ('incline dumbbell press', None),
+    ('dedlift', None), ('romanain', None), ('pulldwon', None), ('curl', 'Arms'), ('row', 'Back'),
+    ('lateral raise', 'Shoulders'), ('hinge hips', None), ('kettle', None), ('s', None), ('', 'Legs'),
+    ('squeeze glutes', None), ('cable fly', 'Chest'), ('overhead exten', None),
+]
+
+
+def make_catalog(size, seed=0):
+    rng = random.Random(seed)
+    names, exercises = set(), []
+    while len(exercises) < size:
+        name = f"{rng.choice(VARIANTS)} {rng.choice(EQUIPMENT)} {rng.choice(MOVEMENTS)}"
+        if name in names:
+            name = f"{name} {len(exercises)}"
+        names.add(name)
+        instructions = '. '.join(
+            ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize()
+            for _ in range(rng.randint(3, 8))
+        ) + '.'
+        exercises.append({
+            "id": len(exercises) + 1,
+            "name": name,
+            "muscle_group": rng.choice(MUSCLE_GROUPS),
+            "instructions": instructions,
+        })
+    return exercises
+
+
+def linear_scan(exercises, query, muscle_group=None, limit=20, offset=0):
+    terms = query.lower().split()
+    hits = [
+        exercise for exercise in exercises
+        if (muscle_group is None or exercise['muscle_group'] == muscle_group)
+        and all(term in exercise['name'].lower() or term in (exercise['instructions'] or '').lower()
+                for term in terms)
+    ]
+    hits.sort(key=lambda exercise: exercise['name'])
+    return len(hits), hits[offset:offset + limit]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def run(size, rounds):
+    exercises = make_catalog(size)
+    start = time.perf_counter()
+    index = ExerciseIndex(exercises)
+    build = time.perf_counter() - start
+    print(f"Exercise search, {size} exercises: index built in {build * 1e3:.1f} ms "
+          f"({len(index.vocabulary)} tokens)")
+
+    timings = {'index': [], 'scan': []}
+    for _ in range(rounds):
+        for query, group in QUERIES:
+            for name, search in (('index', index.search), ('scan', lambda *a: linear_scan(exercises, *a))):
+                start = time.perf_counter()
+                search(query, group, 20, 0)
+                timings[name].append(time.perf_counter() - start)
+
+    for name, samples in timings.items():
+        p50, p99 = _percentiles(samples)
+        print(f"  {name:6} p50: {p50 * 1e3:7.3f} ms   p99: {p99 * 1e3:7.3f} ms")
+
+    print("  sample results:")
+    for query, group in QUERIES[:8]:
+        total, page = index.search(query, group, 3, 0)
+        print(f"    {query!r:26} {total:5} hits   {[exercise['name'] for exercise in page]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+    run(args.size, args.rounds)
@@ -0,0 +1,78 @@
+"""
+Throughput benchmark for the bulk history importer.
+
+Generates a synthetic CSV export of --workouts sessions with --exercises
+rows each, imports it for a fresh user and reports rows/sec. Uses a
+throwaway SQLite database unless --database-url is given. Run from the
+server directory:
+
+    python benchmarks/import_throughput.py --workouts 20000 --exercises 5
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def build_csv(workouts, exercises_per_workout, exercise_names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['workout_id', 'date', 'workout_name', 'status', 'notes',
+                     'exercise_id', 'exercise_name', 'sets', 'reps', 'weight_lifted'])
+    start = date.today() - timedelta(days=workouts)
+    for i in range(workouts):
+        for j in range(exercises_per_workout):
+            name = exercise_names[(i + j) % len(exercise_names)]
+            writer.writerow([i, (start + timedelta(days=i)).isoformat(), f"Session {i}", 'completed', '',
+                             '', name, 3, 8 + j % 5, 40 + (i % 50)])
+    buffer.seek(0)
+    return buffer
+
+
+def run(workouts, exercises_per_workout, database_url):
+    if database_url:
+        os.environ['DATABASE_URL'] = database_url
+    else:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('HASH_POOL_WORKERS', '0')
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    from models import db, User, Exercise
+    from importer import import_history
+    from seed import CORE_EXERCISES
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for exercise_data in CORE_EXERCISES:
+            if not Exercise.query.filter_by(name=exercise_data['name']).first():
+                db.session.add(Exercise(**exercise_data))
+        user = User(username=f"import-bench-{int(time.time())}", password="benchmark")
+        db.session.add(user)
+        db.session.commit()
+
+        stream = build_csv(workouts, exercises_per_workout, [ex['name'] for ex in CORE_EXERCISES])
+
+        started = time.perf_counter()
+        result = import_history(user.id, stream, 'csv')
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+        dialect = db.engine.dialect.name
+
+    print(f"Imported {result.rows} rows ({result.workouts} workouts) on {dialect}")
+    print(f"  elapsed:    {elapsed:8.2f} s")
+    print(f"  throughput: {result.rows / elapsed:8.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workouts', type=int, default=10000)
+    parser.add_argument('--exercises', type=int, default=5)
+    parser.add_argument('--database-url', default=None)
+    args = parser.parse_args()
+    run(args.workouts, args.exercises, args.database_url)
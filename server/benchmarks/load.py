@@ -0,0 +1,342 @@
+"""
+Load test across every blueprint.
+
+Generates a synthetic dataset (see datagen.py), logs each generated user
+in, then replays a weighted mix of auth, workouts, metrics, analytics,
+exercises and profile requests. Reports per-endpoint p50/p95/p99 latency
+and overall throughput. By default requests go through the Flask test
+client in this process; --gunicorn starts a local gunicorn on the same
+database and drives it over HTTP with --concurrency threads.
+
+--save-baseline writes the results as JSON; --compare checks a run against
+a saved baseline and exits non-zero if any endpoint's p95 or the overall
+throughput regressed by more than --tolerance. Run from the server
+directory:
+
+    python benchmarks/load.py --users 20 --requests 2000
+    python benchmarks/load.py --compare benchmarks/baselines/load-client.json
+    python benchmarks/load.py --gunicorn --workers 4 --concurrency 16
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+
+# (name, method, path, weight). Paths may use {workout_id}.
+SCENARIOS = [
+    ('auth.login', 'POST', '/auth/login', 1),
+    ('auth.check_session', 'GET', '/auth/check_session', 6),
+    ('workouts.list', 'GET', '/workouts?limit=50', 10),
+    ('workouts.get', 'GET', '/workouts/{workout_id}', 5),
+    ('workouts.create', 'POST', '/workouts', 2),
+    ('metrics.summary', 'GET', '/metrics/summary', 8),
+    ('metrics.log_water', 'POST', '/metrics/log_water', 3),
+    ('metrics.log_weight', 'POST', '/metrics/log_weight', 1),
+    ('analytics.stats', 'GET', '/analytics/stats', 5),
+    ('analytics.summary', 'GET', '/analytics/summary', 5),
+    ('exercises.list', 'GET', '/exercises/', 5),
+    ('profile.get', 'GET', '/profile/', 3),
+]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def build_plan(users, count, seed):
+    """A repeatable list of (scenario, user) pairs drawn by scenario weight."""
+    rng = random.Random(seed)
+    weights = [scenario[3] for scenario in SCENARIOS]
+    return [(rng.choices(SCENARIOS, weights)[0], rng.choice(users)) for _ in range(count)]
+
+
+def request_body(name, user, exercise_ids, rng):
+    from datagen import GENERATED_PASSWORD
+
+    if name == 'auth.login':
+        return {"username": user['username'], "password": GENERATED_PASSWORD}
+    if name == 'workouts.create':
+        return {
+            "name": "Load test session",
+            "date": date.today().isoformat(),
+            "workout_exercises": [
+                {"exercise_id": ex_id, "sets": 3, "reps": 8, "weight_lifted": rng.randint(20, 120)}
+                for ex_id in rng.sample(exercise_ids, 3)
+            ]
+        }
+    if name == 'metrics.log_water':
+        return {"amount_ml": rng.choice((250, 500))}
+    if name == 'metrics.log_weight':
+        return {"weight_kg": round(rng.uniform(60, 90), 1)}
+    return None
+
+
+def prepare(args):
+    """Creates the database and dataset; returns (app, users, exercise_ids)."""
+    from sqlalchemy import select, func
+    from app import create_app
+    from models import db, User, Exercise, Workout
+    from datagen import generate_history
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        result = generate_history(
+            args.users, years=args.years, workouts_per_week=args.workouts_per_week,
+            exercises_per_workout=args.exercises_per_workout, seed=args.seed
+        )
+        print(f"Generated {result.to_dict()} in {time.perf_counter() - started:.1f}s")
+
+        latest_workout = (
+            select(Workout.user_id, func.max(Workout.id))
+            .group_by(Workout.user_id).subquery()
+        )
+        rows = db.session.execute(
+            select(User.id, User.username, latest_workout.c[1])
+            .outerjoin(latest_workout, latest_workout.c.user_id == User.id)
+            .where(User.username.like('loaduser%'))
+        ).all()
+        users = [{"id": row[0], "username": row[1], "workout_id": row[2] or 0} for row in rows]
+        exercise_ids = db.session.scalars(select(Exercise.id)).all()
+    return app, users, exercise_ids
+
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method, path, headers, body):
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class GunicornDriver:
+    def __init__(self, workers, env):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen(
+            ['gunicorn', '--workers', str(workers), '--bind', f"127.0.0.1:{self.port}", 'app:app'],
+            cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + 30
+        while True:
+            try:
+                urllib.request.urlopen(self.base_url + '/', timeout=5).close()
+                break
+            except OSError:
+                if time.time() > deadline or self.process.poll() is not None:
+                    self.close()
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+
+    def send(self, method, path, headers, body):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                payload = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status = e.code
+        except OSError:
+            # Connection reset or timed out; count it as a failed request.
+            return 599, None
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def log_in(driver, users):
+    from datagen import GENERATED_PASSWORD
+
+    for user in users:
+        status, payload = driver.send('POST', '/auth/login', {}, {
+            "username": user['username'], "password": GENERATED_PASSWORD
+        })
+        if status != 200:
+            raise RuntimeError(f"Login failed for {user['username']}: {status}")
+        user['headers'] = {'Authorization': f"Bearer {payload['access_token']}"}
+
+
+def run_plan(driver, plan, exercise_ids, concurrency, seed):
+    rng = random.Random(seed)
+    jobs = [
+        (name, method, path.format(workout_id=user['workout_id']),
+         {} if name == 'auth.login' else user['headers'],
+         request_body(name, user, exercise_ids, rng))
+        for (name, method, path, _), user in plan
+    ]
+
+    def timed_send(job):
+        name, method, path, headers, body = job
+        started = time.perf_counter()
+        status, _ = driver.send(method, path, headers, body)
+        return name, status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed_send, jobs))
+    else:
+        samples = [timed_send(job) for job in jobs]
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    by_name = {}
+    for name, status, seconds in samples:
+        by_name.setdefault(name, []).append((status, seconds))
+
+    endpoints = {}
+    for name, results in sorted(by_name.items()):
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        endpoints[name] = {
+            "requests": len(results),
+            "errors": sum(1 for status, _ in results if status >= 400),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+
+    latencies = sorted(seconds * 1000 for _, _, seconds in samples)
+    overall = {
+        "requests": len(samples),
+        "errors": sum(1 for _, status, _ in samples if status >= 400),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+    return endpoints, overall
+
+
+def print_report(endpoints, overall):
+    print(f"\n{'endpoint':<22}{'n':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in endpoints.items():
+        print(f"{name:<22}{stats['requests']:>7}{stats['errors']:>6}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    print(f"{'overall':<22}{overall['requests']:>7}{overall['errors']:>6}"
+          f"{overall['p50_ms']:>10.2f}{overall['p95_ms']:>10.2f}{overall['p99_ms']:>10.2f}")
+    print(f"\nThroughput: {overall['throughput_rps']} req/s over {overall['elapsed_s']}s")
+
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """
+    Returns a list of regressions of `report` against `baseline`. A p95 only
+    counts as regressed if it is also min_delta_ms slower, so sub-millisecond
+    endpoints do not trip on noise.
+    """
+    regressions = []
+    for name, stats in report['endpoints'].items():
+        base = baseline['endpoints'].get(name)
+        if (base and stats['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+                and stats['p95_ms'] - base['p95_ms'] >= min_delta_ms):
+            regressions.append(f"{name}: p95 {stats['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms")
+    base_rps = baseline['overall']['throughput_rps']
+    if report['overall']['throughput_rps'] < base_rps * (1 - tolerance):
+        regressions.append(f"throughput {report['overall']['throughput_rps']} req/s vs baseline {base_rps} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--workouts-per-week', type=int, default=3)
+    parser.add_argument('--exercises-per-workout', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--database-url', help='Defaults to a throwaway SQLite database.')
+    parser.add_argument('--gunicorn', action='store_true', help='Drive a local gunicorn over HTTP.')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads in --gunicorn mode.')
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression, as a fraction.')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Ignore p95 changes smaller than this.')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+    os.environ.setdefault('HASH_POOL_WORKERS', '0')
+    app, users, exercise_ids = prepare(args)
+
+    if args.gunicorn:
+        driver = GunicornDriver(args.workers, dict(os.environ))
+        concurrency = args.concurrency
+    else:
+        driver = TestClientDriver(app)
+        concurrency = 1
+
+    try:
+        log_in(driver, users)
+        plan = build_plan(users, args.requests, args.seed)
+        samples, elapsed = run_plan(driver, plan, exercise_ids, concurrency, args.seed)
+    finally:
+        driver.close()
+
+    endpoints, overall = summarize(samples, elapsed)
+    print_report(endpoints, overall)
+
+    report = {
+        "target": f"gunicorn x{args.workers}, {concurrency} threads" if args.gunicorn else "test-client",
+        "params": {key: value for key, value in vars(args).items()
+                   if key not in ('save_baseline', 'compare', 'database_url', 'tolerance', 'min_delta_ms')},
+        "python": platform.python_version(),
+        "recorded": date.today().isoformat(),
+        "endpoints": endpoints,
+        "overall": overall,
+    }
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%} of {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.compare}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Serialization benchmarks.
+
+By default, compares Exercise.to_dict() against the previous
+implementation, which rebuilt the image mapping and re-derived
+level/duration on every call. With --endpoints, also times the query +
+serialization path of GET /workouts and GET /exercises/ at each of
+--sizes rows: the ORM/to_dict/stdlib-json path they used to take versus
+the row-tuple/FastJSONProvider path (and the cached catalog) they use now.
+Run from the server directory:
+
+    python benchmarks/serialization.py --rows 1000 --repeat 20
+    python benchmarks/serialization.py --endpoints --sizes 1000 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Exercise
+
+MUSCLE_GROUPS = ['Chest', 'Legs', 'Back', 'Shoulders', 'Arms', 'Core']
+IMAGE_LARGE = "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=800&fit=crop"
+IMAGE_SMALL = "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=600&fit=crop"
+
+
+def legacy_get_mock_images(exercise_id):
+    """get_mock_images as it was before the lookup table was hoisted."""
+    image_data = {
+        1: [IMAGE_LARGE, IMAGE_SMALL],
+        2: [IMAGE_LARGE, IMAGE_SMALL],
+        3: [IMAGE_LARGE, IMAGE_SMALL],
+        4: [IMAGE_LARGE, IMAGE_SMALL],
+        5: [IMAGE_LARGE, IMAGE_SMALL],
+        6: [IMAGE_LARGE, IMAGE_SMALL],
+        7: [IMAGE_LARGE, IMAGE_SMALL],
+        8: [IMAGE_LARGE, IMAGE_SMALL],
+        9: [IMAGE_LARGE, IMAGE_SMALL],
+        10: [IMAGE_LARGE, IMAGE_SMALL],
+    }
+    return image_data.get(exercise_id, [IMAGE_LARGE])
+
+
+def legacy_to_dict(exercise):
+    """Exercise.to_dict as it was before presentation fields were precomputed."""
+    if exercise.muscle_group in ['Strength', 'Legs', 'Shoulders']:
+        level = 'Medium'
+        duration = '45 min'
+    elif exercise.muscle_group in ['Arms', 'Core']:
+        level = 'Low'
+        duration = '30 min'
+    else:
+        level = 'High'
+        duration = '55 min'
+
+    return {
+        "id": exercise.id,
+        "title": exercise.name,
+        "category": exercise.muscle_group,
+        "level": level,
+        "duration": duration,
+        "images": legacy_get_mock_images(exercise.id),
+        "name": exercise.name,
+        "muscle_group": exercise.muscle_group,
+        "instructions": exercise.instructions
+    }
+
+
+def make_exercises(rows):
+    return [
+        Exercise(
+            id=i,
+            name=f"Exercise {i}",
+            muscle_group=MUSCLE_GROUPS[i % len(MUSCLE_GROUPS)],
+            instructions="Keep a neutral spine and control the movement."
+        )
+        for i in range(1, rows + 1)
+    ]
+
+
+def run(rows, repeat):
+    exercises = make_exercises(rows)
+
+    legacy = min(timeit.repeat(lambda: [legacy_to_dict(ex) for ex in exercises], number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: [ex.to_dict() for ex in exercises], number=1, repeat=repeat))
+
+    print(f"Exercise.to_dict over {rows} rows (best of {repeat})")
+    print(f"  before: {legacy / rows * 1e6:8.2f} us/row")
+    print(f"  after:  {current / rows * 1e6:8.2f} us/row")
+    print(f"  speedup: {legacy / current:.2f}x")
+
+
+def _best(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def run_endpoints(sizes, repeat):
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ.setdefault('HASH_POOL_WORKERS', '0')
+
+    from flask.json.provider import DefaultJSONProvider
+    from sqlalchemy import insert
+    from app import create_app
+    from models import db, User, Workout, WorkoutExercise
+    from queries import workout_load_options, user_workouts_page
+    from catalog import exercise_catalog
+
+    app = create_app()
+    stdlib_json = DefaultJSONProvider(app)
+
+    def seed(size):
+        db.drop_all()
+        db.create_all()
+        db.session.execute(insert(Exercise), [
+            {"name": f"Exercise {i}", "muscle_group": MUSCLE_GROUPS[i % len(MUSCLE_GROUPS)],
+             "instructions": "Keep a neutral spine and control the movement."}
+            for i in range(1, size + 1)
+        ])
+        user = User(username="serialization-bench", password="benchmark")
+        db.session.add(user)
+        db.session.flush()
+        start = date.today() - timedelta(days=size)
+        workout_ids = db.session.execute(
+            insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+            [{"user_id": user.id, "name": f"Session {i}", "date": start + timedelta(days=i), "status": "completed"}
+             for i in range(size)]
+        ).scalars().all()
+        db.session.execute(insert(WorkoutExercise), [
+            {"workout_id": workout_id, "exercise_id": 1 + (i + j) % size, "sets": 3, "reps": 8, "weight_lifted": 60.0}
+            for i, workout_id in enumerate(workout_ids) for j in range(3)
+        ])
+        db.session.commit()
+        return user.id
+
+    def fresh(fn):
+        def timed():
+            db.session.remove()
+            return fn()
+        return timed
+
+    def legacy_workouts_page(user_id, size):
+        """GET /workouts as it was before keyset pages and row-tuple serialization."""
+        workouts = Workout.query.options(*workout_load_options()) \
+                                .filter_by(user_id=user_id) \
+                                .order_by(Workout.date.desc(), Workout.id.desc()) \
+                                .limit(size)
+        return [w.to_dict() for w in workouts]
+
+    def rebuild_catalog():
+        exercise_catalog.invalidate()
+        return exercise_catalog.get()
+
+    print(f"\nEndpoint query + serialization (best of {repeat})")
+    with app.app_context():
+        for size in sizes:
+            user_id = seed(size)
+
+            legacy_workouts = _best(fresh(lambda: stdlib_json.response(
+                legacy_workouts_page(user_id, size))), repeat)
+            current_workouts = _best(fresh(lambda: app.json.response(
+                user_workouts_page(user_id, size)[0])), repeat)
+            legacy_catalog = _best(fresh(lambda: stdlib_json.response(
+                [ex.to_dict() for ex in Exercise.query.all()])), repeat)
+            cold_catalog = _best(fresh(rebuild_catalog), repeat)
+            warm_catalog = _best(exercise_catalog.get, repeat)
+
+            print(f"  {size} rows")
+            print(f"    /workouts   before: {legacy_workouts * 1e3:8.2f} ms   after: {current_workouts * 1e3:8.2f} ms"
+                  f"   ({legacy_workouts / current_workouts:.2f}x)")
+            print(f"    /exercises/ before: {legacy_catalog * 1e3:8.2f} ms   after (rebuild): {cold_catalog * 1e3:8.2f} ms"
+                  f"   after (cached): {warm_catalog * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--endpoints', action='store_true', help='Also benchmark /workouts and /exercises/.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
+    if args.endpoints:
+        run_endpoints(args.sizes, max(3, args.repeat // 4))
@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import Exercise
+from search import ExerciseIndex
+
+
+class CatalogSnapshot:
+    """Pre-serialized exercise catalog for one cache version."""
+
+    def __init__(self, version, body, ids, exercises):
+        self.version = version
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()
+        self.ids = ids
+        self.exercises = exercises
+        self.search_index = None
+        self.built_at = time.monotonic()
+
+
+class ExerciseCatalogCache:
+    """
+    Process-wide cache of the serialized GET /exercises/ payload.
+
+    The snapshot is rebuilt lazily after any committed change to the
+    exercises table in this process, and at most every EXERCISE_CATALOG_TTL
+    seconds so changes made by other workers are eventually picked up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = None
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def get(self):
+        snapshot = self._snapshot
+        ttl = current_app.config['EXERCISE_CATALOG_TTL']
+        if snapshot is not None and time.monotonic() - snapshot.built_at < ttl:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or time.monotonic() - snapshot.built_at >= ttl:
+                snapshot = self._build(self._version)
+                self._snapshot = snapshot
+            return snapshot
+
+    def search_index(self):
+        """The ExerciseIndex for the current snapshot, built on first use."""
+        snapshot = self.get()
+        if snapshot.search_index is None:
+            with self._lock:
+                if snapshot.search_index is None:
+                    snapshot.search_index = ExerciseIndex(snapshot.exercises)
+        return snapshot.search_index
+
+    def _build(self, version):
+        exercises = [exercise.to_dict() for exercise in Exercise.query.order_by(Exercise.id)]
+        body = current_app.json.response(exercises).get_data()
+        return CatalogSnapshot(version, body, frozenset(exercise['id'] for exercise in exercises), exercises)
+
+
+exercise_catalog = ExerciseCatalogCache()
+
+
+@event.listens_for(Exercise, 'after_insert')
+@event.listens_for(Exercise, 'after_update')
+@event.listens_for(Exercise, 'after_delete')
+def _mark_catalog_dirty(mapper, connection, target):
+    Session.object_session(target).info['exercise_catalog_dirty'] = True
+
+
+@event.listens_for(Session, 'after_bulk_update')
+@event.listens_for(Session, 'after_bulk_delete')
+def _mark_catalog_dirty_bulk(context):
+    if context.mapper.class_ is Exercise:
+        context.session.info['exercise_catalog_dirty'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_catalog_on_commit(session):
+    if session.info.pop('exercise_catalog_dirty', False):
+        exercise_catalog.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_dirty_flag(session):
+    session.info.pop('exercise_catalog_dirty', None)
@@ -0,0 +1,127 @@
+"""
+Request coalescing for the dashboard reads.
+
+The dashboard fires /metrics/summary, /analytics/stats and /analytics/summary
+together, and often retries them. @coalesced keys each computation by
+(user, endpoint, query string, per-user ETag): concurrent identical requests
+in a process wait for one computation and share its body (single-flight),
+and the body is kept in a small LRU/TTL cache for the retries that follow.
+The ETag embeds the user's data_version, so any write moves the user to
+new keys and old results are never served again.
+"""
+import threading
+from collections import namedtuple
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from flask_jwt_extended import get_jwt_identity
+
+from cache import TTLCache
+from conditional import user_etag
+from models import db
+
+
+class CachedResult(namedtuple('CachedResult', ['body', 'status', 'content_type'])):
+    """Immutable copy of a response body, safe to share across requests."""
+
+    def to_response(self):
+        return current_app.response_class(self.body, status=self.status, content_type=self.content_type)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time. Callers that arrive
+    while it runs wait for it and reuse its result.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, compute, wait_timeout, before_wait=None):
+        """
+        compute() returns (value for this caller, shareable result or None).
+        Waiting callers get the shareable result, or run compute() themselves
+        when there is none or the wait times out. before_wait(), if given,
+        runs in each waiting caller first, to release what it holds.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+
+        if leader:
+            try:
+                value, call.result = compute()
+                return value
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if before_wait is not None:
+            before_wait()
+        if call.done.wait(wait_timeout) and call.result is not None:
+            with self._lock:
+                self.shared += 1
+            return call.result.to_response()
+        return compute()[0]
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "shared": self.shared}
+
+
+result_cache = TTLCache(maxsize=4096, ttl=10)
+request_coalescer = SingleFlight()
+
+
+def coalesced(view):
+    """
+    Shares a per-user GET view's 200 responses between identical requests.
+    Apply below @conditional_per_user, which provides the ETag.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        user_id = int(get_jwt_identity())
+        etag = g.get('_user_etag') or user_etag(user_id)
+        if etag is None:
+            return view(*args, **kwargs)
+
+        key = (user_id, request.endpoint, request.query_string, etag)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached.to_response()
+
+        def compute():
+            response = make_response(view(*args, **kwargs))
+            # Results read from a replica that failed mid-request are re-run
+            # on the primary by replica_read, and fallback bodies are partial,
+            # so neither may be shared.
+            if (response.status_code != 200 or response.is_streamed
+                    or g.get('_replica_failed') or g.get('_fallback_response')):
+                return response, None
+            result = CachedResult(response.get_data(), response.status_code, response.content_type)
+            result_cache.set(key, result)
+            return response, result
+
+        # A waiting request gives its connection (checked out by user_etag)
+        # back to the pool, so a burst of identical requests holds one, not N.
+        return request_coalescer.do(key, compute, current_app.config['COALESCE_WAIT_TIMEOUT'],
+                                    before_wait=db.session.close)
+
+    return wrapper
+
+
+def init_coalescing(app):
+    result_cache.configure(app.config['RESULT_CACHE_SIZE'], app.config['RESULT_CACHE_TTL'])
@@ -0,0 +1,111 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+
+from models import db, User
+from importer import import_history, PARSERS
+from datagen import generate_history
+from aggregates import (
+    rebuild_daily_water_totals, rebuild_training_stats, check_training_stats, rebuild_personal_records,
+    rebuild_activity_bitmaps, bump_data_version
+)
+
+aggregates_cli = AppGroup('aggregates', help='Maintain derived per-user tables.')
+
+
+@aggregates_cli.command('rebuild-water')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_water(user_id):
+    """Recompute daily_water_totals from the raw water_logs."""
+    rows = rebuild_daily_water_totals(user_id)
+    bump_data_version(user_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} daily water total rows.")
+
+
+@aggregates_cli.command('rebuild-stats')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_stats(user_id):
+    """Recompute user_training_stats and user_exercise_usage from workouts."""
+    stats_rows, usage_rows = rebuild_training_stats(user_id)
+    bump_data_version(user_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {stats_rows} training stats rows and {usage_rows} exercise usage rows.")
+
+
+@aggregates_cli.command('check-stats')
+@click.option('--user-id', type=int, default=None, help='Only check this user.')
+def check_stats(user_id):
+    """Diff the training aggregates against a raw recomputation."""
+    mismatches = check_training_stats(user_id)
+    for mismatch in mismatches:
+        click.echo(mismatch)
+    if mismatches:
+        raise click.ClickException(f"{len(mismatches)} mismatches found; run 'flask aggregates rebuild-stats'.")
+    click.echo("Training aggregates are consistent.")
+
+
+@aggregates_cli.command('rebuild-records')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_records(user_id):
+    """Recompute personal_records from the workout tables."""
+    rows = rebuild_personal_records(user_id)
+    bump_data_version(user_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} personal record rows.")
+
+
+@aggregates_cli.command('rebuild-activity')
+@click.option('--user-id', type=int, default=None, help='Only rebuild this user.')
+def rebuild_activity(user_id):
+    """Recompute activity_bitmaps (streaks and calendar) from workout dates."""
+    rows = rebuild_activity_bitmaps(user_id)
+    bump_data_version(user_id)
+    db.session.commit()
+    click.echo(f"Rebuilt {rows} activity bitmap rows.")
+
+
+@click.command('import-history')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--user-id', type=int, required=True, help='User to import the history into.')
+@click.option('--format', 'fmt', type=click.Choice(list(PARSERS)), default=None,
+              help='Input format; defaults to the file extension.')
+@with_appcontext
+def import_history_command(path, user_id, fmt):
+    """Bulk-import workout history from a CSV or NDJSON file."""
+    if db.session.get(User, user_id) is None:
+        raise click.ClickException(f"User {user_id} does not exist.")
+
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as stream:
+        result = import_history(user_id, stream, fmt)
+    db.session.commit()
+
+    click.echo(
+        f"Imported {result.workouts} workouts and {result.exercises} exercises "
+        f"from {result.rows} rows ({result.rejected} rejected)."
+    )
+    for error in result.errors:
+        click.echo(f"  line {error['line']}: {error['error']}")
+
+
+@click.command('generate-data')
+@click.option('--users', type=int, default=10, show_default=True, help='Number of users to create.')
+@click.option('--years', type=float, default=1, show_default=True, help='Depth of each user\'s history.')
+@click.option('--workouts-per-week', type=int, default=3, show_default=True)
+@click.option('--exercises-per-workout', type=int, default=5, show_default=True)
+@click.option('--water-per-day', type=int, default=4, show_default=True, help='Water log entries per day.')
+@click.option('--weigh-ins-per-week', type=int, default=3, show_default=True)
+@click.option('--seed', type=int, default=0, show_default=True, help='Random seed, for repeatable datasets.')
+@with_appcontext
+def generate_data_command(users, years, workouts_per_week, exercises_per_workout,
+                          water_per_day, weigh_ins_per_week, seed):
+    """Bulk-generate synthetic users and history for load testing."""
+    result = generate_history(
+        users, years=years, workouts_per_week=workouts_per_week,
+        exercises_per_workout=exercises_per_workout, water_per_day=water_per_day,
+        weigh_ins_per_week=weigh_ins_per_week, seed=seed
+    )
+    click.echo(
+        f"Generated {result.users} users, {result.workouts} workouts, {result.exercises} exercises, "
+        f"{result.water_logs} water logs and {result.weight_logs} weight logs."
+    )
@@ -0,0 +1,87 @@
+import gzip
+
+from flask import request
+
+from cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+})
+
+# Bodies with a strong ETag (the exercise catalog) are byte-identical across
+# requests, so their compressed form is kept instead of recompressed each time.
+compressed_bodies = TTLCache(maxsize=32, ttl=3600)
+
+
+def _encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+
+def compress_response(response, config):
+    """
+    Compresses a buffered response body with brotli or gzip, whichever the
+    client prefers, when it is at least COMPRESSION_MIN_SIZE bytes. Streamed
+    responses (exports) and already-encoded bodies are left alone.
+    """
+    if (request.method == 'HEAD'
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = request.accept_encodings.best_match(_encodings())
+    etag, weak = response.get_etag()
+
+    if response.status_code == 304:
+        # Match the weak validator sent with the compressed 200.
+        if encoding and etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if encoding is None or len(data) < config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    if etag and not weak:
+        key = (etag, encoding)
+        body = compressed_bodies.get(key)
+        if body is None:
+            body = _compress(data, encoding, config)
+            compressed_bodies.set(key, body)
+        # The compressed bytes differ from the identity representation.
+        response.set_etag(etag, weak=True)
+    else:
+        body = _compress(data, encoding, config)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app):
+    """Registers response compression on the app if COMPRESSION_ENABLED."""
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, app.config)
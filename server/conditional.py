@@ -0,0 +1,53 @@
+from datetime import date
+from functools import wraps
+
+from flask import request, make_response, current_app, g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+
+from models import db, User
+
+
+def user_etag(user_id):
+    """
+    Weak ETag for the user's current data. Includes today's date because
+    several views (today's water, the last 30 days) change at midnight.
+    """
+    version = db.session.execute(
+        select(User.data_version).where(User.id == user_id)
+    ).scalar()
+    if version is None:
+        return None
+    return f"{user_id}.{version}.{date.today():%Y%m%d}"
+
+
+def conditional_per_user(view):
+    """
+    Makes a JWT-protected GET view revalidatable. The ETag comes from the
+    user's data_version (one primary-key read), so an If-None-Match hit
+    returns 304 before the view runs any of its own queries. Only complete
+    200 responses are tagged. Must be applied below @jwt_required().
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = user_etag(int(get_jwt_identity()))
+        if etag is None:
+            return view(*args, **kwargs)
+        g._user_etag = etag
+
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            # Errors and fallback bodies (a view that degraded instead of
+            # failing sets g._fallback_response) must not be revalidated later.
+            if response.status_code != 200 or g.get('_fallback_response'):
+                return response
+
+        response.set_etag(etag, weak=True)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Authorization')
+        return response
+
+    return wrapper
@@ -1,5 +1,7 @@
 import os
 
+from database import engine_options, replica_binds
+
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
@@ -14,10 +16,95 @@ class Config:
         'sqlite:///' + os.path.join(basedir, '..', 'instance', 'fittrack.db')
         
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Per-worker connection pool. Size it so workers * (size + overflow) stays
+    # under the database's max_connections.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    # Connections opened per worker at startup (gunicorn.conf.py).
+    DB_POOL_WARMUP = int(os.environ.get('DB_POOL_WARMUP', 2))
+    # PostgreSQL statement timeout while serving web requests only; CLI
+    # commands and migrations run without one.
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+        DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    )
+
+    # Read replicas for the heavy read-only routes, as a comma-separated list.
+    # Each becomes a replica_<n> bind; see routing.py.
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS', 30))
+    SQLALCHEMY_BINDS = replica_binds(
+        DATABASE_REPLICA_URLS, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+        DB_POOL_RECYCLE, DB_POOL_PRE_PING
+    )
   
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-me'
     
     CORS_ORIGINS = [
         "http://localhost:5173", 
         "https://fittrack-0v68.onrender.com",
-    ]
\ No newline at end of file
+    ]
+
+    WORKOUTS_PAGE_SIZE = int(os.environ.get('WORKOUTS_PAGE_SIZE', 50))
+    WORKOUTS_MAX_PAGE_SIZE = int(os.environ.get('WORKOUTS_MAX_PAGE_SIZE', 200))
+    WORKOUTS_MAX_BATCH = int(os.environ.get('WORKOUTS_MAX_BATCH', 500))
+    METRICS_MAX_BATCH = int(os.environ.get('METRICS_MAX_BATCH', 1000))
+
+    # /metrics/*/series: default and maximum points per response, longest rolling window.
+    SERIES_DEFAULT_POINTS = int(os.environ.get('SERIES_DEFAULT_POINTS', 365))
+    SERIES_MAX_POINTS = int(os.environ.get('SERIES_MAX_POINTS', 2000))
+    SERIES_MAX_ROLLING = int(os.environ.get('SERIES_MAX_ROLLING', 90))
+
+    # Longest ?from=/?to= range accepted by /analytics/volume and /analytics/progression
+    ANALYTICS_MAX_DAYS = int(os.environ.get('ANALYTICS_MAX_DAYS', 3 * 366))
+
+    EXERCISE_CATALOG_TTL = int(os.environ.get('EXERCISE_CATALOG_TTL', 300))
+
+    # /exercises/search: 'memory' (per-worker index over the cached catalog) or
+    # 'postgres' (tsvector + pg_trgm indexes; ignored on other databases).
+    EXERCISE_SEARCH_BACKEND = os.environ.get('EXERCISE_SEARCH_BACKEND', 'memory')
+    EXERCISE_SEARCH_PAGE_SIZE = int(os.environ.get('EXERCISE_SEARCH_PAGE_SIZE', 20))
+    EXERCISE_SEARCH_MAX_PAGE_SIZE = int(os.environ.get('EXERCISE_SEARCH_MAX_PAGE_SIZE', 100))
+
+    # Password hashing runs in a per-worker process pool; 0 workers hashes inline.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', 2))
+    HASH_POOL_MAX_PENDING = int(os.environ.get('HASH_POOL_MAX_PENDING', 0)) or HASH_POOL_WORKERS * 4
+    HASH_POOL_TIMEOUT = float(os.environ.get('HASH_POOL_TIMEOUT', 10))
+    HASH_POOL_RETRY_AFTER = int(os.environ.get('HASH_POOL_RETRY_AFTER', 1))
+    HASH_POOL_START_METHOD = os.environ.get('HASH_POOL_START_METHOD', 'spawn')
+
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 10000))
+    IDENTITY_CACHE_TTL = int(os.environ.get('IDENTITY_CACHE_TTL', 60))
+
+    # Dashboard reads (/metrics/summary, /analytics/stats, /analytics/summary):
+    # shared results per (user, endpoint, data_version), and how long an
+    # identical concurrent request waits for the one already computing. These
+    # endpoints answer in milliseconds (p99 under 10 ms in benchmarks/load.py),
+    # so a waiter that is still waiting after 2 s computes for itself.
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 4096))
+    RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 10))
+    COALESCE_WAIT_TIMEOUT = float(os.environ.get('COALESCE_WAIT_TIMEOUT', 2))
+
+    INTERNAL_ENDPOINTS_ENABLED = os.environ.get('INTERNAL_ENDPOINTS_ENABLED', 'false').lower() == 'true'
+
+    # gzip/brotli for buffered responses at or above COMPRESSION_MIN_SIZE bytes.
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+    # Opt-in per-request timing (Server-Timing header, /internal/metrics) and
+    # sampled profiling of slow requests.
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SLOW_REQUEST_MS = int(os.environ.get('PROFILE_SLOW_REQUEST_MS', 500))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(basedir, '..', 'instance', 'profiles')
@@ -0,0 +1,231 @@
+import bisect
+import os
+import threading
+import time
+import weakref
+
+from flask import has_request_context
+from sqlalchemy import event, exc, text
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds, in seconds, of the pool checkout latency histogram buckets.
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class PoolMetrics:
+    """Checkout latency histogram and timeout count across instrumented pools."""
+
+    def __init__(self, buckets=CHECKOUT_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.timeouts = 0
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def render(self, engines):
+        """Prometheus text for the histogram plus live gauges for each QueuePool."""
+        lines = [
+            '# HELP fittrack_db_pool_checkout_seconds Time to check a connection out of the pool.',
+            '# TYPE fittrack_db_pool_checkout_seconds histogram',
+        ]
+        with self._lock:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+                cumulative += count
+                lines.append(f'fittrack_db_pool_checkout_seconds_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'fittrack_db_pool_checkout_seconds_sum {self.total}')
+            lines.append(f'fittrack_db_pool_checkout_seconds_count {cumulative}')
+            lines += [
+                '# HELP fittrack_db_pool_timeouts_total Checkouts that gave up waiting for a connection.',
+                '# TYPE fittrack_db_pool_timeouts_total counter',
+                f'fittrack_db_pool_timeouts_total {self.timeouts}',
+            ]
+
+        gauges = {
+            'in_use': 'Connections currently checked out.',
+            'idle': 'Connections idle in the pool.',
+            'overflow': 'Connections open beyond pool_size.',
+            'capacity': 'pool_size + max_overflow.',
+        }
+        pools = [(name or 'default', engine.pool) for name, engine in engines.items()
+                 if isinstance(engine.pool, QueuePool)]
+        for gauge, description in gauges.items():
+            lines += [
+                f'# HELP fittrack_db_pool_{gauge} {description}',
+                f'# TYPE fittrack_db_pool_{gauge} gauge',
+            ]
+            for name, pool in pools:
+                value = {
+                    'in_use': pool.checkedout(),
+                    'idle': pool.checkedin(),
+                    'overflow': max(pool.overflow(), 0),
+                    'capacity': pool.size() + max(pool._max_overflow, 0),
+                }[gauge]
+                lines.append(f'fittrack_db_pool_{gauge}{{bind="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout takes (queue wait,
+    pre-ping and any new connection) and how many checkouts time out.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.timed_out()
+            raise
+        finally:
+            pool_metrics.observe(time.perf_counter() - start)
+
+
+def engine_options(database_uri, pool_size, max_overflow, pool_timeout, pool_recycle, pool_pre_ping):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS for the configured backend. In-memory
+    SQLite keeps Flask-SQLAlchemy's StaticPool. psycopg2 has no server-side
+    prepared statements, so there is nothing to tune for them here.
+    """
+    if database_uri.startswith('sqlite'):
+        if database_uri in ('sqlite://', 'sqlite:///') or ':memory:' in database_uri:
+            return {}
+        return {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": pool_timeout,
+        }
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": pool_timeout,
+        "pool_recycle": pool_recycle,
+        "pool_pre_ping": pool_pre_ping,
+    }
+    return options
+
+
+def replica_binds(urls, *pool_options):
+    """SQLALCHEMY_BINDS entries replica_0, replica_1, ... with the same pool tuning as the primary."""
+    return {
+        f"replica_{n}": {"url": url, **engine_options(url, *pool_options)}
+        for n, url in enumerate(urls)
+    }
+
+
+def _sqlite_pragmas(busy_timeout_ms):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers run alongside a writer; NORMAL is durable under WAL
+            # except on power loss; busy_timeout makes writers wait, not fail.
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def _request_statement_timeout(timeout_ms):
+    """
+    Checkout hook limiting PostgreSQL statements to timeout_ms while serving
+    a web request, and lifting the limit for CLI commands, migrations and
+    other work outside one. The setting is tracked per connection, so it is
+    only sent when a connection switches between the two.
+    """
+    def set_timeout(dbapi_connection, connection_record, connection_proxy):
+        wanted = timeout_ms if has_request_context() else 0
+        if connection_record.info.get('statement_timeout') == wanted:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET statement_timeout = {int(wanted)}")
+        finally:
+            cursor.close()
+        # Nothing else has run on this checkout yet; commit so the pool's
+        # rollback on checkin does not undo the SET.
+        dbapi_connection.commit()
+        connection_record.info['statement_timeout'] = wanted
+    return set_timeout
+
+
+def warm_pool(engine, connections):
+    """Opens `connections` connections up front so the first requests do not pay for them."""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+# Engines whose pools a forked child must not reuse. Weak, so engines of
+# discarded apps (tests, CLI helpers) are not kept alive by the fork hook.
+_fork_engines = weakref.WeakSet()
+
+
+def _discard_inherited_pools():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_discard_inherited_pools)
+
+
+def init_database(app, db):
+    """
+    Applies per-connection SQLite settings and the web request statement
+    timeout. Pools are discarded in forked children so a preloading gunicorn
+    master never shares sockets with its workers. No connection is opened
+    here; see warm_pools.
+    """
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    timeout_ms = app.config['DB_STATEMENT_TIMEOUT_MS']
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', _sqlite_pragmas(app.config['SQLITE_BUSY_TIMEOUT_MS']))
+        elif engine.dialect.name == 'postgresql' and timeout_ms:
+            event.listen(engine, 'checkout', _request_statement_timeout(timeout_ms))
+        _fork_engines.add(engine)
+
+
+def warm_pools(app, db):
+    """
+    Opens DB_POOL_WARMUP connections in each engine's pool so a worker's
+    first requests do not pay for them. Called from gunicorn's
+    post_worker_init hook (gunicorn.conf.py), once per worker.
+    """
+    warmup = app.config['DB_POOL_WARMUP']
+    if not warmup:
+        return
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        if isinstance(engine.pool, QueuePool):
+            try:
+                warm_pool(engine, min(warmup, engine.pool.size()))
+            except exc.OperationalError as e:
+                print(f"Warning: database pool warm-up failed: {e}")
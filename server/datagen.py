@@ -0,0 +1,167 @@
+"""
+Synthetic data generator for load testing and benchmarks.
+
+Creates N users with a configurable training history (workouts per week,
+exercises per workout) and years of water and weight logs, using bulk
+INSERTs rather than the ORM unit of work. The derived tables are rebuilt
+once at the end. Also available as `flask generate-data`.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import insert, select, func
+
+from models import db, User, Exercise, Workout, WorkoutExercise, WaterLog, WeightLog
+from aggregates import (
+    rebuild_daily_water_totals, rebuild_training_stats, rebuild_personal_records, rebuild_activity_bitmaps
+)
+from hashing import password_hasher
+
+GENERATED_PASSWORD = 'loadtest123'
+
+MUSCLE_GROUPS = ['Chest', 'Legs', 'Back', 'Shoulders', 'Arms', 'Core']
+
+WORKOUT_NAMES = ['Push Day', 'Pull Day', 'Leg Day', 'Full Body', 'Upper Body', 'Core & Conditioning']
+
+
+class GenerationResult:
+    def __init__(self):
+        self.users = 0
+        self.workouts = 0
+        self.exercises = 0
+        self.water_logs = 0
+        self.weight_logs = 0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def ensure_exercises(minimum):
+    """Returns the catalog's exercise ids, topping it up with synthetic ones."""
+    catalog = select(Exercise.id).order_by(Exercise.id)
+    exercise_ids = db.session.scalars(catalog).all()
+    missing = minimum - len(exercise_ids)
+    if missing > 0:
+        start = len(exercise_ids) + 1
+        db.session.execute(insert(Exercise), [
+            {
+                "name": f"Synthetic Exercise {start + i}",
+                "muscle_group": MUSCLE_GROUPS[(start + i) % len(MUSCLE_GROUPS)],
+                "instructions": "Generated for load testing."
+            }
+            for i in range(missing)
+        ])
+        exercise_ids = db.session.scalars(catalog).all()
+    return exercise_ids
+
+
+def _workout_days(rng, start, days, workouts_per_week):
+    """Picks `workouts_per_week` distinct training days in every week."""
+    per_week = min(workouts_per_week, 7)
+    for week_start in range(0, days, 7):
+        week_days = range(week_start, min(week_start + 7, days))
+        for offset in sorted(rng.sample(list(week_days), min(per_week, len(week_days)))):
+            yield start + timedelta(days=offset)
+
+
+def _user_history(rng, user_id, exercise_ids, start, days, workouts_per_week,
+                  exercises_per_workout, water_per_day, weigh_ins_per_week):
+    workouts = []
+    exercises = []
+    # Working weight per exercise, nudged upward over time to look like progression.
+    working_weight = {ex_id: rng.uniform(20, 80) for ex_id in exercise_ids}
+
+    for workout_day in _workout_days(rng, start, days, workouts_per_week):
+        workouts.append({
+            "user_id": user_id,
+            "name": rng.choice(WORKOUT_NAMES),
+            "date": workout_day,
+            "status": 'completed' if rng.random() < 0.9 else 'quit',
+        })
+        chosen = rng.sample(exercise_ids, min(exercises_per_workout, len(exercise_ids)))
+        session = []
+        for ex_id in chosen:
+            working_weight[ex_id] *= rng.uniform(0.99, 1.02)
+            session.append({
+                "exercise_id": ex_id,
+                "sets": rng.randint(2, 5),
+                "reps": rng.randint(5, 12),
+                "weight_lifted": round(working_weight[ex_id] * 2) / 2,
+            })
+        exercises.append(session)
+
+    water = []
+    weight = []
+    body_weight = rng.uniform(55, 100)
+    weigh_in_chance = min(weigh_ins_per_week, 7) / 7
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for _ in range(water_per_day):
+            water.append({
+                "user_id": user_id,
+                "amount_ml": rng.choice((150, 250, 330, 500, 750)),
+                "timestamp": datetime.combine(day, time(rng.randint(6, 22), rng.randint(0, 59))),
+            })
+        if rng.random() < weigh_in_chance:
+            body_weight += rng.uniform(-0.4, 0.35)
+            weight.append({"user_id": user_id, "weight_kg": round(body_weight, 1), "date": day})
+
+    return workouts, exercises, water, weight
+
+
+def generate_history(users, years=1, workouts_per_week=3, exercises_per_workout=5,
+                     water_per_day=4, weigh_ins_per_week=3, seed=0, prefix='loaduser'):
+    """
+    Bulk-inserts `users` synthetic users and their history, then rebuilds the
+    derived tables for everyone. All users share GENERATED_PASSWORD, hashed
+    once. Commits after each user so memory stays flat. Returns a
+    GenerationResult.
+    """
+    rng = random.Random(seed)
+    result = GenerationResult()
+    exercise_ids = ensure_exercises(max(exercises_per_workout, 10))
+    password_hash = password_hasher.hash(GENERATED_PASSWORD)
+
+    days = int(years * 365)
+    start = date.today() - timedelta(days=days)
+    first = db.session.scalar(select(func.count()).where(User.username.like(f"{prefix}%")))
+
+    for n in range(first, first + users):
+        user_id = db.session.execute(
+            insert(User).returning(User.id),
+            {"username": f"{prefix}{n}", "email": f"{prefix}{n}@example.com", "_password_hash": password_hash}
+        ).scalar_one()
+
+        workouts, exercises, water, weight = _user_history(
+            rng, user_id, exercise_ids, start, days, workouts_per_week,
+            exercises_per_workout, water_per_day, weigh_ins_per_week
+        )
+
+        if workouts:
+            workout_ids = db.session.execute(
+                insert(Workout).returning(Workout.id, sort_by_parameter_order=True), workouts
+            ).scalars().all()
+            rows = [
+                {**row, "workout_id": workout_id}
+                for workout_id, session in zip(workout_ids, exercises)
+                for row in session
+            ]
+            db.session.execute(insert(WorkoutExercise), rows)
+            result.exercises += len(rows)
+        if water:
+            db.session.execute(insert(WaterLog), water)
+        if weight:
+            db.session.execute(insert(WeightLog), weight)
+
+        db.session.commit()
+        result.users += 1
+        result.workouts += len(workouts)
+        result.water_logs += len(water)
+        result.weight_logs += len(weight)
+
+    rebuild_daily_water_totals()
+    rebuild_training_stats()
+    rebuild_personal_records()
+    rebuild_activity_bitmaps()
+    db.session.commit()
+    return result
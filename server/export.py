@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from models import db, Workout, WorkoutExercise, Exercise, WaterLog, WeightLog
+
+# Rows are pulled through a server-side cursor in chunks of this size and
+# written out in chunks of the same size, so memory stays flat however long
+# the history is.
+EXPORT_CHUNK_SIZE = 1000
+
+WORKOUT_COLUMNS = (
+    'workout_id', 'date', 'workout_name', 'status', 'notes',
+    'exercise_id', 'exercise_name', 'sets', 'reps', 'weight_lifted'
+)
+WATER_COLUMNS = ('id', 'timestamp', 'amount_ml')
+WEIGHT_COLUMNS = ('id', 'date', 'weight_kg')
+
+
+def _workout_rows(user_id):
+    """One row per logged exercise, flattened with its workout's fields."""
+    return select(
+        Workout.id, Workout.date, Workout.name, Workout.status, Workout.notes,
+        WorkoutExercise.exercise_id, Exercise.name, WorkoutExercise.sets,
+        WorkoutExercise.reps, WorkoutExercise.weight_lifted
+    ).outerjoin(WorkoutExercise, WorkoutExercise.workout_id == Workout.id) \
+     .outerjoin(Exercise, WorkoutExercise.exercise_id == Exercise.id) \
+     .where(Workout.user_id == user_id) \
+     .order_by(Workout.date, Workout.id, WorkoutExercise.id)
+
+
+def _water_rows(user_id):
+    return select(WaterLog.id, WaterLog.timestamp, WaterLog.amount_ml) \
+        .where(WaterLog.user_id == user_id) \
+        .order_by(WaterLog.timestamp, WaterLog.id)
+
+
+def _weight_rows(user_id):
+    return select(WeightLog.id, WeightLog.date, WeightLog.weight_kg) \
+        .where(WeightLog.user_id == user_id) \
+        .order_by(WeightLog.date)
+
+
+DATASETS = {
+    'workouts': (WORKOUT_COLUMNS, _workout_rows),
+    'water': (WATER_COLUMNS, _water_rows),
+    'weight': (WEIGHT_COLUMNS, _weight_rows),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _stream_rows(statement):
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for partition in result.partitions():
+        yield partition
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def _csv_values(row):
+    return [value.isoformat() if hasattr(value, 'isoformat') else value for value in row]
+
+
+def _ndjson_chunks(columns, statement):
+    for partition in _stream_rows(statement):
+        yield ''.join(
+            json.dumps(dict(zip(columns, row)), default=_iso) + '\n'
+            for row in partition
+        )
+
+
+def _csv_chunks(columns, statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for partition in _stream_rows(statement):
+        writer.writerows(_csv_values(row) for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_chunks(user_id, dataset, fmt):
+    """
+    Generator of text chunks for one of the user's datasets ('workouts',
+    'water', 'weight') in 'ndjson' or 'csv'. Must be consumed inside an app
+    context (e.g. wrapped with stream_with_context).
+    """
+    columns, build_statement = DATASETS[dataset]
+    statement = build_statement(user_id)
+    if fmt == 'csv':
+        return _csv_chunks(columns, statement)
+    return _ndjson_chunks(columns, statement)
@@ -0,0 +1,12 @@
+"""
+gunicorn settings, read automatically when gunicorn starts from this
+directory (see start.sh).
+"""
+
+
+def post_worker_init(worker):
+    """Warms the new worker's connection pools once its app is loaded."""
+    from database import warm_pools
+    from models import db
+
+    warm_pools(worker.wsgi, db)
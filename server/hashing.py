@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from instrumentation import timed
+
+DEFAULTS = {
+    'PASSWORD_HASH_METHOD': 'scrypt',
+    'PASSWORD_SALT_LENGTH': 16,
+    'HASH_POOL_WORKERS': 0,
+    'HASH_POOL_MAX_PENDING': 0,
+    'HASH_POOL_TIMEOUT': 10,
+    'HASH_POOL_RETRY_AFTER': 1,
+    'HASH_POOL_START_METHOD': 'spawn',
+}
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool has no room for another job."""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Runs werkzeug's password hashing in a per-process ProcessPoolExecutor so
+    the CPU-heavy KDF does not hold request workers or the GIL.
+
+    At most HASH_POOL_MAX_PENDING jobs may be queued or running; beyond that
+    callers get HashingPoolSaturated straight away instead of queueing. With
+    HASH_POOL_WORKERS = 0 (or outside an app context) hashing runs inline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._prefixes = {}
+
+    def _config(self, key):
+        if has_app_context():
+            return current_app.config.get(key, DEFAULTS[key])
+        return DEFAULTS[key]
+
+    def _pool(self):
+        workers = self._config('HASH_POOL_WORKERS')
+        if not workers:
+            return None, None
+
+        # Pools do not survive a fork, so each gunicorn worker builds its own.
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    context = multiprocessing.get_context(self._config('HASH_POOL_START_METHOD'))
+                    self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+                    self._slots = threading.BoundedSemaphore(self._config('HASH_POOL_MAX_PENDING') or workers * 4)
+                    self._pid = os.getpid()
+        return self._executor, self._slots
+
+    def _run(self, fn, *args):
+        with timed('hash'):
+            return self._submit(fn, *args)
+
+    def _submit(self, fn, *args):
+        executor, slots = self._pool()
+        if executor is None:
+            return fn(*args)
+
+        retry_after = self._config('HASH_POOL_RETRY_AFTER')
+        if not slots.acquire(blocking=False):
+            raise HashingPoolSaturated(retry_after)
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result(timeout=self._config('HASH_POOL_TIMEOUT'))
+        except FutureTimeoutError:
+            raise HashingPoolSaturated(retry_after)
+
+    def hash(self, password):
+        return self._run(
+            generate_password_hash,
+            password,
+            self._config('PASSWORD_HASH_METHOD'),
+            self._config('PASSWORD_SALT_LENGTH')
+        )
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different method or salt length than configured."""
+        method = self._config('PASSWORD_HASH_METHOD')
+        prefix = self._prefixes.get(method)
+        if prefix is None:
+            # werkzeug expands defaults (e.g. 'scrypt' -> 'scrypt:32768:8:1'),
+            # so derive the full prefix from a throwaway hash once per method.
+            prefix = generate_password_hash('', method, 1).split('$', 1)[0]
+            self._prefixes[method] = prefix
+        # werkzeug hashes are "method$salt$hash".
+        hash_prefix, _, rest = password_hash.partition('$')
+        salt = rest.split('$', 1)[0]
+        return hash_prefix != prefix or len(salt) != self._config('PASSWORD_SALT_LENGTH')
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+from flask import jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from models import db, User
+
+
+class UserRecord(namedtuple('UserRecord', ['id', 'username', 'email'])):
+    """Slim, immutable view of a user, safe to share across requests."""
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "username": self.username,
+            "email": self.email
+        }
+
+
+identity_cache = TTLCache()
+
+
+def load_user_record(user_id):
+    """Returns the UserRecord for an id, or None, consulting the cache first."""
+    user_id = int(user_id)
+    record = identity_cache.get(user_id)
+    if record is not None:
+        return record
+
+    row = db.session.query(User.id, User.username, User.email).filter(User.id == user_id).first()
+    if row is None:
+        return None
+
+    record = UserRecord(*row)
+    identity_cache.set(user_id, record)
+    return record
+
+
+def invalidate_user(user_id):
+    identity_cache.pop(int(user_id))
+
+
+def init_identity(app, jwt):
+    """Sizes the identity cache and registers the JWT user loader on `jwt`."""
+    identity_cache.configure(app.config['IDENTITY_CACHE_SIZE'], app.config['IDENTITY_CACHE_TTL'])
+
+    @jwt.user_lookup_loader
+    def user_lookup(jwt_header, jwt_data):
+        return load_user_record(jwt_data['sub'])
+
+    @jwt.user_lookup_error_loader
+    def user_lookup_error(jwt_header, jwt_data):
+        return jsonify({"error": "User not found or session invalid"}), 401
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _queue_identity_invalidation(mapper, connection, target):
+    Session.object_session(target).info.setdefault('stale_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_identities_on_commit(session):
+    for user_id in session.info.pop('stale_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_identity_invalidations(session):
+    session.info.pop('stale_user_ids', None)
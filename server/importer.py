@@ -0,0 +1,217 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from models import db, Workout, WorkoutExercise, Exercise
+from aggregates import rebuild_user_aggregates, bump_data_version
+from validators import EXERCISE_FIELD_MINIMUMS
+
+# Workouts are written in chunks of this many, each chunk being one INSERT
+# for the workouts and one INSERT (or COPY on Postgres) for their exercises.
+IMPORT_CHUNK_SIZE = 1000
+
+MAX_REPORTED_ERRORS = 50
+
+
+class ImportResult:
+    """Counters and (capped) per-row errors for one import run."""
+
+    def __init__(self):
+        self.rows = 0
+        self.workouts = 0
+        self.exercises = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line_no, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "workouts_created": self.workouts,
+            "exercises_created": self.exercises,
+            "rows_rejected": self.rejected,
+            "errors": self.errors
+        }
+
+
+def parse_csv(stream):
+    for line_no, record in enumerate(csv.DictReader(stream), start=2):
+        yield line_no, record
+
+
+def parse_ndjson(stream):
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, None
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ndjson': parse_ndjson,
+}
+
+
+# Bounded by the String(50) workouts.status column.
+MAX_STATUS_LENGTH = 50
+
+
+def _number(record, field, cast, minimum, required=True):
+    value = record.get(field)
+    if value in (None, ''):
+        if required:
+            raise ValueError(f"Missing '{field}'")
+        return None
+    # CSV values arrive as strings; NDJSON ones keep their JSON type, and
+    # int() would otherwise turn true into 1 and 3.9 into 3.
+    if isinstance(value, bool) or (cast is int and isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Invalid '{field}': {value!r}")
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid '{field}': {value!r}")
+    if value < minimum:
+        raise ValueError(f"'{field}' must be at least {minimum}")
+    return value
+
+
+def _parse_record(record, exercise_ids):
+    """
+    Validates one flat row (the shape produced by GET /workouts/export).
+    Returns (workout_key, workout_values, exercise_values or None).
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Row is not a valid record")
+
+    try:
+        workout_date = datetime.strptime(str(record.get('date') or ''), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("Date must be in YYYY-MM-DD format")
+
+    workout_name = str(record.get('workout_name') or '').strip()
+    if not workout_name:
+        raise ValueError("Missing 'workout_name'")
+
+    status = record.get('status') or 'completed'
+    if not isinstance(status, str) or len(status) > MAX_STATUS_LENGTH:
+        raise ValueError(f"'status' must be a string of at most {MAX_STATUS_LENGTH} characters")
+    notes = record.get('notes') or None
+    if notes is not None and not isinstance(notes, str):
+        raise ValueError("'notes' must be a string")
+
+    workout_values = {
+        "name": workout_name,
+        "date": workout_date,
+        "status": status,
+        "notes": notes
+    }
+    key = record.get('workout_id') or (workout_date, workout_name)
+
+    exercise_name = str(record.get('exercise_name') or '').strip()
+    if not exercise_name:
+        return key, workout_values, None
+
+    exercise_id = exercise_ids.get(exercise_name.lower())
+    if exercise_id is None:
+        raise ValueError(f"Unknown exercise '{exercise_name}'")
+
+    exercise_values = {
+        "exercise_id": exercise_id,
+        "sets": _number(record, 'sets', int, EXERCISE_FIELD_MINIMUMS['sets']),
+        "reps": _number(record, 'reps', int, EXERCISE_FIELD_MINIMUMS['reps']),
+        "weight_lifted": _number(record, 'weight_lifted', float, EXERCISE_FIELD_MINIMUMS['weight_lifted'], required=False)
+    }
+    return key, workout_values, exercise_values
+
+
+def _write_workout_exercises(rows):
+    if not rows:
+        return
+
+    if db.engine.dialect.name == 'postgresql':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            weight = row['weight_lifted']
+            writer.writerow((row['workout_id'], row['exercise_id'], row['sets'], row['reps'],
+                             '' if weight is None else weight))
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY workout_exercises (workout_id, exercise_id, sets, reps, weight_lifted) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    else:
+        db.session.execute(insert(WorkoutExercise), rows)
+
+
+def _flush_chunk(user_id, pending, result):
+    workout_ids = db.session.execute(
+        insert(Workout).returning(Workout.id, sort_by_parameter_order=True),
+        [{**workout_values, "user_id": user_id} for workout_values, _ in pending]
+    ).scalars().all()
+
+    rows = [
+        {**exercise_values, "workout_id": workout_id}
+        for workout_id, (_, exercises) in zip(workout_ids, pending)
+        for exercise_values in exercises
+    ]
+    _write_workout_exercises(rows)
+
+    result.workouts += len(workout_ids)
+    result.exercises += len(rows)
+
+
+def import_history(user_id, stream, fmt, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Imports workout history for a user from a text stream of CSV or NDJSON
+    rows, parsing as it reads. Rows belonging to one workout must be
+    contiguous (as in an export); they are grouped by 'workout_id' when
+    present, else by (date, workout_name). Invalid rows are skipped and
+    reported. Derived aggregates are rebuilt once at the end. The caller
+    commits.
+    """
+    exercise_ids = {name.lower(): exercise_id for exercise_id, name in db.session.query(Exercise.id, Exercise.name)}
+    result = ImportResult()
+    pending = []
+    current_key = None
+
+    for line_no, record in PARSERS[fmt](stream):
+        result.rows += 1
+        try:
+            key, workout_values, exercise_values = _parse_record(record, exercise_ids)
+        except ValueError as e:
+            result.reject(line_no, str(e))
+            continue
+
+        if key != current_key or not pending:
+            if len(pending) >= chunk_size:
+                _flush_chunk(user_id, pending, result)
+                pending = []
+            pending.append((workout_values, []))
+            current_key = key
+
+        if exercise_values:
+            pending[-1][1].append(exercise_values)
+
+    if pending:
+        _flush_chunk(user_id, pending, result)
+
+    rebuild_user_aggregates(user_id)
+    bump_data_version(user_id)
+    return result
@@ -0,0 +1,255 @@
+import bisect
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+try:
+    import pyinstrument
+except ImportError:  # pragma: no cover - pyinstrument is optional
+    pyinstrument = None
+
+# Upper bounds, in seconds, of the request duration histogram buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phases timed inside a request, in Server-Timing order.
+PHASES = ('db', 'serialize', 'hash')
+
+
+class RequestTimings:
+    """Per-request accumulator for the phases in PHASES, kept on flask.g."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.sql_statements = 0
+        self.profiler = None
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+
+
+def current_timings():
+    if has_request_context():
+        return g.get('_timings')
+    return None
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to the current request's `phase`."""
+    timings = current_timings()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics rendered in the Prometheus text format. Each
+    gunicorn worker keeps its own registry, so scrape every worker (or sum
+    across them) for a full picture.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self._requests = {}
+        self._durations = {}
+        self._phases = {}
+        self._sql_statements = {}
+
+    def observe(self, method, route, status, timings, duration):
+        with self._lock:
+            key = (method, route, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+            counts, total = self._durations.get((method, route), ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, duration)] += 1
+            self._durations[(method, route)] = (counts, total + duration)
+
+            for phase, seconds in timings.seconds.items():
+                key = (method, route, phase)
+                self._phases[key] = self._phases.get(key, 0.0) + seconds
+            key = (method, route)
+            self._sql_statements[key] = self._sql_statements.get(key, 0) + timings.sql_statements
+
+    def render(self):
+        lines = [
+            '# HELP fittrack_requests_total Requests handled, by route and status.',
+            '# TYPE fittrack_requests_total counter',
+        ]
+        with self._lock:
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f'fittrack_requests_total{_labels(method=method, route=route, status=status)} {count}')
+
+            lines += [
+                '# HELP fittrack_request_duration_seconds Wall time per request.',
+                '# TYPE fittrack_request_duration_seconds histogram',
+            ]
+            for (method, route), (counts, total) in sorted(self._durations.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    labels = _labels(method=method, route=route, le=str(bound))
+                    lines.append(f'fittrack_request_duration_seconds_bucket{labels} {cumulative}')
+                labels = _labels(method=method, route=route)
+                lines.append(f'fittrack_request_duration_seconds_sum{labels} {total}')
+                lines.append(f'fittrack_request_duration_seconds_count{labels} {cumulative}')
+
+            lines += [
+                '# HELP fittrack_request_phase_seconds_total Time spent in SQL, serialization and password hashing.',
+                '# TYPE fittrack_request_phase_seconds_total counter',
+            ]
+            for (method, route, phase), seconds in sorted(self._phases.items()):
+                labels = _labels(method=method, route=route, phase=phase)
+                lines.append(f'fittrack_request_phase_seconds_total{labels} {seconds}')
+
+            lines += [
+                '# HELP fittrack_sql_statements_total SQL statements executed while serving requests.',
+                '# TYPE fittrack_sql_statements_total counter',
+            ]
+            for (method, route), count in sorted(self._sql_statements.items()):
+                lines.append(f'fittrack_sql_statements_total{_labels(method=method, route=route)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+            self._durations.clear()
+            self._phases.clear()
+            self._sql_statements.clear()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+metrics_registry = MetricsRegistry()
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _server_timing(timings, duration):
+    parts = [f'app;dur={duration * 1000:.2f}']
+    for phase in PHASES:
+        seconds = timings.seconds[phase]
+        if phase == 'db':
+            parts.append(f'db;dur={seconds * 1000:.2f};desc="{timings.sql_statements} queries"')
+        elif seconds:
+            parts.append(f'{phase};dur={seconds * 1000:.2f}')
+    return ', '.join(parts)
+
+
+def _start_profiler():
+    try:
+        if pyinstrument is not None:
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+    except (RuntimeError, ValueError):
+        # Another thread is already being profiled; skip this sample.
+        return None
+    return profiler
+
+
+def _save_profile(profiler, profile_dir, duration):
+    os.makedirs(profile_dir, exist_ok=True)
+    route = re.sub(r'[^A-Za-z0-9]+', '_', _route_label()).strip('_') or 'root'
+    stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{route}-{duration * 1000:.0f}ms"
+    if pyinstrument is not None:
+        with open(os.path.join(profile_dir, stem + '.html'), 'w') as f:
+            f.write(profiler.output_html())
+    else:
+        profiler.dump_stats(os.path.join(profile_dir, stem + '.prof'))
+
+
+def _stop_profiler(profiler):
+    if pyinstrument is not None:
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timings() is not None:
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings()
+    starts = conn.info.get('_query_start')
+    if timings is None or not starts:
+        return
+    timings.add('db', time.perf_counter() - starts.pop())
+    timings.sql_statements += 1
+
+
+def init_instrumentation(app, db):
+    """
+    Registers opt-in request instrumentation when INSTRUMENTATION_ENABLED is
+    set: wall, SQL, serialization and hashing time per request, reported in
+    a Server-Timing header and collected for /internal/metrics. With
+    PROFILE_SAMPLE_RATE > 0, that fraction of requests is profiled and the
+    profile is written to PROFILE_DIR when the request takes at least
+    PROFILE_SLOW_REQUEST_MS.
+    """
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _on_before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _on_after_cursor_execute)
+
+    sample_rate = app.config['PROFILE_SAMPLE_RATE']
+    slow_seconds = app.config['PROFILE_SLOW_REQUEST_MS'] / 1000
+    profile_dir = app.config['PROFILE_DIR']
+
+    @app.before_request
+    def start_request_timing():
+        g._timings = timings = RequestTimings()
+        if sample_rate and random.random() < sample_rate:
+            timings.profiler = _start_profiler()
+
+    @app.after_request
+    def finish_request_timing(response):
+        timings = g.pop('_timings', None)
+        if timings is None:
+            return response
+
+        duration = time.perf_counter() - timings.start
+        if timings.profiler is not None:
+            _stop_profiler(timings.profiler)
+            if duration >= slow_seconds:
+                _save_profile(timings.profiler, profile_dir, duration)
+
+        response.headers['Server-Timing'] = _server_timing(timings, duration)
+        metrics_registry.observe(request.method, _route_label(), response.status_code, timings, duration)
+        return response
+
+    @app.teardown_request
+    def stop_abandoned_profiler(exc):
+        timings = g.pop('_timings', None)
+        if timings is not None and timings.profiler is not None:
+            _stop_profiler(timings.profiler)
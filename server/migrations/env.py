@@ -51,6 +51,9 @@ def get_metadata():
     return target_db.metadata
 
 
+UNMODELED_INDEXES = {'ix_exercises_name_trgm', 'ix_exercises_search_document'}
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -90,13 +93,26 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # PostgreSQL-only search indexes are created by hand in the
+    # add_exercise_search_indexes migration and have no model counterpart.
+    def include_object(object, name, type_, reflected, compare_to):
+        return not (type_ == 'index' and reflected and name in UNMODELED_INDEXES)
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_object") is None:
+        conf_args["include_object"] = include_object
 
     connectable = get_engine()
 
     with connectable.connect() as connection:
+        # Backfills and index builds can run far longer than a web request;
+        # never let a statement timeout cancel a migration halfway.
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql("SET statement_timeout = 0")
+            connection.commit()
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
@@ -0,0 +1,54 @@
+"""Add personal_records and backfill it from workout history
+
+Revision ID: 0bf774458a35
+Revises: 24f07780558c
+Create Date: 2026-10-18 15:58:09.640213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0bf774458a35'
+down_revision = '24f07780558c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('personal_records',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('max_weight', sa.Float(), nullable=False),
+    sa.Column('workout_id', sa.Integer(), nullable=False),
+    sa.Column('achieved_on', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_id')
+    )
+    op.create_index(
+        'ix_personal_records_user_id_max_weight',
+        'personal_records',
+        ['user_id', sa.text('max_weight DESC')],
+        unique=False
+    )
+
+    op.execute(
+        "INSERT INTO personal_records (user_id, exercise_id, max_weight, workout_id, achieved_on) "
+        "SELECT user_id, exercise_id, weight_lifted, workout_id, date FROM ("
+        "  SELECT w.user_id, we.exercise_id, we.weight_lifted, we.workout_id, w.date, "
+        "         ROW_NUMBER() OVER ("
+        "           PARTITION BY w.user_id, we.exercise_id "
+        "           ORDER BY we.weight_lifted DESC, w.date ASC, we.id ASC"
+        "         ) AS rank "
+        "  FROM workout_exercises we JOIN workouts w ON we.workout_id = w.id "
+        "  WHERE we.weight_lifted > 0"
+        ") ranked WHERE rank = 1"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_personal_records_user_id_max_weight', table_name='personal_records')
+    op.drop_table('personal_records')
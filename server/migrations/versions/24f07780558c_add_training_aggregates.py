@@ -0,0 +1,59 @@
+"""Add per-user training aggregates and backfill them from workouts
+
+Revision ID: 24f07780558c
+Revises: 8c5f6c93c988
+Create Date: 2026-10-18 14:41:52.310877
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '24f07780558c'
+down_revision = '8c5f6c93c988'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_training_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('workout_count', sa.Integer(), nullable=False),
+    sa.Column('exercise_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_exercise_usage',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('usage_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_id')
+    )
+    op.create_index(
+        'ix_user_exercise_usage_user_id_usage_count',
+        'user_exercise_usage',
+        ['user_id', sa.text('usage_count DESC')],
+        unique=False
+    )
+
+    op.execute(
+        "INSERT INTO user_training_stats (user_id, workout_count, exercise_count) "
+        "SELECT w.user_id, COUNT(DISTINCT w.id), COUNT(we.id) "
+        "FROM workouts w LEFT OUTER JOIN workout_exercises we ON we.workout_id = w.id "
+        "GROUP BY w.user_id"
+    )
+    op.execute(
+        "INSERT INTO user_exercise_usage (user_id, exercise_id, usage_count) "
+        "SELECT w.user_id, we.exercise_id, COUNT(we.id) "
+        "FROM workout_exercises we JOIN workouts w ON we.workout_id = w.id "
+        "GROUP BY w.user_id, we.exercise_id"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_user_exercise_usage_user_id_usage_count', table_name='user_exercise_usage')
+    op.drop_table('user_exercise_usage')
+    op.drop_table('user_training_stats')
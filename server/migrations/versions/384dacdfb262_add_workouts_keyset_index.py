@@ -0,0 +1,29 @@
+"""Add composite index backing keyset pagination of workouts
+
+Revision ID: 384dacdfb262
+Revises: b8ae682a16a2
+Create Date: 2026-10-18 09:12:41.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '384dacdfb262'
+down_revision = 'b8ae682a16a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_workouts_user_id_date_id',
+        'workouts',
+        ['user_id', sa.text('date DESC'), sa.text('id DESC')],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_workouts_user_id_date_id', table_name='workouts')
@@ -0,0 +1,58 @@
+"""Add composite indexes for per-user analytics, metrics and workout queries
+
+Revision ID: 59d8510f8f12
+Revises: 384dacdfb262
+Create Date: 2026-10-18 10:03:17.554120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59d8510f8f12'
+down_revision = '384dacdfb262'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_water_logs_user_id_timestamp',
+        'water_logs',
+        ['user_id', 'timestamp'],
+        unique=False
+    )
+
+    # Keep the most recent row per (user_id, date) before enforcing uniqueness,
+    # matching what log_weight would have returned for that day.
+    op.execute(
+        "DELETE FROM weight_logs WHERE id NOT IN "
+        "(SELECT MAX(id) FROM weight_logs GROUP BY user_id, date)"
+    )
+    op.create_index(
+        'uq_weight_logs_user_id_date',
+        'weight_logs',
+        ['user_id', 'date'],
+        unique=True
+    )
+
+    op.create_index(
+        'ix_workout_exercises_workout_id_exercise_id',
+        'workout_exercises',
+        ['workout_id', 'exercise_id', 'weight_lifted'],
+        unique=False
+    )
+    op.create_index(
+        'ix_workout_exercises_exercise_id',
+        'workout_exercises',
+        ['exercise_id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_workout_exercises_exercise_id', table_name='workout_exercises')
+    op.drop_index('ix_workout_exercises_workout_id_exercise_id', table_name='workout_exercises')
+    op.drop_index('uq_weight_logs_user_id_date', table_name='weight_logs')
+    op.drop_index('ix_water_logs_user_id_timestamp', table_name='water_logs')
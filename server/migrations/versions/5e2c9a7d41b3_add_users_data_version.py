@@ -0,0 +1,26 @@
+"""Add users.data_version for per-user ETags
+
+Revision ID: 5e2c9a7d41b3
+Revises: 0bf774458a35
+Create Date: 2026-10-18 17:12:40.318527
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2c9a7d41b3'
+down_revision = '0bf774458a35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,36 @@
+"""Add daily_water_totals rollup and backfill it from water_logs
+
+Revision ID: 8c5f6c93c988
+Revises: 59d8510f8f12
+Create Date: 2026-10-18 11:26:05.918342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c5f6c93c988'
+down_revision = '59d8510f8f12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_water_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('total_ml', sa.Integer(), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.execute(
+        "INSERT INTO daily_water_totals (user_id, day, total_ml, entry_count) "
+        "SELECT user_id, date(timestamp), SUM(amount_ml), COUNT(id) "
+        "FROM water_logs GROUP BY user_id, date(timestamp)"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_water_totals')
@@ -0,0 +1,44 @@
+"""Add activity_bitmaps and backfill it from workout dates
+
+Revision ID: 9d3e6b1f4a27
+Revises: 5e2c9a7d41b3
+Create Date: 2026-10-18 19:05:12.204815
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3e6b1f4a27'
+down_revision = '5e2c9a7d41b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    activity_bitmaps = op.create_table('activity_bitmaps',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('days', sa.LargeBinary(length=46), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'year')
+    )
+
+    # One bit per day, January 1st = bit 0, little-endian (see activity.py).
+    bits = defaultdict(int)
+    workouts = sa.table('workouts', sa.column('user_id', sa.Integer), sa.column('date', sa.Date))
+    for user_id, day in op.get_bind().execute(sa.select(workouts.c.user_id, workouts.c.date).distinct()):
+        bits[(user_id, day.year)] |= 1 << (day.timetuple().tm_yday - 1)
+
+    if bits:
+        op.bulk_insert(activity_bitmaps, [
+            {"user_id": user_id, "year": year, "days": value.to_bytes(46, 'little')}
+            for (user_id, year), value in bits.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('activity_bitmaps')
@@ -0,0 +1,37 @@
+"""Add PostgreSQL full-text and trigram indexes for exercise search
+
+Revision ID: c41f7a8e2d95
+Revises: 9d3e6b1f4a27
+Create Date: 2026-10-18 20:31:47.562190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7a8e2d95'
+down_revision = '9d3e6b1f4a27'
+branch_labels = None
+depends_on = None
+
+# Must match search.SEARCH_DOCUMENT so the planner can use the index.
+SEARCH_DOCUMENT = "to_tsvector('english', name || ' ' || coalesce(instructions, ''))"
+
+
+def upgrade():
+    # SQLite deployments search the in-memory index only.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(f"CREATE INDEX ix_exercises_search_document ON exercises USING gin ({SEARCH_DOCUMENT})")
+    op.execute("CREATE INDEX ix_exercises_name_trgm ON exercises USING gin (name gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_exercises_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_exercises_search_document")
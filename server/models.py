@@ -1,54 +1,82 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash 
+from types import MappingProxyType
+from sqlalchemy.dialects import postgresql, sqlite
 
-db = SQLAlchemy()
+from hashing import password_hasher
+from routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+def dialect_insert(model):
+    """
+    Returns an INSERT for the model that supports on_conflict_do_update() on
+    the active backend (Postgres in production, SQLite locally).
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+# Presentation data is fixed per exercise id / muscle group, so it is built
+# once at import time rather than on every Exercise.to_dict() call.
+MOCK_IMAGES = MappingProxyType({
+    1: (
+        "https://images.unsplash.com/photo-1581009146145-b5ef050c2e1e?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=600&fit=crop"
+    ),
+    2: (
+        "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1608215543217-2529005fb37c?w=600&fit=crop"
+    ),
+    3: (
+        "https://images.unsplash.com/photo-1534438327276-14e5300c3a48?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=600&fit=crop"
+    ),
+    4: (
+        "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1518611012118-696072aa579a?w=600&fit=crop"
+    ),
+    5: (
+        "https://images.unsplash.com/photo-1590239926044-29b7351e3a66?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1583454110551-21f2fa2afe61?w=600&fit=crop"
+    ),
+    6: (
+        "https://images.unsplash.com/photo-1599058945522-28d584b6f0ff?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1571019614242-c5c5dee9f50b?w=600&fit=crop"
+    ),
+    7: (
+        "https://images.unsplash.com/photo-1616279967983-ec413476e824?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1517931524326-bdd55a541177?w=600&fit=crop"
+    ),
+    8: (
+        "https://images.unsplash.com/photo-1591741531460-2336d8033346?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1581009146145-b5ef050c2e1e?w=600&fit=crop"
+    ),
+    9: (
+        "https://images.unsplash.com/photo-1601422407692-ec4eeec1d9b3?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=600&fit=crop"
+    ),
+    10: (
+        "https://images.unsplash.com/photo-1571019614242-c5c5dee9f50b?w=800&fit=crop", 
+        "https://images.unsplash.com/photo-1544367567-0f2fcb009e0b?w=600&fit=crop"
+    ),
+})
+
+DEFAULT_IMAGES = ("https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=800&fit=crop",)
+
+EXERCISE_PRESENTATION = MappingProxyType({
+    'Strength': ('Medium', '45 min'),
+    'Legs': ('Medium', '45 min'),
+    'Shoulders': ('Medium', '45 min'),
+    'Arms': ('Low', '30 min'),
+    'Core': ('Low', '30 min'),
+})
+
+DEFAULT_PRESENTATION = ('High', '55 min')
 
 def get_mock_images(exercise_id):
     """Maps seeded Exercise IDs (1-10) to placeholder image URLs."""
-    image_data = {
-        1: [
-            "https://images.unsplash.com/photo-1581009146145-b5ef050c2e1e?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=600&fit=crop"
-        ],
-        2: [
-            "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1608215543217-2529005fb37c?w=600&fit=crop"
-        ],
-        3: [
-            "https://images.unsplash.com/photo-1534438327276-14e5300c3a48?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=600&fit=crop"
-        ],
-        4: [
-            "https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1518611012118-696072aa579a?w=600&fit=crop"
-        ],
-        5: [
-            "https://images.unsplash.com/photo-1590239926044-29b7351e3a66?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1583454110551-21f2fa2afe61?w=600&fit=crop"
-        ],
-        6: [
-            "https://images.unsplash.com/photo-1599058945522-28d584b6f0ff?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1571019614242-c5c5dee9f50b?w=600&fit=crop"
-        ],
-        7: [
-            "https://images.unsplash.com/photo-1616279967983-ec413476e824?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1517931524326-bdd55a541177?w=600&fit=crop"
-        ],
-        8: [
-            "https://images.unsplash.com/photo-1591741531460-2336d8033346?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1581009146145-b5ef050c2e1e?w=600&fit=crop"
-        ],
-        9: [
-            "https://images.unsplash.com/photo-1601422407692-ec4eeec1d9b3?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1571019613454-1cb2f99b2d8b?w=600&fit=crop"
-        ],
-        10: [
-            "https://images.unsplash.com/photo-1571019614242-c5c5dee9f50b?w=800&fit=crop", 
-            "https://images.unsplash.com/photo-1544367567-0f2fcb009e0b?w=600&fit=crop"
-        ],
-    }
-    return image_data.get(exercise_id, ["https://images.unsplash.com/photo-1548690312-e3b507d8c110?w=800&fit=crop"])
+    return list(MOCK_IMAGES.get(exercise_id, DEFAULT_IMAGES))
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -59,10 +87,18 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=True) 
   
     _password_hash = db.Column(db.String(255), nullable=False)
+
+    # Bumped by every write to the user's data; per-user ETags are built from it.
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
  
     workouts = db.relationship('Workout', backref='user', lazy='noload', cascade='all, delete-orphan')
     water_logs = db.relationship('WaterLog', backref='user', lazy='dynamic', cascade='all, delete-orphan') 
     weight_logs = db.relationship('WeightLog', backref='user', lazy='dynamic', cascade='all, delete-orphan') 
+    daily_water_totals = db.relationship('DailyWaterTotal', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    training_stats = db.relationship('UserTrainingStats', backref='user', lazy='noload', cascade='all, delete-orphan')
+    exercise_usage = db.relationship('UserExerciseUsage', backref='user', lazy='noload', cascade='all, delete-orphan')
+    personal_records = db.relationship('PersonalRecord', backref='user', lazy='noload', cascade='all, delete-orphan')
+    activity_bitmaps = db.relationship('ActivityBitmap', backref='user', lazy='noload', cascade='all, delete-orphan')
 
     @property
     def password(self):
@@ -70,10 +106,13 @@ class User(db.Model):
 
     @password.setter
     def password(self, password):
-        self._password_hash = generate_password_hash(password)
+        self._password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self._password_hash, password)
+        return password_hasher.verify(self._password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self._password_hash)
 
     def to_dict(self):
         return {
@@ -90,6 +129,10 @@ class WaterLog(db.Model):
     amount_ml = db.Column(db.Integer, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) 
 
+    __table_args__ = (
+        db.Index('ix_water_logs_user_id_timestamp', user_id, timestamp),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -98,6 +141,23 @@ class WaterLog(db.Model):
             "timestamp": self.timestamp.isoformat()
         }
 
+class DailyWaterTotal(db.Model):
+    """Per-user, per-day rollup of water_logs, maintained by log_water."""
+    __tablename__ = 'daily_water_totals'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    total_ml = db.Column(db.Integer, nullable=False, default=0)
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "day": self.day.isoformat(),
+            "total_ml": self.total_ml,
+            "entry_count": self.entry_count
+        }
+
 class WeightLog(db.Model):
     __tablename__ = 'weight_logs'
 
@@ -106,6 +166,11 @@ class WeightLog(db.Model):
     weight_kg = db.Column(db.Float, nullable=False)
     date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date)
 
+    # One weight entry per user per day; log_weight upserts against this.
+    __table_args__ = (
+        db.Index('uq_weight_logs_user_id_date', user_id, date, unique=True),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -126,15 +191,7 @@ class Exercise(db.Model):
     workout_exercises = db.relationship('WorkoutExercise', backref='exercise', lazy=True, cascade='all, delete-orphan')
 
     def to_dict(self):
-        if self.muscle_group in ['Strength', 'Legs', 'Shoulders']:
-            level = 'Medium'
-            duration = '45 min'
-        elif self.muscle_group in ['Arms', 'Core']:
-            level = 'Low'
-            duration = '30 min'
-        else:
-            level = 'High'
-            duration = '55 min'
+        level, duration = EXERCISE_PRESENTATION.get(self.muscle_group, DEFAULT_PRESENTATION)
             
         return {
             "id": self.id,
@@ -160,6 +217,11 @@ class Workout(db.Model):
     
     workout_exercises = db.relationship('WorkoutExercise', backref='workout', lazy=True, cascade='all, delete-orphan')
 
+    # Backs keyset pagination of a user's history (newest first).
+    __table_args__ = (
+        db.Index('ix_workouts_user_id_date_id', user_id, date.desc(), id.desc()),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -182,6 +244,13 @@ class WorkoutExercise(db.Model):
     reps = db.Column(db.Integer, nullable=False)
     weight_lifted = db.Column(db.Float, nullable=True)
 
+    # (workout_id, exercise_id, weight_lifted) covers the per-user joins in
+    # analytics and the PR aggregation without touching the table rows.
+    __table_args__ = (
+        db.Index('ix_workout_exercises_workout_id_exercise_id', workout_id, exercise_id, weight_lifted),
+        db.Index('ix_workout_exercises_exercise_id', exercise_id),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -191,4 +260,55 @@ class WorkoutExercise(db.Model):
             "sets": self.sets,
             "reps": self.reps,
             "weight_lifted": self.weight_lifted
-        }
\ No newline at end of file
+        }
+
+
+class UserTrainingStats(db.Model):
+    """Lifetime workout totals per user, maintained as workouts are added/removed."""
+    __tablename__ = 'user_training_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    workout_count = db.Column(db.Integer, nullable=False, default=0)
+    exercise_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class UserExerciseUsage(db.Model):
+    """How many times each user has logged each exercise."""
+    __tablename__ = 'user_exercise_usage'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), primary_key=True)
+    usage_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Serves the "most frequent exercises" list as an index range read.
+    __table_args__ = (
+        db.Index('ix_user_exercise_usage_user_id_usage_count', user_id, usage_count.desc()),
+    )
+
+
+class PersonalRecord(db.Model):
+    """Heaviest weight each user has lifted per exercise, and where/when."""
+    __tablename__ = 'personal_records'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercises.id'), primary_key=True)
+    max_weight = db.Column(db.Float, nullable=False)
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'), nullable=False)
+    achieved_on = db.Column(db.Date, nullable=False)
+
+    # Serves the dashboard's top-N PRs as an index range read.
+    __table_args__ = (
+        db.Index('ix_personal_records_user_id_max_weight', user_id, max_weight.desc()),
+    )
+
+
+class ActivityBitmap(db.Model):
+    """
+    One bit per day of the year, set when the user logged a workout that
+    day. Bit 0 of byte 0 is January 1st; see activity.py.
+    """
+    __tablename__ = 'activity_bitmaps'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    days = db.Column(db.LargeBinary(46), nullable=False)
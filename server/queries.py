@@ -0,0 +1,106 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import selectinload, joinedload
+
+from models import db, Workout, WorkoutExercise, Exercise
+
+
+def workout_load_options():
+    """
+    Loader options that fetch a workout's exercises and their exercise names
+    alongside the workouts themselves, so Workout.to_dict() never lazy-loads.
+    One extra SELECT covers every workout in the result, however many there are.
+    """
+    return (
+        selectinload(Workout.workout_exercises).joinedload(WorkoutExercise.exercise),
+    )
+
+
+def user_workout_query(user_id, workout_id):
+    """A single workout owned by the user, with exercises eager-loaded."""
+    return Workout.query.options(*workout_load_options()) \
+                        .filter_by(id=workout_id, user_id=user_id)
+
+
+def encode_workout_cursor(workout_date, workout_id):
+    """Opaque cursor pointing just past the given workout in history order."""
+    raw = f"{workout_date.isoformat()}:{workout_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_workout_cursor(cursor):
+    """Returns (date, id) from a cursor. Raises ValueError if it is malformed."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    date_str, id_str = base64.urlsafe_b64decode(padded).decode().split(':')
+    return datetime.strptime(date_str, '%Y-%m-%d').date(), int(id_str)
+
+
+def user_workouts_page(user_id, limit, cursor=None, date_from=None, date_to=None):
+    """
+    One page of a user's history using keyset pagination on (date, id), served
+    by ix_workouts_user_id_date_id. Returns (workouts, next_cursor) where
+    next_cursor is None on the last page.
+
+    Workouts are plain dicts shaped like Workout.to_dict(), built straight
+    from row tuples in two SELECTs without materializing ORM objects. Dates
+    are left as date objects for the JSON provider to encode.
+    """
+    query = select(
+        Workout.id, Workout.user_id, Workout.name, Workout.date, Workout.status, Workout.notes
+    ).where(Workout.user_id == user_id)
+
+    if date_from:
+        query = query.where(Workout.date >= date_from)
+    if date_to:
+        query = query.where(Workout.date <= date_to)
+    if cursor:
+        after_date, after_id = decode_workout_cursor(cursor)
+        query = query.where(tuple_(Workout.date, Workout.id) < (after_date, after_id))
+
+    rows = db.session.execute(
+        query.order_by(Workout.date.desc(), Workout.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_workout_cursor(rows[-1].date, rows[-1].id)
+
+    workouts = [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "name": row.name,
+            "date": row.date,
+            "status": row.status,
+            "notes": row.notes,
+            "workout_exercises": []
+        }
+        for row in rows
+    ]
+    if not workouts:
+        return workouts, next_cursor
+
+    by_id = {workout["id"]: workout for workout in workouts}
+    exercise_rows = db.session.execute(
+        select(
+            WorkoutExercise.id, WorkoutExercise.workout_id, WorkoutExercise.exercise_id,
+            Exercise.name, WorkoutExercise.sets, WorkoutExercise.reps, WorkoutExercise.weight_lifted
+        ).outerjoin(Exercise, WorkoutExercise.exercise_id == Exercise.id)
+         .where(WorkoutExercise.workout_id.in_(by_id))
+         .order_by(WorkoutExercise.id)
+    )
+    for we_id, workout_id, exercise_id, exercise_name, sets, reps, weight_lifted in exercise_rows:
+        by_id[workout_id]["workout_exercises"].append({
+            "id": we_id,
+            "workout_id": workout_id,
+            "exercise_id": exercise_id,
+            "exercise_name": exercise_name,
+            "sets": sets,
+            "reps": reps,
+            "weight_lifted": weight_lifted
+        })
+
+    return workouts, next_cursor
@@ -1,30 +1,42 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
-from datetime import datetime, timedelta
-from models import Workout, WorkoutExercise
+from datetime import date, datetime, timedelta
+from models import db, Workout, UserTrainingStats, UserExerciseUsage
+from conditional import conditional_per_user
+from routing import replica_read
+from coalescing import coalesced
+from training_analytics import load_training_frame, progression, volume_report
+from activity import load_years, streaks, calendar
 
 analytics_bp = Blueprint('analytics', __name__)
 
+# Totals and exercise frequencies are read from the aggregates maintained in
+# aggregates.py rather than recounted from workout history on every request.
+
 @analytics_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@replica_read
+@conditional_per_user
+@coalesced
 def get_workout_stats():
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
-        total_workouts = Workout.query.filter_by(user_id=current_user_id).count()
+        stats = db.session.get(UserTrainingStats, current_user_id)
+        total_workouts = stats.workout_count if stats else 0
+
         thirty_days_ago = datetime.now().date() - timedelta(days=30)
         recent_workouts = Workout.query.filter(
             Workout.user_id == current_user_id,
             Workout.date >= thirty_days_ago
         ).count()
         
-        frequent_exercises = WorkoutExercise.query.join(Workout).filter(
-            Workout.user_id == current_user_id
-        ).with_entities(
-            WorkoutExercise.exercise_id,
-            func.count(WorkoutExercise.id).label('count')
-        ).group_by(WorkoutExercise.exercise_id).order_by(func.count(WorkoutExercise.id).desc()).limit(5).all()
+        frequent_exercises = db.session.query(
+            UserExerciseUsage.exercise_id,
+            UserExerciseUsage.usage_count
+        ).filter(
+            UserExerciseUsage.user_id == current_user_id
+        ).order_by(UserExerciseUsage.usage_count.desc()).limit(5).all()
         
         return jsonify({
             "total_workouts": total_workouts,
@@ -39,14 +51,15 @@ def get_workout_stats():
 
 @analytics_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@conditional_per_user
+@coalesced
 def get_summary():
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         
-        workout_count = Workout.query.filter_by(user_id=current_user_id).count()
-        exercise_count = WorkoutExercise.query.join(Workout).filter(
-            Workout.user_id == current_user_id
-        ).count()
+        stats = db.session.get(UserTrainingStats, current_user_id)
+        workout_count = stats.workout_count if stats else 0
+        exercise_count = stats.exercise_count if stats else 0
         
         return jsonify({
             "workout_count": workout_count,
@@ -55,4 +68,115 @@ def get_summary():
         }), 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+def _range_args(default_days):
+    """Parses ?from=&to= (YYYY-MM-DD), defaulting to the last `default_days` days; raises ValueError."""
+    try:
+        date_to = request.args.get('to')
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else date.today()
+        date_from = request.args.get('from')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else date_to - timedelta(days=default_days)
+    except ValueError:
+        raise ValueError("Invalid 'from' or 'to' parameter. Dates must be YYYY-MM-DD.")
+
+    if date_from > date_to:
+        raise ValueError("'from' must not be after 'to'")
+    max_days = current_app.config['ANALYTICS_MAX_DAYS']
+    if (date_to - date_from).days > max_days:
+        raise ValueError(f"The range between 'from' and 'to' must not exceed {max_days} days")
+    return date_from, date_to
+
+@analytics_bp.route('/volume', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_volume():
+    """
+    Training volume between ?from= and ?to= (default: the last 12 weeks):
+    tonnage per week and muscle group, and the acute:chronic workload ratio
+    at the end of each week.
+    """
+    try:
+        date_from, date_to = _range_args(84)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        report = volume_report(int(get_jwt_identity()), date_from, date_to)
+        return jsonify({"from": date_from, "to": date_to, **report}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@analytics_bp.route('/progression', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_progression():
+    """
+    Estimated 1RM progression between ?from= and ?to= (default: the last
+    year) for ?exercise_id= (repeatable), or for the ?limit= most trained
+    exercises, each series downsampled to at most ?points= points.
+    """
+    try:
+        date_from, date_to = _range_args(365)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        exercise_ids = [int(value) for value in request.args.getlist('exercise_id')] or None
+        limit = int(request.args.get('limit', 5))
+        points = int(request.args.get('points', 100))
+    except ValueError:
+        return jsonify({"error": "'exercise_id', 'limit' and 'points' must be integers"}), 400
+
+    if not 1 <= limit <= 50:
+        return jsonify({"error": "'limit' must be between 1 and 50"}), 400
+    if not 3 <= points <= current_app.config['SERIES_MAX_POINTS']:
+        return jsonify({"error": f"'points' must be between 3 and {current_app.config['SERIES_MAX_POINTS']}"}), 400
+
+    try:
+        frame = load_training_frame(int(get_jwt_identity()), date_from, date_to)
+        return jsonify({
+            "from": date_from,
+            "to": date_to,
+            "exercises": progression(frame, exercise_ids, limit, points)
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@analytics_bp.route('/streaks', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_streaks():
+    """Current and longest workout streaks, from the activity bitmaps."""
+    try:
+        years = load_years(int(get_jwt_identity()))
+        return jsonify(streaks(years, date.today())), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@analytics_bp.route('/calendar', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_calendar():
+    """Days with a workout in ?year= (default: this year), for the heatmap."""
+    try:
+        year = int(request.args.get('year', date.today().year))
+    except ValueError:
+        return jsonify({"error": "'year' must be an integer"}), 400
+    if not 1 <= year <= 9998:
+        return jsonify({"error": "'year' is out of range"}), 400
+
+    try:
+        bits = load_years(int(get_jwt_identity()), year).get(year, 0)
+        return jsonify(calendar(bits, year)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,11 +1,12 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, current_user
 from datetime import timedelta
 import traceback
 from sqlalchemy import or_
 
 from models import db, User
+from hashing import HashingPoolSaturated
 from validators import validate_user_signup, validate_user_login 
 
 auth_bp = Blueprint('auth', __name__)
@@ -36,6 +37,9 @@ def signup():
             "user": user.to_dict()
         }), 201
         
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         print(f"Signup exception: {e}")
@@ -67,6 +71,11 @@ def login():
             print(f"Login attempt failed for identifier: {login_identifier}")
             return jsonify({"error": "Invalid credentials"}), 401
 
+        # Transparently upgrade hashes made with older hashing parameters.
+        if user.password_needs_rehash():
+            user.password = password
+            db.session.commit()
+
         access_token = create_access_token(identity=str(user.id), expires_delta=timedelta(days=1))
         return jsonify({
             "message": "Login successful", 
@@ -74,6 +83,9 @@ def login():
             "user": user.to_dict()
         }), 200
         
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
     except Exception as e:
         print(f"Login exception: {e}")
         return jsonify({"error": str(e)}), 500
@@ -82,11 +94,8 @@ def login():
 @jwt_required()
 def check_session():
     try:
-        current_user_id = get_jwt_identity()
-        
-        current_user_id = int(current_user_id)
-        
-        user = User.query.get(current_user_id)
+        # Resolved through the cached JWT user loader (identity.py).
+        user = current_user
         
         if not user:
             return jsonify({"error": "User not found or session invalid"}), 401 
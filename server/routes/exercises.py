@@ -1,8 +1,10 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required
 import traceback
 
-from models import Exercise 
+from models import db
+from catalog import exercise_catalog
+from search import database_search
 
 exercises_bp = Blueprint('exercises', __name__)
 
@@ -11,19 +13,63 @@ exercises_bp = Blueprint('exercises', __name__)
 def get_all_exercises():
     """Returns a list of all available exercises."""
     try:
-        exercises = Exercise.query.all()
-        
-        exercise_list = [exercise.to_dict() for exercise in exercises]
+        catalog = exercise_catalog.get()
         
         # NOTE: Exercise.to_dict() method handles mapping fields like 
         # 'title', 'category', 'level', 'duration', and 'images' which the 
-        # frontend needs
+        # frontend needs. The serialized list is cached process-wide and
+        # revalidated by clients through its ETag.
+        
+        response = current_app.response_class(catalog.body, mimetype='application/json')
+        response.set_etag(catalog.etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
         
-        return jsonify(exercise_list), 200
+        return response.make_conditional(request)
 
     except Exception as e:
         print("\n--- TRACEBACK START: get_all_exercises FAILED ---")
         traceback.print_exc()
         print(f"CRITICAL ERROR fetching exercises: {e}")
         print("--- TRACEBACK END ---")
-        return jsonify({"error": "Failed to fetch exercises due to server error."}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to fetch exercises due to server error."}), 500
+
+@exercises_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_exercises():
+    """
+    Ranked, typo-tolerant search over exercise names and instructions:
+    ?q= (prefix matches as you type), ?muscle_group=, ?limit= and ?offset=.
+    """
+    config = current_app.config
+    query = request.args.get('q', '').strip()
+    muscle_group = request.args.get('muscle_group', '').strip() or None
+    try:
+        limit = int(request.args.get('limit', config['EXERCISE_SEARCH_PAGE_SIZE']))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "'limit' and 'offset' must be integers"}), 400
+    if not 1 <= limit <= config['EXERCISE_SEARCH_MAX_PAGE_SIZE']:
+        return jsonify({"error": f"'limit' must be between 1 and {config['EXERCISE_SEARCH_MAX_PAGE_SIZE']}"}), 400
+    if offset < 0:
+        return jsonify({"error": "'offset' must not be negative"}), 400
+
+    try:
+        if config['EXERCISE_SEARCH_BACKEND'] == 'postgres' and db.engine.dialect.name == 'postgresql':
+            total, results = database_search(query, muscle_group, limit, offset)
+        else:
+            total, results = exercise_catalog.search_index().search(query, muscle_group, limit, offset)
+
+        return jsonify({
+            "query": query,
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if offset + limit < total else None,
+            "results": results
+        }), 200
+
+    except Exception as e:
+        print(f"ERROR searching exercises: {e}")
+        traceback.print_exc()
+        return jsonify({"error": "Failed to search exercises due to server error."}), 500
@@ -0,0 +1,38 @@
+from flask import Blueprint, jsonify, current_app, abort
+
+from identity import identity_cache
+from catalog import exercise_catalog
+from instrumentation import metrics_registry
+from database import pool_metrics
+from routing import replica_router
+from coalescing import result_cache, request_coalescer
+from models import db
+
+internal_bp = Blueprint('internal', __name__)
+
+@internal_bp.before_request
+def require_internal_enabled():
+    """Internal endpoints are only served when INTERNAL_ENDPOINTS_ENABLED is set."""
+    if not current_app.config['INTERNAL_ENDPOINTS_ENABLED']:
+        abort(404)
+
+
+@internal_bp.route('/caches', methods=['GET'])
+def cache_stats():
+    """Hit/miss counters and sizes of the in-process caches, for tuning."""
+    return jsonify({
+        "identity": identity_cache.stats(),
+        "exercise_catalog": {"version": exercise_catalog.version},
+        "replicas": replica_router.stats(),
+        "dashboard_results": result_cache.stats(),
+        "coalesced_requests": request_coalescer.stats()
+    }), 200
+
+
+@internal_bp.route('/metrics', methods=['GET'])
+def request_metrics():
+    """Per-route request and connection pool metrics in the Prometheus text format."""
+    return current_app.response_class(
+        metrics_registry.render() + pool_metrics.render(db.engines),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,10 +1,15 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, date, timedelta
-import traceback
 
-from models import db, WaterLog, WeightLog, Exercise, Workout, WorkoutExercise 
-from sqlalchemy import func 
+from models import db, dialect_insert, WaterLog, WeightLog, Exercise, DailyWaterTotal, PersonalRecord
+from aggregates import add_to_daily_water_total, add_to_daily_water_totals, bump_data_version
+from conditional import conditional_per_user
+from routing import replica_read
+from coalescing import coalesced
+from validators import validate_water_entry, validate_weight_entry
+from series import BUCKETS, weight_series, water_series, lttb
+from sqlalchemy import insert
 
 metrics_bp = Blueprint('metrics', __name__)
 
@@ -33,6 +38,8 @@ def log_water():
         )
         
         db.session.add(water_entry)
+        add_to_daily_water_total(int(current_user_id), timestamp.date(), amount_ml)
+        bump_data_version(int(current_user_id))
         db.session.commit()
         
         return jsonify({
@@ -50,9 +57,9 @@ def log_water():
 @metrics_bp.route('/log_weight', methods=['POST'])
 @jwt_required()
 def log_weight():
-    """Logs a body weight entry for the current user."""
+    """Logs a body weight entry for the current user, replacing that day's entry if any."""
     try:
-        current_user_id = get_jwt_identity()
+        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         if not data or 'weight_kg' not in data:
@@ -70,37 +77,145 @@ def log_weight():
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD."}), 400
         
-        existing_log = WeightLog.query.filter_by(user_id=current_user_id, date=log_date).first()
-        
-        if existing_log:
-            existing_log.weight_kg = weight_kg
+        # Only picks the response message; the upsert below is what keeps
+        # concurrent requests for the same day from colliding.
+        existed = db.session.query(WeightLog.id).filter_by(user_id=current_user_id, date=log_date).first() is not None
+
+        stmt = dialect_insert(WeightLog).values(user_id=current_user_id, weight_kg=weight_kg, date=log_date)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WeightLog.user_id, WeightLog.date],
+            set_={"weight_kg": stmt.excluded.weight_kg}
+        ).returning(WeightLog)
+        weight_entry = db.session.execute(stmt, execution_options={"populate_existing": True}).scalar_one()
+        log = weight_entry.to_dict()
+        bump_data_version(current_user_id)
+        db.session.commit()
+
+        if existed:
+            return jsonify({"message": "Weight updated successfully for today", "log": log}), 200
+        return jsonify({"message": "Weight logged successfully", "log": log}), 201
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR in log_weight: {e}") 
+        return jsonify({"error": "Failed to log weight due to server error."}), 500
+
+
+def _batch_entries(data, key):
+    """Accepts either a bare list or {key: [...]}; returns the list or None."""
+    entries = data.get(key) if isinstance(data, dict) else data
+    return entries if isinstance(entries, list) and entries else None
+
+
+def _batch_response(accepted, errors):
+    return jsonify({
+        "accepted": accepted,
+        "rejected": len(errors),
+        "errors": [{"index": idx, "errors": entry_errors} for idx, entry_errors in errors]
+    }), 201 if accepted else 400
+
+
+@metrics_bp.route('/water/batch', methods=['POST'])
+@jwt_required()
+def log_water_batch():
+    """
+    Logs many water entries at once (e.g. a wearable sync). Valid entries are
+    written with one multi-row INSERT; invalid ones are reported by index.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        entries = _batch_entries(request.get_json(silent=True), 'entries')
+
+        if entries is None:
+            return jsonify({"error": "Expected a non-empty list of water entries."}), 400
+        if len(entries) > current_app.config['METRICS_MAX_BATCH']:
+            return jsonify({"error": f"A batch may contain at most {current_app.config['METRICS_MAX_BATCH']} entries."}), 400
+
+        rows = []
+        errors = []
+        daily_totals = {}
+        now = datetime.utcnow()
+
+        for idx, entry in enumerate(entries):
+            entry_errors = validate_water_entry(entry)
+            if entry_errors:
+                errors.append((idx, entry_errors))
+                continue
+
+            timestamp_str = entry.get('timestamp')
+            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%dT%H:%M:%S.%fZ') if timestamp_str else now
+            rows.append({"user_id": current_user_id, "amount_ml": entry['amount_ml'], "timestamp": timestamp})
+
+            amount_ml, entry_count = daily_totals.get(timestamp.date(), (0, 0))
+            daily_totals[timestamp.date()] = (amount_ml + entry['amount_ml'], entry_count + 1)
+
+        if rows:
+            db.session.execute(insert(WaterLog).values(rows))
+            add_to_daily_water_totals(current_user_id, daily_totals)
+            bump_data_version(current_user_id)
             db.session.commit()
-            return jsonify({
-                "message": "Weight updated successfully for today",
-                "log": existing_log.to_dict()
-            }), 200
-        else:
-            weight_entry = WeightLog(
-                user_id=current_user_id,
-                weight_kg=weight_kg,
-                date=log_date
+
+        return _batch_response(len(rows), errors)
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR in log_water_batch: {e}")
+        return jsonify({"error": "Failed to log water intake due to server error."}), 500
+
+
+@metrics_bp.route('/weight/batch', methods=['POST'])
+@jwt_required()
+def log_weight_batch():
+    """
+    Logs many body weight entries at once. Entries upsert on (user, date) like
+    log_weight; when a batch repeats a date, the last entry for it wins.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        entries = _batch_entries(request.get_json(silent=True), 'entries')
+
+        if entries is None:
+            return jsonify({"error": "Expected a non-empty list of weight entries."}), 400
+        if len(entries) > current_app.config['METRICS_MAX_BATCH']:
+            return jsonify({"error": f"A batch may contain at most {current_app.config['METRICS_MAX_BATCH']} entries."}), 400
+
+        rows_by_date = {}
+        errors = []
+        today = datetime.utcnow().date()
+
+        for idx, entry in enumerate(entries):
+            entry_errors = validate_weight_entry(entry)
+            if entry_errors:
+                errors.append((idx, entry_errors))
+                continue
+
+            date_str = entry.get('date')
+            log_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else today
+            rows_by_date[log_date] = {"user_id": current_user_id, "weight_kg": entry['weight_kg'], "date": log_date}
+
+        if rows_by_date:
+            stmt = dialect_insert(WeightLog).values(list(rows_by_date.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[WeightLog.user_id, WeightLog.date],
+                set_={"weight_kg": stmt.excluded.weight_kg}
             )
-            db.session.add(weight_entry)
+            db.session.execute(stmt)
+            bump_data_version(current_user_id)
             db.session.commit()
-            
-            return jsonify({
-                "message": "Weight logged successfully",
-                "log": weight_entry.to_dict()
-            }), 201
-            
+
+        return _batch_response(len(entries) - len(errors), errors)
+
     except Exception as e:
         db.session.rollback()
-        print(f"ERROR in log_weight: {e}") 
+        print(f"ERROR in log_weight_batch: {e}")
         return jsonify({"error": "Failed to log weight due to server error."}), 500
 
 
 @metrics_bp.route('/summary', methods=['GET'])
 @jwt_required()
+@replica_read
+@conditional_per_user
+@coalesced
 def get_metrics_summary():
     """
     Returns the current day's water intake, latest weight, and PRs.
@@ -109,10 +224,8 @@ def get_metrics_summary():
     current_user_id = get_jwt_identity()
     today = date.today()
     
-    water_intake_today = db.session.query(func.sum(WaterLog.amount_ml)).filter(
-        WaterLog.user_id == current_user_id,
-        func.date(WaterLog.timestamp) == today
-    ).scalar() or 0
+    todays_water = db.session.get(DailyWaterTotal, (int(current_user_id), today))
+    water_intake_today = todays_water.total_ml if todays_water else 0
     
     latest_weight_entry = WeightLog.query.filter_by(user_id=current_user_id) \
                                         .order_by(WeightLog.date.desc()) \
@@ -132,27 +245,25 @@ def get_metrics_summary():
     
     try:
         pr_query = db.session.query(
-            WorkoutExercise.exercise_id, 
-            func.max(WorkoutExercise.weight_lifted).label('max_weight'),
+            PersonalRecord.max_weight,
+            PersonalRecord.achieved_on,
             Exercise.name
-        ).join(Exercise, WorkoutExercise.exercise_id == Exercise.id) \
-         .join(Workout) \
-         .filter(Workout.user_id == current_user_id) \
-         .filter(WorkoutExercise.weight_lifted.isnot(None)) \
-         .group_by(WorkoutExercise.exercise_id, Exercise.name) \
-         .order_by(func.max(WorkoutExercise.weight_lifted).desc()) \
-         .limit(3) 
+        ).join(Exercise, PersonalRecord.exercise_id == Exercise.id) \
+         .filter(PersonalRecord.user_id == current_user_id) \
+         .order_by(PersonalRecord.max_weight.desc()) \
+         .limit(3)
 
         for pr in pr_query.all():
-            if pr.max_weight > 0: 
-                personal_records[pr.name] = {
-                    'weight': round(pr.max_weight, 1),
-                    'date': 'N/A' #
-                }
+            personal_records[pr.name] = {
+                'weight': round(pr.max_weight, 1),
+                'date': pr.achieved_on.isoformat()
+            }
     except Exception as e:
 
-        print(f"Warning: Failed to calculate PRs: {e}")
+        print(f"Warning: Failed to load PRs: {e}")
         personal_records = {}
+        # The summary is still useful without PRs, but must not be cached as if complete.
+        g._fallback_response = True
 
 
     next_workout_placeholder = {
@@ -166,4 +277,78 @@ def get_metrics_summary():
         "weightHistory": weight_trend_data,
         "personalRecords": personal_records,
         "nextWorkout": next_workout_placeholder
-    }), 200
\ No newline at end of file
+    }), 200
+
+
+def _series_args():
+    """Parses ?from=&to=&bucket=&points=&rolling= for the series endpoints; raises ValueError."""
+    config = current_app.config
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValueError(f"'bucket' must be one of: {', '.join(BUCKETS)}")
+
+    try:
+        date_to = request.args.get('to')
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else date.today()
+        date_from = request.args.get('from')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else date_to - timedelta(days=365)
+        points = int(request.args.get('points', config['SERIES_DEFAULT_POINTS']))
+        rolling = int(request.args['rolling']) if request.args.get('rolling') else None
+    except ValueError:
+        raise ValueError("Invalid 'from', 'to', 'points' or 'rolling' parameter. Dates must be YYYY-MM-DD.")
+
+    if date_from > date_to:
+        raise ValueError("'from' must not be after 'to'")
+    if not 3 <= points <= config['SERIES_MAX_POINTS']:
+        raise ValueError(f"'points' must be between 3 and {config['SERIES_MAX_POINTS']}")
+    if rolling is not None and not 1 <= rolling <= config['SERIES_MAX_ROLLING']:
+        raise ValueError(f"'rolling' must be between 1 and {config['SERIES_MAX_ROLLING']}")
+    return date_from, date_to, bucket, points, rolling
+
+
+def _series_response(load_series):
+    try:
+        date_from, date_to, bucket, points, rolling = _series_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        series = load_series(int(get_jwt_identity()), date_from, date_to, bucket, rolling)
+        sampled = lttb(series, points)
+        return jsonify({
+            "from": date_from,
+            "to": date_to,
+            "bucket": bucket,
+            "rolling": rolling,
+            "buckets": len(series),
+            "downsampled": len(sampled) < len(series),
+            "points": sampled
+        }), 200
+    except Exception as e:
+        print(f"ERROR in {load_series.__name__}: {e}")
+        return jsonify({"error": "Failed to load series due to server error."}), 500
+
+
+@metrics_bp.route('/weight/series', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_weight_series():
+    """
+    Body weight over time: average/min/max per ?bucket=day|week|month
+    between ?from= and ?to=, downsampled to at most ?points= points, with
+    an optional ?rolling=N bucket moving average.
+    """
+    return _series_response(weight_series)
+
+
+@metrics_bp.route('/water/series', methods=['GET'])
+@jwt_required()
+@replica_read
+@conditional_per_user
+def get_water_series():
+    """
+    Water intake over time from the daily rollups: total and average daily
+    ml per bucket, with the same parameters as /weight/series.
+    """
+    return _series_response(water_series)
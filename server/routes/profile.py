@@ -1,9 +1,10 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from werkzeug.security import generate_password_hash, check_password_hash 
 import traceback
 
 from models import db, User 
+from hashing import HashingPoolSaturated
 
 profile_bp = Blueprint('profile', __name__)
 
@@ -12,8 +13,8 @@ profile_bp = Blueprint('profile', __name__)
 def get_profile():
     """Returns the current user's profile information."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        # Resolved through the cached JWT user loader (identity.py).
+        user = current_user
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -33,7 +34,7 @@ def update_profile():
     """Allows authenticated user to update their username or email."""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user.id)
         data = request.get_json()
 
         print(f"DEBUG: Profile update attempt for User ID: {current_user_id}. Data received: {data}")
@@ -78,8 +79,7 @@ def update_profile():
 def change_password():
     """Allows authenticated user to change their password."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = db.session.get(User, current_user.id)
         data = request.get_json()
 
         if not user:
@@ -99,6 +99,9 @@ def change_password():
 
         return jsonify({"message": "Password updated successfully"}), 200
 
+    except HashingPoolSaturated:
+        db.session.rollback()
+        raise
     except Exception as e:
         db.session.rollback()
         print("\n--- TRACEBACK START: change_password FAILED ---")
@@ -1,26 +1,68 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, url_for, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+import io
 import traceback
+from sqlalchemy import insert, select
 
 from models import db, Workout, WorkoutExercise, Exercise
+from catalog import exercise_catalog
+from aggregates import record_workouts_added, record_workout_deleted, bump_data_version
+from export import export_chunks, DATASETS, FORMATS
+from importer import import_history, PARSERS
 from validators import validate_workout_data
+from queries import user_workouts_page, user_workout_query
+from conditional import conditional_per_user
+from routing import replica_read
 
 workouts_bp = Blueprint('workouts', __name__)
 
 @workouts_bp.route('', methods=['GET'])
 @workouts_bp.route('/', methods=['GET'])
 @jwt_required()
+@replica_read
+@conditional_per_user
 def get_workouts():
+    """
+    Returns one page of the user's workouts, newest first. Supports
+    ?limit=, ?cursor= and ?from=/?to= (YYYY-MM-DD). The cursor for the next
+    page is sent in the X-Next-Cursor and Link headers.
+    """
     try:
         current_user_id = get_jwt_identity()
         current_user_id = int(current_user_id) 
+
+        try:
+            limit = int(request.args.get('limit', current_app.config['WORKOUTS_PAGE_SIZE']))
+            date_from = request.args.get('from')
+            date_to = request.args.get('to')
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        except ValueError:
+            return jsonify({"error": "Invalid 'limit', 'from' or 'to' parameter. Dates must be YYYY-MM-DD."}), 400
+
+        if limit <= 0:
+            return jsonify({"error": "'limit' must be a positive integer"}), 400
+        limit = min(limit, current_app.config['WORKOUTS_MAX_PAGE_SIZE'])
+
+        try:
+            workouts, next_cursor = user_workouts_page(
+                current_user_id,
+                limit,
+                cursor=request.args.get('cursor'),
+                date_from=date_from,
+                date_to=date_to
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid pagination cursor"}), 400
         
-        workouts = Workout.query.filter_by(user_id=current_user_id).order_by(Workout.date.desc()).all()
-        
-        serialized_workouts = [workout.to_dict() for workout in workouts]
-        
-        return jsonify(serialized_workouts), 200 
+        response = jsonify(workouts)
+        if next_cursor:
+            next_args = {**request.args.to_dict(), 'cursor': next_cursor, 'limit': limit}
+            response.headers['X-Next-Cursor'] = next_cursor
+            response.headers['Link'] = f'<{url_for(request.endpoint, **next_args)}>; rel="next"'
+
+        return response, 200 
         
     except Exception as e:
         print(f"WORKOUTS ERROR in get_workouts: {e}") 
@@ -29,7 +71,55 @@ def get_workouts():
         if "revoked" in str(e).lower() or "expired" in str(e).lower() or "invalid" in str(e).lower() or "missing" in str(e).lower():
             return jsonify({"error": "Authentication error"}), 401
             
-        return jsonify([]), 200
+        return jsonify({"error": "Failed to retrieve workouts"}), 500
+
+
+def _missing_exercise_ids(exercise_ids):
+    """
+    Returns the ids that are not in the exercise catalog. Ids absent from the
+    cached catalog are re-checked with a single IN (...) query in case the
+    catalog changed in another worker.
+    """
+    missing = set(exercise_ids) - exercise_catalog.get().ids
+    if missing:
+        found = {row[0] for row in db.session.query(Exercise.id).filter(Exercise.id.in_(missing))}
+        missing -= found
+    return missing
+
+
+def _add_workouts(user_id, payloads):
+    """
+    Creates workouts from validated payloads in the current transaction. All
+    WorkoutExercise rows across every workout go out in one multi-row INSERT.
+    """
+    workouts = [
+        Workout(
+            user_id=user_id,
+            name=data['name'],
+            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
+            status=data.get('status', 'completed')
+        )
+        for data in payloads
+    ]
+    db.session.add_all(workouts)
+    db.session.flush()
+
+    rows = [
+        {
+            "workout_id": workout.id,
+            "exercise_id": ex_data['exercise_id'],
+            "sets": ex_data.get('sets', 1),
+            "reps": ex_data.get('reps', 0),
+            "weight_lifted": ex_data.get('weight_lifted', 0)
+        }
+        for workout, data in zip(workouts, payloads)
+        for ex_data in data['workout_exercises']
+    ]
+    db.session.execute(insert(WorkoutExercise).values(rows))
+    record_workouts_added(user_id, workouts, rows)
+    bump_data_version(user_id)
+
+    return workouts
 
 
 @workouts_bp.route('', methods=['POST'])
@@ -48,31 +138,16 @@ def create_workout():
         if errors:
             return jsonify({"errors": errors}), 400
 
-        workout = Workout(
-            user_id=current_user_id,
-            name=data['name'],
-            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-            status=data.get('status', 'completed')
-        )
-        db.session.add(workout)
-        db.session.flush() 
-
-        for ex_data in data['workout_exercises']:
-            exercise = Exercise.query.get(ex_data['exercise_id'])
-            if not exercise:
-                db.session.rollback()
-                return jsonify({"error": f"Exercise ID {ex_data['exercise_id']} not found"}), 400
-
-            workout_exercise = WorkoutExercise(
-                workout_id=workout.id,
-                exercise_id=ex_data['exercise_id'],
-                sets=ex_data.get('sets', 1),
-                reps=ex_data.get('reps', 0),
-                weight_lifted=ex_data.get('weight_lifted', 0) 
-            )
-            db.session.add(workout_exercise)
+        exercise_ids = [ex_data['exercise_id'] for ex_data in data['workout_exercises']]
+        missing = _missing_exercise_ids(exercise_ids)
+        if missing:
+            first_missing = next(ex_id for ex_id in exercise_ids if ex_id in missing)
+            return jsonify({"error": f"Exercise ID {first_missing} not found"}), 400
 
+        workout, = _add_workouts(current_user_id, [data])
         db.session.commit()
+
+        workout = user_workout_query(current_user_id, workout.id).first()
         
         return jsonify(workout.to_dict()), 201
 
@@ -89,14 +164,132 @@ def create_workout():
             
         return jsonify({"error": "Failed to create workout session"}), 500
 
+@workouts_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def create_workouts_batch():
+    """
+    Creates many workouts in one transaction, for offline clients syncing a
+    backlog of sessions. Accepts a list of workouts (or {"workouts": [...]}).
+    Valid items are saved; invalid ones are reported by index.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        current_user_id = int(current_user_id)
+
+        data = request.get_json()
+        items = data.get('workouts') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Expected a non-empty list of workouts"}), 400
+
+        max_batch = current_app.config['WORKOUTS_MAX_BATCH']
+        if len(items) > max_batch:
+            return jsonify({"error": f"A batch may contain at most {max_batch} workouts"}), 400
+
+        item_errors = {}
+        for idx, item in enumerate(items):
+            if not isinstance(item, dict):
+                item_errors[idx] = ["Workout must be an object"]
+                continue
+            errors = validate_workout_data(item)
+            if errors:
+                item_errors[idx] = errors
+
+        requested_ids = {
+            ex_data['exercise_id']
+            for idx, item in enumerate(items) if idx not in item_errors
+            for ex_data in item['workout_exercises']
+        }
+        missing = _missing_exercise_ids(requested_ids)
+
+        if missing:
+            for idx, item in enumerate(items):
+                if idx in item_errors:
+                    continue
+                unknown = [ex_data['exercise_id'] for ex_data in item['workout_exercises'] if ex_data['exercise_id'] in missing]
+                if unknown:
+                    item_errors[idx] = [f"Exercise ID {ex_id} not found" for ex_id in unknown]
+
+        accepted = [item for idx, item in enumerate(items) if idx not in item_errors]
+        workouts = _add_workouts(current_user_id, accepted) if accepted else []
+        db.session.commit()
+
+        return jsonify({
+            "created": len(workouts),
+            "rejected": len(item_errors),
+            "workout_ids": [workout.id for workout in workouts],
+            "errors": [{"index": idx, "errors": errors} for idx, errors in sorted(item_errors.items())]
+        }), 201 if workouts else 400
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"WORKOUTS BATCH CREATE ERROR: {e}")
+        print(traceback.format_exc())
+        return jsonify({"error": "Failed to create workout sessions"}), 500
+
+@workouts_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_history():
+    """
+    Streams the user's full history as ?format=ndjson|csv. ?dataset= selects
+    workouts (default, one row per logged exercise), water or weight logs.
+    """
+    current_user_id = int(get_jwt_identity())
+    fmt = request.args.get('format', 'ndjson')
+    dataset = request.args.get('dataset', 'workouts')
+
+    if fmt not in FORMATS:
+        return jsonify({"error": f"Unsupported format. Use one of: {', '.join(FORMATS)}"}), 400
+    if dataset not in DATASETS:
+        return jsonify({"error": f"Unsupported dataset. Use one of: {', '.join(DATASETS)}"}), 400
+
+    response = current_app.response_class(
+        stream_with_context(export_chunks(current_user_id, dataset, fmt)),
+        mimetype=FORMATS[fmt]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="fittrack-{dataset}.{fmt}"'
+    return response
+
+@workouts_bp.route('/import', methods=['POST'])
+@jwt_required()
+def import_workouts():
+    """
+    Imports workout history from another app as ?format=csv|ndjson, sent
+    either as the raw request body or as a multipart 'file' upload. Rows use
+    the same columns as /workouts/export, with exercises matched by name.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        fmt = request.args.get('format', 'csv')
+        if fmt not in PARSERS:
+            return jsonify({"error": f"Unsupported format. Use one of: {', '.join(PARSERS)}"}), 400
+
+        upload = request.files.get('file')
+        binary = upload.stream if upload else request.stream
+        stream = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+        result = import_history(current_user_id, stream, fmt)
+        db.session.commit()
+
+        return jsonify(result.to_dict()), 201 if result.workouts else 400
+
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({"error": "Import file must be UTF-8 encoded"}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"WORKOUTS IMPORT ERROR: {e}")
+        print(traceback.format_exc())
+        return jsonify({"error": "Failed to import workout history"}), 500
+
 @workouts_bp.route('/<int:workout_id>', methods=['GET'])
 @jwt_required()
+@conditional_per_user
 def get_workout(workout_id):
     try:
         current_user_id = get_jwt_identity()
         current_user_id = int(current_user_id)
         
-        workout = Workout.query.filter_by(id=workout_id, user_id=current_user_id).first()
+        workout = user_workout_query(current_user_id, workout_id).first()
         if not workout:
             return jsonify({"error": "Workout not found"}), 404
 
@@ -123,6 +316,13 @@ def delete_workout(workout_id):
         if not workout:
             return jsonify({"error": "Workout not found or access denied"}), 404
 
+        exercise_rows = db.session.execute(
+            select(WorkoutExercise.exercise_id, WorkoutExercise.weight_lifted)
+            .where(WorkoutExercise.workout_id == workout_id)
+        ).mappings().all()
+        record_workout_deleted(user_id, workout, exercise_rows)
+        bump_data_version(user_id)
+
         WorkoutExercise.query.filter_by(workout_id=workout_id).delete()
 
         db.session.delete(workout)
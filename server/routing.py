@@ -0,0 +1,157 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc, select, table, column
+from sqlalchemy.sql.dml import UpdateBase
+
+# Lightweight handle on users.data_version; models imports this module, so
+# it cannot import User.
+_users = table('users', column('id'), column('data_version'))
+
+
+class RoutingSession(Session):
+    """
+    Session that sends statements to the replica engine stored in
+    info['replica'] while a read-only route runs. Flushes and DML always go
+    to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """
+    Round-robins reads over the configured replica engines. A replica that
+    raises a connection-level error is skipped for REPLICA_RETRY_SECONDS,
+    after which it is tried again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engines = []
+        self._down_until = {}
+        self._turn = itertools.count()
+        self.retry_seconds = 30
+
+    def configure(self, engines, retry_seconds):
+        with self._lock:
+            self.engines = list(engines)
+            self._down_until = {}
+            self._turn = itertools.count()
+            self.retry_seconds = retry_seconds
+
+    def mark_down(self, engine):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_seconds
+
+    def healthy(self):
+        """Healthy replicas, starting from the next one in round-robin order."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.engines:
+                return []
+            # Each call starts one replica further along.
+            start = next(self._turn) % len(self.engines)
+            ordered = self.engines[start:] + self.engines[:start]
+            return [engine for engine in ordered if self._down_until.get(engine, 0) <= now]
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {"url": engine.url.render_as_string(hide_password=True),
+                 "healthy": self._down_until.get(engine, 0) <= now}
+                for engine in self.engines
+            ]
+
+
+replica_router = ReplicaRouter()
+
+
+def _version(session, user_id, bind=None):
+    stmt = select(_users.c.data_version).where(_users.c.id == user_id)
+    return session.execute(stmt, bind_arguments={"bind": bind} if bind is not None else None).scalar()
+
+
+def choose_replica(session, user_id):
+    """
+    Returns a replica that has caught up with the user's latest write, or
+    None to read from the primary. Comparing the user's data_version on both
+    sides gives read-your-writes across workers: a user stays on the primary
+    exactly until a replica has replayed their last write.
+    """
+    replicas = replica_router.healthy()
+    if not replicas:
+        return None
+
+    primary_version = _version(session, user_id)
+    for engine in replicas:
+        try:
+            replica_version = _version(session, user_id, bind=engine)
+        except exc.DBAPIError:
+            replica_router.mark_down(engine)
+            session.rollback()
+            continue
+        if replica_version is not None and replica_version >= primary_version:
+            return engine
+        # This replica is behind for the user; another one may not be.
+    return None
+
+
+def replica_read(view):
+    """
+    Serves a read-only, JWT-protected view from a replica when one is
+    healthy and current for the user. If the replica fails mid-request the
+    view is re-run against the primary. Apply below @jwt_required() and
+    above @conditional_per_user, so the ETag is read from the same database
+    as the body.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session = current_app.extensions['sqlalchemy'].session
+        replica = choose_replica(session, int(get_jwt_identity()))
+        if replica is None:
+            return view(*args, **kwargs)
+
+        session.info['replica'] = replica
+        g._replica_failed = False
+        try:
+            rv = view(*args, **kwargs)
+        finally:
+            session.info.pop('replica', None)
+
+        if g.pop('_replica_failed', False):
+            session.rollback()
+            return view(*args, **kwargs)
+        return rv
+
+    return wrapper
+
+
+def _replica_error_listener(engine):
+    def on_error(context):
+        if context.is_disconnect or isinstance(context.sqlalchemy_exception, exc.OperationalError):
+            replica_router.mark_down(engine)
+            if has_request_context():
+                g._replica_failed = True
+    return on_error
+
+
+def init_replicas(app, db):
+    """Registers the engines of the replica_* binds (from DATABASE_REPLICA_URLS) with the router."""
+    with app.app_context():
+        engines = [engine for key, engine in sorted(db.engines.items(), key=lambda item: str(item[0]))
+                   if key is not None and key.startswith('replica_')]
+
+    for engine in engines:
+        event.listen(engine, 'handle_error', _replica_error_listener(engine))
+    replica_router.configure(engines, app.config['REPLICA_RETRY_SECONDS'])
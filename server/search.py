@@ -0,0 +1,228 @@
+"""
+Exercise search.
+
+ExerciseIndex is an in-memory inverted index over exercise names and
+instructions, built once per catalog snapshot (see catalog.py). Query
+terms match vocabulary tokens exactly, by prefix (a bisect range over the
+sorted vocabulary) or within one edit (a precomputed deletion
+neighbourhood), and documents are scored with NumPy over the whole
+catalog at once.
+
+On PostgreSQL, EXERCISE_SEARCH_BACKEND=postgres answers the same query
+from the tsvector and trigram indexes instead.
+"""
+import bisect
+import math
+import re
+
+import numpy as np
+from sqlalchemy import select, func, literal_column, or_
+
+from models import db, Exercise
+
+# Unicode-aware, so accented names ('Développé couché') index as whole words.
+TOKEN_RE = re.compile(r'\w+')
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from in into is it its of on or the this to with your you'.split()
+)
+
+NAME_WEIGHT = 3.0
+INSTRUCTIONS_WEIGHT = 0.5
+EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.6
+MAX_TERMS = 8
+MAX_PREFIX_EXPANSIONS = 64
+MIN_FUZZY_LENGTH = 4
+
+# Must match the expression index created by the add_exercise_search_indexes migration.
+SEARCH_DOCUMENT = "to_tsvector('english', name || ' ' || coalesce(instructions, ''))"
+
+
+def tokenize(value):
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+
+def query_terms(query):
+    """Search terms of a query: its tokens minus stopwords, unless that leaves none."""
+    tokens = tokenize(query)
+    return ([token for token in tokens if token not in STOPWORDS] or tokens)[:MAX_TERMS]
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insertion, deletion, substitution or transposition."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (
+            i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+        )
+    return a[i:] == b[i + 1:]
+
+
+class ExerciseIndex:
+    """
+    Inverted index over a list of serialized exercises (Exercise.to_dict()
+    output). Name tokens weigh more than instruction tokens, and rarer
+    tokens more than common ones.
+    """
+
+    def __init__(self, exercises):
+        self.exercises = exercises
+        count = len(exercises)
+        weights = {}
+        for doc, exercise in enumerate(exercises):
+            for token in tokenize(exercise['name']):
+                weights.setdefault(token, {})
+                weights[token][doc] = weights[token].get(doc, 0.0) + NAME_WEIGHT
+            for token in tokenize(exercise.get('instructions')):
+                if token in STOPWORDS:
+                    continue
+                weights.setdefault(token, {})
+                weights[token][doc] = min(weights[token].get(doc, 0.0) + INSTRUCTIONS_WEIGHT, NAME_WEIGHT * 2)
+
+        self.postings = {}
+        for token, docs in weights.items():
+            idf = math.log(1 + count / len(docs))
+            self.postings[token] = (
+                np.fromiter(docs.keys(), dtype=np.int64, count=len(docs)),
+                np.fromiter(docs.values(), dtype=float, count=len(docs)) * idf
+            )
+
+        self.vocabulary = sorted(self.postings)
+        self.neighbours = {}
+        for token in self.vocabulary:
+            if len(token) >= MIN_FUZZY_LENGTH:
+                for variant in _deletes(token):
+                    self.neighbours.setdefault(variant, []).append(token)
+
+        names = np.array([' '.join(tokenize(exercise['name'])) for exercise in exercises], dtype=str)
+        self.name_order = np.argsort(names, kind='stable')
+        self.sorted_names = names[self.name_order]
+        self.name_rank = np.empty(count, dtype=np.int64)
+        self.name_rank[self.name_order] = np.arange(count)
+        groups = [exercise['muscle_group'].lower() for exercise in exercises]
+        self.group_codes = {group: code for code, group in enumerate(sorted(set(groups)))}
+        self.groups = np.array([self.group_codes[group] for group in groups], dtype=np.int64)
+
+    def expand(self, term):
+        """{vocabulary token: match factor} for one query term."""
+        matches = {}
+        start = bisect.bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            matches[token] = EXACT if token == term else PREFIX
+
+        if len(term) >= MIN_FUZZY_LENGTH and term not in self.postings:
+            candidates = set(self.neighbours.get(term, ()))
+            for variant in _deletes(term):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates.update(self.neighbours.get(variant, ()))
+            for token in candidates:
+                if token not in matches and within_one_edit(term, token):
+                    matches[token] = FUZZY
+        return matches
+
+    def search(self, query, muscle_group=None, limit=20, offset=0):
+        """
+        Ranked (total, page) for a free-text query. Every term must match;
+        an exact or prefix match on the whole name ranks first. An empty
+        query lists the (filtered) catalog by name; one with no word
+        characters matches nothing.
+        """
+        terms = query_terms(query)
+        if not terms and query and query.strip():
+            # Only punctuation or symbols: nothing can match.
+            return 0, []
+        count = len(self.exercises)
+        mask = np.ones(count, dtype=bool)
+        scores = np.zeros(count)
+
+        if muscle_group:
+            code = self.group_codes.get(muscle_group.lower())
+            if code is None:
+                return 0, []
+            mask &= self.groups == code
+
+        for term in terms:
+            term_scores = np.zeros(count)
+            for token, factor in self.expand(term).items():
+                docs, weights = self.postings[token]
+                # docs are unique within a posting list, so fancy indexing is safe.
+                term_scores[docs] = np.maximum(term_scores[docs], weights * factor)
+            mask &= term_scores > 0
+            scores += term_scores
+
+        hits = np.flatnonzero(mask)
+        end = offset + limit
+        if terms:
+            # Names equal to / starting with the query form a contiguous run of sorted_names.
+            phrase = ' '.join(terms)
+            start = np.searchsorted(self.sorted_names, phrase, 'left')
+            exact_end = np.searchsorted(self.sorted_names, phrase, 'right')
+            prefix_end = np.searchsorted(self.sorted_names, phrase + '\U0010ffff', 'left')
+            scores[self.name_order[start:prefix_end]] += 10
+            scores[self.name_order[start:exact_end]] += 90
+
+            # Only the hits that can reach the requested page are fully sorted.
+            hit_scores = scores[hits]
+            if end < len(hits):
+                threshold = np.partition(hit_scores, len(hits) - end)[len(hits) - end]
+                top = hits[hit_scores >= threshold]
+            else:
+                top = hits
+            order = top[np.lexsort((self.name_rank[top], -scores[top]))]
+        else:
+            ranks = self.name_rank[hits]
+            top = hits[np.argpartition(ranks, end)[:end]] if end < len(hits) else hits
+            order = top[np.argsort(self.name_rank[top])]
+
+        return len(hits), [self.exercises[doc] for doc in order[offset:end]]
+
+
+def database_search(query, muscle_group=None, limit=20, offset=0):
+    """
+    PostgreSQL search with the same contract as ExerciseIndex.search:
+    prefix full-text matches over name and instructions, plus trigram
+    similarity on the name for misspellings.
+    """
+    terms = query_terms(query)
+    if not terms and query and query.strip():
+        return 0, []
+    stmt = select(Exercise, func.count().over().label('total'))
+    if muscle_group:
+        stmt = stmt.where(func.lower(Exercise.muscle_group) == muscle_group.lower())
+
+    if terms:
+        tsquery = func.to_tsquery(literal_column("'english'"), ' & '.join(f"{term}:*" for term in terms))
+        document = literal_column(SEARCH_DOCUMENT)
+        phrase = ' '.join(terms)
+        stmt = stmt.where(or_(
+            document.op('@@')(tsquery),
+            Exercise.name.op('%')(phrase)
+        )).order_by(
+            (func.ts_rank(document, tsquery) + 2 * func.similarity(Exercise.name, phrase)).desc(),
+            Exercise.name
+        )
+    else:
+        stmt = stmt.order_by(Exercise.name)
+
+    rows = db.session.execute(stmt.offset(offset).limit(limit)).all()
+    if rows:
+        total = rows[0].total
+    else:
+        # Past the last page the window count is not available.
+        total = db.session.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+    return total, [exercise.to_dict() for exercise, _ in rows]
@@ -7,6 +7,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
 from models import db, User, Exercise, Workout, WorkoutExercise, WaterLog, WeightLog 
+from aggregates import (
+    add_to_daily_water_total, rebuild_training_stats, rebuild_personal_records, rebuild_activity_bitmaps
+)
 
 CORE_EXERCISES = [
     {"name": "Bench Press", "muscle_group": "Chest", "instructions": "Lie on bench, grip barbell slightly wider than shoulder width, lower to chest, press up"},
@@ -106,6 +109,11 @@ def seed_database():
                     we2_1 = WorkoutExercise(workout_id=workout_2.id, exercise_id=exercises_map['Plank'], sets=2, reps=0, weight_lifted=0)
                     
                     db.session.add(we2_1)
+                    db.session.flush()
+
+                    rebuild_training_stats(user_id)
+                    rebuild_personal_records(user_id)
+                    rebuild_activity_bitmaps(user_id)
                     
                     db.session.commit()
                     print(f"✅ Added 2 sample workouts for testuser.")
@@ -118,6 +126,8 @@ def seed_database():
                 print("💧 Seeding today's water log (1000ml)...")
                 water_log = WaterLog(user_id=user_id, amount_ml=1000)
                 db.session.add(water_log)
+                db.session.flush()
+                add_to_daily_water_total(user_id, water_log.timestamp.date(), water_log.amount_ml)
             else:
                 print("⏩ Today's water log already exists.")
               
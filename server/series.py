@@ -0,0 +1,141 @@
+"""
+Time-series queries for the weight and water charts.
+
+Rows are bucketed by day, week (starting Monday) or month and aggregated
+in SQL, with an optional rolling average computed by a window function.
+The aggregated series is then downsampled with LTTB (largest triangle,
+three buckets) to at most the requested number of points, so response
+size depends on the points asked for rather than on history length.
+"""
+from datetime import date, datetime
+
+from sqlalchemy import select, func, cast, Date
+
+from models import db, WeightLog, DailyWaterTotal
+
+BUCKETS = ('day', 'week', 'month')
+
+
+def bucket_expr(column, bucket, dialect):
+    """SQL expression truncating a date column to the start of its bucket."""
+    if dialect == 'postgresql':
+        return cast(func.date_trunc(bucket, column), Date)
+    if bucket == 'week':
+        return func.date(column, '-6 days', 'weekday 1')
+    if bucket == 'month':
+        return func.date(column, 'start of month')
+    return func.date(column)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _rolling(column, order_by, window):
+    return func.avg(column).over(order_by=order_by, rows=(-(window - 1), 0))
+
+
+def weight_series(user_id, date_from, date_to, bucket, rolling=None):
+    """Average, min and max body weight per bucket, oldest first."""
+    dialect = db.session.get_bind().dialect.name
+    period = bucket_expr(WeightLog.date, bucket, dialect)
+    buckets = select(
+        period.label('bucket'),
+        func.avg(WeightLog.weight_kg).label('value'),
+        func.min(WeightLog.weight_kg).label('min'),
+        func.max(WeightLog.weight_kg).label('max'),
+        func.count().label('count')
+    ).where(
+        WeightLog.user_id == user_id,
+        WeightLog.date.between(date_from, date_to)
+    ).group_by(period).subquery()
+
+    columns = [buckets.c.bucket, buckets.c.value, buckets.c.min, buckets.c.max, buckets.c.count]
+    if rolling:
+        columns.append(_rolling(buckets.c.value, buckets.c.bucket, rolling).label('rolling'))
+
+    rows = db.session.execute(select(*columns).order_by(buckets.c.bucket)).mappings()
+    return [
+        {
+            "date": _as_date(row['bucket']),
+            "value": round(float(row['value']), 2),
+            "min": row['min'],
+            "max": row['max'],
+            "count": row['count'],
+            **({"rolling": round(float(row['rolling']), 2)} if rolling else {})
+        }
+        for row in rows
+    ]
+
+
+def water_series(user_id, date_from, date_to, bucket, rolling=None):
+    """Total and average daily water intake per bucket, from daily_water_totals."""
+    dialect = db.session.get_bind().dialect.name
+    period = bucket_expr(DailyWaterTotal.day, bucket, dialect)
+    buckets = select(
+        period.label('bucket'),
+        func.sum(DailyWaterTotal.total_ml).label('value'),
+        func.avg(DailyWaterTotal.total_ml).label('daily_average'),
+        func.count().label('days')
+    ).where(
+        DailyWaterTotal.user_id == user_id,
+        DailyWaterTotal.day.between(date_from, date_to)
+    ).group_by(period).subquery()
+
+    columns = [buckets.c.bucket, buckets.c.value, buckets.c.daily_average, buckets.c.days]
+    if rolling:
+        columns.append(_rolling(buckets.c.value, buckets.c.bucket, rolling).label('rolling'))
+
+    rows = db.session.execute(select(*columns).order_by(buckets.c.bucket)).mappings()
+    return [
+        {
+            "date": _as_date(row['bucket']),
+            "value": int(row['value']),
+            "daily_average": round(float(row['daily_average']), 1),
+            "days": row['days'],
+            **({"rolling": round(float(row['rolling']), 1)} if rolling else {})
+        }
+        for row in rows
+    ]
+
+
+def lttb(points, threshold, key='value'):
+    """
+    Downsamples a date-ordered list of point dicts to `threshold` points with
+    Largest-Triangle-Three-Buckets, keeping the first and last points and
+    the visually significant peaks and troughs in between.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return points
+
+    xs = [point['date'].toordinal() for point in points]
+    ys = [float(point[key]) for point in points]
+
+    sampled = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle.
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, count)
+        next_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        next_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - next_x) * (ys[j] - ay) - (ax - xs[j]) * (next_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,75 @@
+"""
+Test fixtures. The app runs against a throwaway SQLite file seeded with
+datagen.generate_history, so queries are planned over a realistic amount
+of data rather than an empty schema.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event, text
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+
+# Config reads the environment at import time.
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['HASH_POOL_WORKERS'] = '0'
+
+from app import create_app
+from models import db
+from datagen import generate_history, GENERATED_PASSWORD
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        generate_history(users=20, years=2, exercises_per_workout=6)
+        # Gives the SQLite planner table statistics, as a long-lived database would have.
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password=GENERATED_PASSWORD):
+    response = client.post('/auth/login', json={"username": username, "password": password})
+    assert response.status_code == 200, response.get_json()
+    return {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def auth_headers(client):
+    return login(client, 'loaduser0')
+
+
+class StatementLog:
+    """Collects (statement, parameters) for every query sent to the database."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+@pytest.fixture
+def statements(app):
+    with app.app_context():
+        engine = db.engine
+    return lambda: StatementLog(engine)
@@ -0,0 +1,107 @@
+"""Streak and calendar arithmetic over the per-year activity bitmaps."""
+from datetime import date, timedelta
+
+from activity import DAY_BYTES, build_bitmaps, calendar, clear_day, day_index, mark_days, streaks, to_int
+
+
+def years_of(*days):
+    return {year: to_int(days) for year, days in build_bitmaps(days).items()}
+
+
+def run(start, length):
+    return [start + timedelta(days=n) for n in range(length)]
+
+
+def test_no_activity():
+    assert streaks({}, date(2030, 5, 1))['current_streak'] == 0
+    assert streaks({2030: 0}, date(2030, 5, 1)) == {
+        "current_streak": 0, "longest_streak": 0, "longest_streak_start": None,
+        "longest_streak_end": None, "active_days": 0, "last_active": None
+    }
+
+
+def test_current_streak_ending_today():
+    today = date(2030, 5, 10)
+    result = streaks(years_of(*run(date(2030, 5, 8), 3)), today)
+    assert result['current_streak'] == 3
+    assert result['last_active'] == today
+
+
+def test_current_streak_ending_yesterday_is_still_alive():
+    today = date(2030, 5, 10)
+    result = streaks(years_of(*run(date(2030, 5, 6), 4)), today)
+    assert result['current_streak'] == 4
+    assert result['longest_streak'] == 4
+
+
+def test_streak_broken_two_days_ago():
+    result = streaks(years_of(*run(date(2030, 5, 5), 4)), date(2030, 5, 10))
+    assert result['current_streak'] == 0
+    assert result['longest_streak'] == 4
+    assert (result['longest_streak_start'], result['longest_streak_end']) == (date(2030, 5, 5), date(2030, 5, 8))
+
+
+def test_longest_of_several_runs_and_earliest_on_ties():
+    days = run(date(2030, 1, 1), 2) + run(date(2030, 1, 10), 5) + run(date(2030, 2, 1), 5) + [date(2030, 3, 1)]
+    result = streaks(years_of(*days), date(2030, 3, 1))
+    assert result['longest_streak'] == 5
+    assert result['longest_streak_start'] == date(2030, 1, 10)
+    assert result['current_streak'] == 1
+    assert result['active_days'] == 13
+
+
+def test_runs_cross_year_boundaries():
+    days = run(date(2029, 12, 29), 6)
+    years = years_of(*days)
+    assert sorted(years) == [2029, 2030]
+    result = streaks(years, date(2030, 1, 3))
+    assert result['current_streak'] == 6
+    assert result['longest_streak'] == 6
+    assert (result['longest_streak_start'], result['longest_streak_end']) == (date(2029, 12, 29), date(2030, 1, 3))
+
+
+def test_leap_years():
+    assert day_index(date(2024, 12, 31)) == 365
+    assert day_index(date(2023, 12, 31)) == 364
+    assert 366 <= DAY_BYTES * 8
+
+    days = run(date(2024, 2, 28), 3) + [date(2024, 12, 31), date(2025, 1, 1)]
+    years = years_of(*days)
+    result = streaks(years, date(2025, 1, 1))
+    assert result['longest_streak'] == 3
+    assert result['longest_streak_end'] == date(2024, 3, 1)
+    assert result['current_streak'] == 2
+
+    leap = calendar(years[2024], 2024)
+    assert leap['months'][1:3] == [2, 1]
+    assert leap['months'][11] == 1
+    assert leap['days'] == [date(2024, 2, 28), date(2024, 2, 29), date(2024, 3, 1), date(2024, 12, 31)]
+
+
+def test_future_days_do_not_extend_the_current_streak():
+    today = date(2030, 1, 10)
+    days = [date(2030, 1, 9), today, date(2030, 1, 12), date(2030, 1, 13)]
+    result = streaks(years_of(*days), today)
+    assert result['current_streak'] == 2
+    assert result['last_active'] == date(2030, 1, 13)
+
+    # Only future activity: nothing current, whether or not the year has started.
+    assert streaks(years_of(date(2030, 6, 1)), today)['current_streak'] == 0
+    assert streaks(years_of(date(2031, 6, 1)), today)['current_streak'] == 0
+
+
+def test_calendar_months_and_days():
+    days = [date(2030, 1, 1), date(2030, 1, 31), date(2030, 2, 1), date(2030, 12, 31)]
+    result = calendar(years_of(*days)[2030], 2030)
+    assert result['active_days'] == 4
+    assert result['months'] == [2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+    assert result['days'] == days
+    assert calendar(0, 2030) == {"year": 2030, "active_days": 0, "months": [0] * 12, "days": []}
+
+
+def test_mark_and_clear_days():
+    empty = bytes(DAY_BYTES)
+    marked = mark_days(empty, [0, 59, 365])
+    assert to_int(marked) == (1 << 0) | (1 << 59) | (1 << 365)
+    assert to_int(clear_day(marked, 59)) == (1 << 0) | (1 << 365)
+    assert len(marked) == DAY_BYTES
@@ -0,0 +1,213 @@
+"""Single-flight sharing and result caching behind @coalesced."""
+import threading
+
+import pytest
+from flask import g, jsonify
+
+import coalescing
+from coalescing import CachedResult, SingleFlight, coalesced, result_cache
+
+from conftest import login
+
+
+class Shared:
+    def __init__(self, value):
+        self.value = value
+
+    def to_response(self):
+        return self.value
+
+
+def run_threads(count, target):
+    results, errors = [None] * count, [None] * count
+
+    def worker(n):
+        try:
+            results[n] = target()
+        except Exception as e:
+            errors[n] = e
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def join(threads):
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def wait_for_followers(flight, count):
+    """Blocks until `count` callers are waiting on the leader's computation."""
+    for _ in range(500):
+        if flight.waiting >= count:
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("followers never started waiting")
+
+
+def counting_flight():
+    flight = SingleFlight()
+    flight.waiting = 0
+    lock = threading.Lock()
+
+    def before_wait():
+        with lock:
+            flight.waiting += 1
+    return flight, before_wait
+
+
+def test_concurrent_callers_share_one_computation():
+    flight, before_wait = counting_flight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'leader', Shared('shared')
+
+    threads, results, errors = run_threads(5, lambda: flight.do('key', compute, 5, before_wait))
+    wait_for_followers(flight, 4)
+    release.set()
+    join(threads)
+
+    assert errors == [None] * 5
+    assert len(calls) == 1
+    assert sorted(results) == ['leader'] + ['shared'] * 4
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "shared": 4}
+
+
+def test_followers_recompute_when_the_leader_fails():
+    flight, before_wait = counting_flight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+            raise RuntimeError("leader failed")
+        return 'own', None
+
+    threads, results, errors = run_threads(3, lambda: flight.do('key', compute, 5, before_wait))
+    wait_for_followers(flight, 2)
+    release.set()
+    join(threads)
+
+    assert [type(e) for e in errors if e] == [RuntimeError]
+    assert sorted(r for r in results if r) == ['own', 'own']
+    assert len(calls) == 3
+    assert flight.stats()['in_flight'] == 0
+
+
+def test_unshareable_result_is_recomputed_by_followers():
+    flight, before_wait = counting_flight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+        return 'own', None
+
+    threads, results, errors = run_threads(3, lambda: flight.do('key', compute, 5, before_wait))
+    wait_for_followers(flight, 2)
+    release.set()
+    join(threads)
+    assert results == ['own'] * 3 and len(calls) == 3
+
+
+@pytest.fixture
+def call_view(app, monkeypatch):
+    """Runs a view wrapped in @coalesced for user 1 under a fixed ETag."""
+    monkeypatch.setattr(coalescing, 'get_jwt_identity', lambda: '1')
+    result_cache.clear()
+
+    def call(view, etag='1.1.20300101'):
+        with app.test_request_context('/coalesced-test'):
+            g._user_etag = etag
+            return coalesced(view)()
+    yield call
+    result_cache.clear()
+
+
+def test_ok_results_are_cached(call_view):
+    calls = []
+
+    def view():
+        calls.append(1)
+        return jsonify({"n": len(calls)}), 200
+
+    assert call_view(view).get_json() == {"n": 1}
+    assert call_view(view).get_json() == {"n": 1}
+    assert call_view(view, etag='1.2.20300101').get_json() == {"n": 2}
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize('kind', ['error', 'streamed', 'replica_failed'])
+def test_unshareable_results_are_not_cached(app, call_view, kind):
+    calls = []
+
+    def view():
+        calls.append(1)
+        if kind == 'error':
+            return jsonify({"error": "boom"}), 500
+        if kind == 'streamed':
+            return app.response_class(iter([b'{}']), mimetype='application/json')
+        g._replica_failed = True
+        return jsonify({}), 200
+
+    call_view(view)
+    call_view(view)
+    assert len(calls) == 2
+    assert len(result_cache) == 0
+
+
+def test_a_write_moves_the_user_to_new_results(client):
+    headers = login(client, 'loaduser4')
+    before = client.get('/analytics/summary', headers=headers)
+    again = client.get('/analytics/summary', headers=headers)
+    assert again.get_json() == before.get_json()
+
+    created = client.post('/workouts', headers=headers, json={
+        "name": "Cache buster", "date": "2032-01-01",
+        "workout_exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]
+    })
+    assert created.status_code == 201
+
+    after = client.get('/analytics/summary', headers=headers)
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.get_json()['workout_count'] == before.get_json()['workout_count'] + 1
+
+
+def test_waiting_requests_release_their_connection(app, monkeypatch):
+    closed = []
+    monkeypatch.setattr(coalescing.db.session, 'close', lambda: closed.append(1))
+    flight, release = SingleFlight(), threading.Event()
+    monkeypatch.setattr(coalescing, 'request_coalescer', flight)
+    monkeypatch.setattr(coalescing, 'get_jwt_identity', lambda: '1')
+    result_cache.clear()
+
+    def view():
+        release.wait(5)
+        return jsonify({}), 200
+
+    def request():
+        with app.test_request_context('/coalesced-test'):
+            g._user_etag = '1.9.20300101'
+            return coalesced(view)().status_code
+
+    threads, results, errors = run_threads(3, request)
+    for _ in range(500):
+        if len(closed) == 2:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    join(threads)
+    result_cache.clear()
+    assert results == [200] * 3
+    assert len(closed) == 2
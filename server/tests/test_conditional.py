@@ -0,0 +1,21 @@
+"""Per-user ETags must only be attached to complete, successful responses."""
+import routes.workouts
+
+
+def test_workouts_are_tagged(client, auth_headers):
+    response = client.get('/workouts', headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    revalidated = client.get('/workouts', headers={**auth_headers, 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+
+
+def test_failed_workout_list_is_not_tagged(client, auth_headers, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(routes.workouts, 'user_workouts_page', fail)
+    response = client.get('/workouts', headers=auth_headers)
+    assert response.status_code == 500
+    assert 'ETag' not in response.headers
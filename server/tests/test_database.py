@@ -0,0 +1,37 @@
+from database import _request_statement_timeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.executed.append(statement)
+
+    def close(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+
+class FakeRecord:
+    def __init__(self):
+        self.info = {}
+
+
+def test_statement_timeout_only_applies_to_web_requests(app):
+    hook = _request_statement_timeout(1500)
+    connection, record = FakeConnection(), FakeRecord()
+
+    with app.test_request_context('/'):
+        hook(connection, record, None)
+        hook(connection, record, None)
+    hook(connection, record, None)
+
+    assert connection.executed == ["SET statement_timeout = 1500", "SET statement_timeout = 0"]
+    assert connection.commits == 2
@@ -0,0 +1,21 @@
+from werkzeug.security import generate_password_hash
+
+from hashing import password_hasher
+
+
+def test_current_hashes_do_not_need_rehash(app):
+    with app.app_context():
+        assert not password_hasher.needs_rehash(password_hasher.hash('secret123'))
+
+
+def test_other_method_needs_rehash(app):
+    with app.app_context():
+        assert password_hasher.needs_rehash(generate_password_hash('secret123', 'pbkdf2:sha256'))
+
+
+def test_other_salt_length_needs_rehash(app):
+    with app.app_context():
+        salt_length = app.config['PASSWORD_SALT_LENGTH']
+        method = app.config['PASSWORD_HASH_METHOD']
+        assert password_hasher.needs_rehash(generate_password_hash('secret123', method, salt_length // 2))
+        assert not password_hasher.needs_rehash(generate_password_hash('secret123', method, salt_length))
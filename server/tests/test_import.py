@@ -0,0 +1,67 @@
+"""The history importer must accept exactly the exercise rows the API accepts."""
+import json
+
+import pytest
+
+from models import db, Exercise
+from validators import EXERCISE_FIELD_MINIMUMS
+
+from conftest import login
+
+VALID = {"sets": 3, "reps": 8, "weight_lifted": 60.0}
+
+
+@pytest.fixture
+def exercise(app):
+    with app.app_context():
+        return db.session.get(Exercise, 1).name
+
+
+def _post_workout(client, headers, fields):
+    return client.post('/workouts', headers=headers, json={
+        "name": "Bounds", "date": "2031-03-01",
+        "workout_exercises": [{"exercise_id": 1, **fields}]
+    })
+
+
+def _import_row(client, headers, exercise, fields):
+    row = {"date": "2031-03-02", "workout_name": "Bounds", "exercise_name": exercise, **fields}
+    return client.post('/workouts/import?format=ndjson', headers=headers, data=json.dumps(row))
+
+
+@pytest.mark.parametrize('field', sorted(EXERCISE_FIELD_MINIMUMS))
+def test_importer_and_api_share_bounds(client, exercise, field):
+    headers = login(client, 'loaduser3')
+    minimum = EXERCISE_FIELD_MINIMUMS[field]
+
+    for value, accepted in ((minimum, True), (minimum - 1, False)):
+        fields = {**VALID, field: value}
+        api = _post_workout(client, headers, fields)
+        imported = _import_row(client, headers, exercise, fields)
+        assert (api.status_code == 201) is accepted, api.get_json()
+        assert (imported.status_code == 201) is accepted, imported.get_json()
+
+
+@pytest.mark.parametrize('field, value', [
+    ('sets', 3.9), ('sets', True), ('reps', 7.5), ('reps', True), ('weight_lifted', False),
+])
+def test_importer_and_api_reject_mistyped_numbers(client, exercise, field, value):
+    headers = login(client, 'loaduser3')
+    fields = {**VALID, field: value}
+    assert _post_workout(client, headers, fields).status_code == 400
+    assert _import_row(client, headers, exercise, fields).status_code == 400
+
+
+@pytest.mark.parametrize('fields', [
+    {"notes": {"x": 1}}, {"status": ["done"]}, {"status": "x" * 51},
+])
+def test_mistyped_workout_fields_are_rejected_per_row(client, exercise, fields):
+    headers = login(client, 'loaduser3')
+    good = {"date": "2031-04-01", "workout_name": "Kept", "exercise_name": exercise, **VALID}
+    bad = {**good, "date": "2031-04-02", "workout_name": "Dropped", **fields}
+    response = client.post('/workouts/import?format=ndjson', headers=headers,
+                           data='\n'.join(json.dumps(row) for row in (good, bad)))
+    body = response.get_json()
+    assert response.status_code == 201, body
+    assert body['workouts_created'] == 1
+    assert [error['line'] for error in body['errors']] == [2]
@@ -0,0 +1,31 @@
+"""Personal records raised by new workouts, and the payloads that may reach them."""
+from conftest import login
+
+
+def _workout(weight, day='2030-01-01', exercise_id=1):
+    return {
+        "name": "PR attempt",
+        "date": day,
+        "workout_exercises": [{"exercise_id": exercise_id, "sets": 1, "reps": 1, "weight_lifted": weight}]
+    }
+
+
+def test_non_numeric_weight_is_rejected(client):
+    headers = login(client, 'loaduser1')
+    response = client.post('/workouts', headers=headers, json=_workout("heavy"))
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == ["Weight lifted must be a non-negative number for exercise 1"]
+
+
+def test_batch_raises_records_for_valid_items_only(client):
+    headers = login(client, 'loaduser2')
+    response = client.post('/workouts/batch', headers=headers, json=[
+        _workout("500"), _workout(-5), _workout(999.5, day='2030-01-02')
+    ])
+    body = response.get_json()
+    assert response.status_code == 201
+    assert body['created'] == 1
+    assert [error['index'] for error in body['errors']] == [0, 1]
+
+    records = client.get('/metrics/summary', headers=headers).get_json()['personalRecords']
+    assert {'weight': 999.5, 'date': '2030-01-02'} in records.values()
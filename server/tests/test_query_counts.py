@@ -0,0 +1,42 @@
+"""
+The workout read paths must issue a fixed number of statements however
+long the user's history is (see queries.user_workouts_page).
+"""
+import pytest
+
+from datagen import generate_history
+
+from conftest import login
+
+
+@pytest.fixture(scope='module')
+def histories(app):
+    """A user with a few weeks of workouts and one with years of them."""
+    with app.app_context():
+        generate_history(users=1, years=0.1, prefix='shorthistory')
+        generate_history(users=1, years=3, workouts_per_week=5, prefix='longhistory')
+    return 'shorthistory0', 'longhistory0'
+
+
+def count_statements(client, statements, headers, url):
+    # The first request warms the per-process identity and ETag caches.
+    assert client.get(url, headers=headers).status_code == 200
+    with statements() as log:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.get_json(), len(log.statements)
+
+
+def test_workout_list_statement_count_is_constant(client, statements, histories):
+    counts = []
+    sizes = []
+    for username in histories:
+        headers = login(client, username)
+        workouts, count = count_statements(client, statements, headers, '/workouts?limit=200')
+        sizes.append(len(workouts))
+        counts.append(count)
+
+    assert sizes[0] < 30 and sizes[1] == 200
+    assert all(workout['workout_exercises'] for workout in workouts)
+    assert counts[0] == counts[1]
+
@@ -0,0 +1,63 @@
+"""
+Every hot read endpoint must reach the user's rows through an index. The
+statements each endpoint issues are captured and re-run under EXPLAIN
+QUERY PLAN; a plain SCAN of a per-user table means a filter has lost its
+index (see the add_query_indexes migration).
+"""
+import re
+
+import pytest
+from sqlalchemy import text
+
+from models import db
+
+USER_TABLES = ('workouts', 'workout_exercises', 'water_logs', 'weight_logs', 'daily_water_totals',
+               'personal_records', 'user_training_stats', 'user_exercise_usage', 'activity_bitmaps')
+
+FULL_SCAN = re.compile(r'^SCAN (%s)\b' % '|'.join(USER_TABLES))
+
+ENDPOINTS = [
+    '/workouts',
+    '/workouts?limit=10&from=2020-01-01',
+    '/workouts/export',
+    '/metrics/summary',
+    '/metrics/weight/series?bucket=week',
+    '/metrics/water/series?bucket=month',
+    '/analytics/stats',
+    '/analytics/summary',
+    '/analytics/volume',
+    '/analytics/progression',
+    '/analytics/streaks',
+    '/analytics/calendar',
+]
+
+
+def explain(app, captured):
+    """(plan line, statement) for each full scan of a per-user table in the captured SELECTs."""
+    with app.app_context():
+        connection = db.session.connection().connection.driver_connection
+        scans = []
+        for statement, parameters in captured:
+            if not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                if FULL_SCAN.match(row[3]):
+                    scans.append((row[3], statement))
+        return scans
+
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_uses_indexes(app, client, auth_headers, statements, url):
+    with statements() as log:
+        response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert log.statements, f"{url} issued no queries"
+    assert explain(app, log.statements) == []
+
+
+def test_single_workout_uses_indexes(app, client, auth_headers, statements):
+    workout_id = client.get('/workouts?limit=1', headers=auth_headers).get_json()[0]['id']
+    with statements() as log:
+        response = client.get(f'/workouts/{workout_id}', headers=auth_headers)
+    assert response.status_code == 200
+    assert explain(app, log.statements) == []
@@ -0,0 +1,154 @@
+"""
+Read replica routing against two SQLite files: the test database as the
+primary and a copy of it as the only replica.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+
+import pytest
+from sqlalchemy import insert, select
+
+from app import create_app
+from config import Config
+from database import replica_binds
+from models import db, Workout
+from routing import ReplicaRouter, choose_replica, replica_router
+from coalescing import result_cache
+
+from conftest import login
+
+
+def sqlite_path(url):
+    return url.replace('sqlite:///', '', 1)
+
+
+def copy_database(source, target):
+    """Consistent copy of a live (WAL) SQLite database."""
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+
+@pytest.fixture(scope='module')
+def replica_app(app):
+    primary = app.config['SQLALCHEMY_DATABASE_URI']
+    replica_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'replica.db')
+
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = primary
+        DATABASE_REPLICA_URLS = [replica_url]
+        SQLALCHEMY_BINDS = replica_binds([replica_url], 5, 5, 10, 1800, True)
+
+    replica = create_app(ReplicaConfig)
+    replica.config['replica_path'] = sqlite_path(replica_url)
+    replica.config['primary_path'] = sqlite_path(primary)
+    yield replica
+
+    replica_router.configure([], Config.REPLICA_RETRY_SECONDS)
+    with replica.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    result_cache.clear()
+
+
+@pytest.fixture
+def sync_replica(replica_app):
+    """Brings the replica up to date with the primary and the router back to healthy."""
+    def sync():
+        with replica_app.app_context():
+            db.engines['replica_0'].dispose()
+        copy_database(replica_app.config['primary_path'], replica_app.config['replica_path'])
+        with replica_app.app_context():
+            replica_router.configure([db.engines['replica_0']], 30)
+        result_cache.clear()
+    sync()
+    return sync
+
+
+def on_replica(replica_app, sql, **params):
+    connection = sqlite3.connect(replica_app.config['replica_path'])
+    try:
+        connection.execute(sql, params)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def test_routing_session_sends_reads_to_the_replica(replica_app):
+    with replica_app.app_context():
+        replica = db.engines['replica_0']
+        db.session.info['replica'] = replica
+        try:
+            assert db.session.get_bind(clause=select(Workout.id)) is replica
+            assert db.session.get_bind(clause=insert(Workout)) is db.engine
+        finally:
+            db.session.info.pop('replica')
+        assert db.session.get_bind(clause=select(Workout.id)) is db.engine
+
+
+def test_router_round_robins_and_skips_replicas_marked_down():
+    router = ReplicaRouter()
+    router.configure(['a', 'b', 'c'], 0.05)
+    assert router.healthy() == ['a', 'b', 'c']
+    assert router.healthy() == ['b', 'c', 'a']
+    assert router.healthy() == ['c', 'a', 'b']
+
+    router.mark_down('a')
+    assert router.healthy() == ['b', 'c']
+    assert router.healthy() == ['b', 'c']
+    assert router.healthy() == ['c', 'b']
+    time.sleep(0.06)
+    assert sorted(router.healthy()) == ['a', 'b', 'c']
+
+
+def test_reads_use_a_replica_that_has_caught_up(replica_app, sync_replica):
+    client = replica_app.test_client()
+    headers = login(client, 'loaduser5')
+    # A change made only on the replica shows which database served the read.
+    on_replica(replica_app, "UPDATE workouts SET name = 'from replica'")
+
+    workouts = client.get('/workouts?limit=1', headers=headers).get_json()
+    assert workouts[0]['name'] == 'from replica'
+
+
+def test_users_with_newer_writes_read_from_the_primary(replica_app, sync_replica):
+    client = replica_app.test_client()
+    headers = login(client, 'loaduser6')
+    on_replica(replica_app, "UPDATE workouts SET name = 'from replica'")
+
+    created = client.post('/workouts', headers=headers, json={
+        "name": "Primary only", "date": "2033-01-01",
+        "workout_exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]
+    })
+    assert created.status_code == 201
+
+    with replica_app.test_request_context():
+        user_id = created.get_json()['user_id']
+        assert choose_replica(db.session, user_id) is None
+    workouts = client.get('/workouts?limit=1', headers=headers).get_json()
+    assert workouts[0]['name'] == 'Primary only'
+
+    # Once the replica has replayed the write, the user moves back to it.
+    sync_replica()
+    on_replica(replica_app, "UPDATE workouts SET name = 'from replica'")
+    assert client.get('/workouts?limit=1', headers=headers).get_json()[0]['name'] == 'from replica'
+
+
+def test_failed_replica_reads_are_rerun_on_the_primary(replica_app, sync_replica):
+    client = replica_app.test_client()
+    headers = login(client, 'loaduser7')
+    expected = client.get('/workouts?limit=5', headers=headers)
+    on_replica(replica_app, "DROP TABLE workout_exercises")
+
+    response = client.get('/workouts?limit=5', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == expected.get_json()
+    assert [replica['healthy'] for replica in replica_router.stats()] == [False]
+
+    # While it is down, reads go straight to the primary.
+    assert client.get('/workouts?limit=5', headers=headers).status_code == 200
@@ -0,0 +1,120 @@
+"""ExerciseIndex ranking and matching, and the GET /exercises/search contract."""
+import pytest
+
+from search import ExerciseIndex, query_terms, within_one_edit
+
+CATALOG = [
+    {"id": 1, "name": "Barbell Bench Press", "muscle_group": "Chest", "instructions": "Lower the bar to the chest."},
+    {"id": 2, "name": "Incline Dumbbell Press", "muscle_group": "Chest", "instructions": "Press the dumbbells up."},
+    {"id": 3, "name": "Bench Dip", "muscle_group": "Arms", "instructions": "Dip between two benches."},
+    {"id": 4, "name": "Romanian Deadlift", "muscle_group": "Legs", "instructions": "Hinge at the hips."},
+    {"id": 5, "name": "Deadlift", "muscle_group": "Back", "instructions": "Drive through the heels."},
+    {"id": 6, "name": "Développé Couché", "muscle_group": "Chest", "instructions": "Bench press, in French."},
+    {"id": 7, "name": "Plank", "muscle_group": "Core", "instructions": "Hold a straight line."},
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ExerciseIndex(CATALOG)
+
+
+def names(page):
+    return [exercise['name'] for exercise in page]
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('deadlift', 'deadlift', True),
+    ('dedlift', 'deadlift', True),     # deletion
+    ('deadlifts', 'deadlift', True),   # insertion
+    ('deadlaft', 'deadlift', True),    # substitution
+    ('daedlift', 'deadlift', True),    # transposition
+    ('dedlfit', 'deadlift', False),
+    ('lift', 'deadlift', False),
+])
+def test_within_one_edit(a, b, expected):
+    assert within_one_edit(a, b) is expected
+    assert within_one_edit(b, a) is expected
+
+
+def test_exact_name_ranks_first(index):
+    total, page = index.search('deadlift')
+    assert total == 2
+    assert names(page) == ['Deadlift', 'Romanian Deadlift']
+
+
+def test_prefix_match(index):
+    total, page = index.search('benc')
+    # Name prefix first, then a name token match, then an instructions-only match.
+    assert total == 3
+    assert names(page) == ['Bench Dip', 'Barbell Bench Press', 'Développé Couché']
+
+
+def test_one_edit_match(index):
+    total, page = index.search('dedlift')
+    assert total == 2
+    assert set(names(page)) == {'Deadlift', 'Romanian Deadlift'}
+
+
+def test_every_term_must_match(index):
+    assert names(index.search('bench press')[1])[0] == 'Barbell Bench Press'
+    assert index.search('bench plank') == (0, [])
+
+
+def test_accented_names_are_whole_tokens(index):
+    assert query_terms('Développé') == ['développé']
+    total, page = index.search('développé')
+    assert total == 1 and names(page) == ['Développé Couché']
+
+
+@pytest.mark.parametrize('query', ['!!!', 'é!', '   ', ''])
+def test_queries_without_terms(index, query):
+    total, page = index.search(query)
+    if query.strip():
+        assert (total, page) == (0, [])
+    else:
+        assert total == len(CATALOG)
+
+
+def test_muscle_group_filter(index):
+    total, page = index.search('press', muscle_group='chest')
+    assert total == 3
+    assert {exercise['muscle_group'] for exercise in page} == {'Chest'}
+    assert index.search('press', muscle_group='Legs') == (0, [])
+    assert index.search('press', muscle_group='Unknown') == (0, [])
+
+
+def test_pages_follow_one_order(index):
+    full = names(index.search('', limit=len(CATALOG))[1])
+    assert full == sorted(full, key=lambda name: ' '.join(name.lower().split()))
+    paged = []
+    for offset in range(0, len(CATALOG), 2):
+        paged += names(index.search('', limit=2, offset=offset)[1])
+    assert paged == full
+
+    ties = names(index.search('press', limit=10)[1])
+    assert names(index.search('press', limit=1)[1]) + names(index.search('press', limit=10, offset=1)[1]) == ties
+
+
+def test_endpoint_pagination(client, auth_headers):
+    seen = []
+    offset = 0
+    while offset is not None:
+        body = client.get(f'/exercises/search?q=synthetic&limit=3&offset={offset}', headers=auth_headers).get_json()
+        seen += [exercise['id'] for exercise in body['results']]
+        offset = body['next_offset']
+    total = client.get('/exercises/search?q=synthetic&limit=100', headers=auth_headers).get_json()
+    assert seen == [exercise['id'] for exercise in total['results']]
+    assert len(seen) == total['total'] == len(set(seen))
+
+
+def test_endpoint_symbol_query_matches_nothing(client, auth_headers):
+    body = client.get('/exercises/search?q=%C3%A9!!', headers=auth_headers).get_json()
+    assert body['total'] == 0 and body['results'] == []
+
+
+@pytest.mark.parametrize('args', ['limit=0', 'limit=1000', 'limit=x', 'offset=-1', 'offset=y'])
+def test_endpoint_rejects_bad_paging(client, auth_headers, args):
+    response = client.get(f'/exercises/search?q=bench&{args}', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,60 @@
+"""Chart bucketing and LTTB downsampling (series.py)."""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import literal, select, Date
+from sqlalchemy.dialects import postgresql
+
+from models import db
+from series import bucket_expr, lttb
+
+
+def points(values, start=date(2030, 1, 1)):
+    return [{"date": start + timedelta(days=n), "value": value} for n, value in enumerate(values)]
+
+
+def test_lttb_leaves_short_series_alone():
+    series = points([1, 2, 3, 4])
+    assert lttb(series, 4) is series
+    assert lttb(series, 10) is series
+    assert lttb(series, 2) is series
+
+
+def test_lttb_keeps_the_peak():
+    # One bucket (days 1-6) between the fixed ends; the triangle with the
+    # first point and the last one is largest at the spike.
+    series = points([0, 0, 0, 10, 0, 0, 0, 0])
+    assert lttb(series, 3) == [series[0], series[3], series[7]]
+
+
+def test_lttb_keeps_first_last_and_threshold_count():
+    series = points([(n * 37) % 11 for n in range(100)])
+    sampled = lttb(series, 10)
+    assert len(sampled) == 10
+    assert sampled[0] is series[0] and sampled[-1] is series[-1]
+    assert [p['date'] for p in sampled] == sorted(p['date'] for p in sampled)
+
+
+def test_lttb_uses_the_given_key():
+    series = [{"date": date(2030, 1, n + 1), "e1rm": value} for n, value in enumerate([0, 0, 9, 0, 0])]
+    assert lttb(series, 3, key='e1rm')[1]['e1rm'] == 9
+
+
+@pytest.mark.parametrize('day, bucket, expected', [
+    (date(2030, 5, 15), 'day', date(2030, 5, 15)),
+    (date(2030, 5, 15), 'week', date(2030, 5, 13)),   # Wednesday -> Monday
+    (date(2030, 5, 13), 'week', date(2030, 5, 13)),   # Monday stays
+    (date(2030, 5, 19), 'week', date(2030, 5, 13)),   # Sunday closes the week
+    (date(2030, 1, 1), 'week', date(2029, 12, 31)),   # across a year boundary
+    (date(2030, 5, 15), 'month', date(2030, 5, 1)),
+])
+def test_sqlite_buckets(app, day, bucket, expected):
+    with app.app_context():
+        value = db.session.execute(select(bucket_expr(literal(day, Date), bucket, 'sqlite'))).scalar()
+    assert date.fromisoformat(value) == expected
+
+
+def test_postgres_buckets_use_date_trunc():
+    expr = bucket_expr(literal(date(2030, 5, 15), Date), 'week', 'postgresql')
+    sql = str(expr.compile(dialect=postgresql.dialect()))
+    assert 'date_trunc' in sql and 'CAST' in sql
@@ -0,0 +1,102 @@
+"""training_analytics reductions on hand-built TrainingFrames."""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from training_analytics import TrainingFrame, estimated_1rm, progression, tonnage, weekly_volume, workload_ratio
+
+
+def frame(rows):
+    """rows: (day, exercise_id, muscle_group, sets, reps, weight)."""
+    days, exercise_ids, groups, sets, reps, weights = zip(*rows)
+    return TrainingFrame(
+        day=np.array([d.toordinal() for d in days], dtype=np.int64),
+        exercise_id=np.array(exercise_ids, dtype=np.int64),
+        muscle_group=np.array(groups, dtype=object),
+        sets=np.array(sets, dtype=np.int64),
+        reps=np.array(reps, dtype=np.int64),
+        weight=np.array(weights, dtype=float)
+    )
+
+
+def daily(start, end, load):
+    """One 1x1 set of `load` kg every day from start to end inclusive."""
+    return [(start + timedelta(days=n), 1, 'Chest', 1, 1, load) for n in range((end - start).days + 1)]
+
+
+def test_tonnage():
+    assert tonnage(frame([(date(2030, 1, 7), 1, 'Chest', 3, 10, 50.0)])).tolist() == [1500.0]
+
+
+def test_weekly_volume_by_muscle_group():
+    training = frame([
+        (date(2029, 12, 31), 1, 'Chest', 9, 9, 99.0),   # before date_from
+        (date(2030, 1, 7), 1, 'Chest', 3, 10, 50.0),    # Monday
+        (date(2030, 1, 9), 2, 'Legs', 5, 5, 100.0),
+        (date(2030, 1, 13), 1, 'Chest', 1, 1, 100.0),   # Sunday, same week
+        (date(2030, 1, 14), 1, 'Chest', 2, 10, 60.0),   # next Monday
+    ])
+    assert weekly_volume(training, date(2030, 1, 1)) == [
+        {"week_start": date(2030, 1, 7), "tonnage": 4100.0, "by_muscle_group": {"Chest": 1600.0, "Legs": 2500.0}},
+        {"week_start": date(2030, 1, 14), "tonnage": 1200.0, "by_muscle_group": {"Chest": 1200.0}},
+    ]
+    assert weekly_volume(training, date(2031, 1, 1)) == []
+
+
+# date_from is a Monday; the frame starts 28 days earlier, on 2030-01-07.
+DATE_FROM = date(2030, 2, 4)
+
+
+def test_steady_load_has_ratio_one():
+    training = frame(daily(date(2030, 1, 7), date(2030, 2, 13), 100.0))
+    assert workload_ratio(training, DATE_FROM, date(2030, 2, 13)) == [
+        {"date": date(2030, 2, 10), "acute": 700.0, "chronic": 700.0, "ratio": 1.0},   # Sunday
+        {"date": date(2030, 2, 13), "acute": 700.0, "chronic": 700.0, "ratio": 1.0},   # date_to
+    ]
+
+
+def test_spike_after_rest_and_no_load():
+    # Rest for three weeks, then 200 kg a day: acute 1400, chronic 1400 / 4.
+    training = frame(daily(date(2030, 1, 28), date(2030, 2, 3), 200.0))
+    result = workload_ratio(training, DATE_FROM, date(2030, 2, 10))
+    assert result == [{"date": date(2030, 2, 10), "acute": 0.0, "chronic": 350.0, "ratio": 0.0}]
+
+    spike = workload_ratio(training, date(2030, 1, 28) + timedelta(days=6), date(2030, 2, 3))
+    assert spike[-1] == {"date": date(2030, 2, 3), "acute": 1400.0, "chronic": 350.0, "ratio": 4.0}
+
+    assert workload_ratio(training, date(2031, 1, 6), date(2031, 1, 6))[0]['ratio'] is None
+
+
+def test_estimated_1rm():
+    e1rm = estimated_1rm(np.array([100.0, 120.0, 0.0, 80.0]), np.array([5, 1, 5, 0]))
+    assert e1rm[0] == pytest.approx(116.667, abs=1e-3)
+    assert e1rm[1] == 120.0
+    assert np.isnan(e1rm[2:]).all()
+
+
+def test_progression(app):
+    monday = date(2030, 1, 7)
+    training = frame([
+        (monday, 1, 'Chest', 3, 5, 100.0),
+        (monday, 1, 'Chest', 1, 1, 110.0),                 # best e1rm that day is the 5-rep set
+        (monday + timedelta(days=7), 1, 'Chest', 3, 5, 105.0),
+        (monday + timedelta(days=7), 2, 'Legs', 3, 0, 140.0),   # no reps: ignored
+        (monday + timedelta(days=8), 2, 'Legs', 1, 1, 150.0),
+    ])
+    with app.app_context():
+        result = progression(training)
+
+    first, second = result
+    assert first['exercise_id'] == 1 and first['sessions'] == 2
+    assert (first['first_e1rm'], first['best_e1rm'], first['latest_e1rm']) == (116.7, 122.5, 122.5)
+    assert first['trend_kg_per_week'] == 5.83
+    assert [p['top_weight'] for p in first['series']] == [110.0, 105.0]
+
+    assert second['exercise_id'] == 2 and second['sessions'] == 1
+    assert second['trend_kg_per_week'] is None
+    assert second['series'] == [{"date": monday + timedelta(days=8), "e1rm": 150.0, "top_weight": 150.0}]
+
+    with app.app_context():
+        assert [r['exercise_id'] for r in progression(training, exercise_ids=[2])] == [2]
+        assert progression(training, limit=1)[0]['exercise_id'] == 1
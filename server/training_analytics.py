@@ -0,0 +1,204 @@
+"""
+Vectorized training analytics.
+
+A user's logged sets are pulled in one query as columnar NumPy arrays
+(TrainingFrame) and reduced with array operations instead of Python loops
+over ORM rows:
+
+- tonnage: sets x reps x weight_lifted
+- weekly volume per muscle group
+- acute:chronic workload ratio (7-day load vs. the 28-day weekly average)
+- estimated 1RM (Epley) per exercise per day, with a linear trend
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from models import db, Workout, WorkoutExercise, Exercise
+from series import lttb
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+TrainingFrame = namedtuple('TrainingFrame', [
+    'day', 'exercise_id', 'muscle_group', 'sets', 'reps', 'weight'
+])
+
+
+def load_training_frame(user_id, date_from, date_to):
+    """
+    Returns the user's logged exercises between two dates as a TrainingFrame
+    of equal-length arrays, ordered by date. Days are date ordinals; a
+    missing weight is 0. Runs as a Core statement on the session's
+    connection, skipping ORM result processing.
+    """
+    rows = db.session.connection().execute(
+        select(
+            Workout.date,
+            WorkoutExercise.exercise_id,
+            Exercise.muscle_group,
+            WorkoutExercise.sets,
+            WorkoutExercise.reps,
+            WorkoutExercise.weight_lifted
+        )
+        .join(Workout, WorkoutExercise.workout_id == Workout.id)
+        .join(Exercise, WorkoutExercise.exercise_id == Exercise.id)
+        .where(Workout.user_id == user_id, Workout.date.between(date_from, date_to))
+        .order_by(Workout.date)
+    ).all()
+
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return TrainingFrame(empty, empty, np.array([], dtype=object), empty, empty, np.array([], dtype=float))
+
+    days, exercise_ids, groups, sets, reps, weights = zip(*rows)
+    return TrainingFrame(
+        day=np.fromiter((d.toordinal() for d in days), dtype=np.int64, count=len(rows)),
+        exercise_id=np.array(exercise_ids, dtype=np.int64),
+        muscle_group=np.array(groups, dtype=object),
+        sets=np.array(sets, dtype=np.int64),
+        reps=np.array(reps, dtype=np.int64),
+        weight=np.array([w or 0.0 for w in weights], dtype=float)
+    )
+
+
+def tonnage(frame):
+    return frame.sets * frame.reps * frame.weight
+
+
+def week_start(days):
+    """Ordinal of the Monday starting each day's week (ordinal 1 is a Monday)."""
+    return days - (days - 1) % 7
+
+
+def weekly_volume(frame, date_from):
+    """Tonnage per ISO week, split by muscle group, for weeks from date_from on."""
+    in_range = frame.day >= date_from.toordinal()
+    if not in_range.any():
+        return []
+
+    weeks, week_idx = np.unique(week_start(frame.day[in_range]), return_inverse=True)
+    groups, group_idx = np.unique(frame.muscle_group[in_range].astype(str), return_inverse=True)
+    totals = np.bincount(
+        week_idx * len(groups) + group_idx,
+        weights=tonnage(frame)[in_range],
+        minlength=len(weeks) * len(groups)
+    ).reshape(len(weeks), len(groups))
+
+    return [
+        {
+            "week_start": date.fromordinal(int(week)),
+            "tonnage": round(float(row.sum()), 1),
+            "by_muscle_group": {
+                str(group): round(float(value), 1) for group, value in zip(groups, row) if value
+            }
+        }
+        for week, row in zip(weeks, totals)
+    ]
+
+
+def workload_ratio(frame, date_from, date_to):
+    """
+    Acute:chronic workload ratio at the end of each week in the range and
+    on date_to. Acute load is the last 7 days' tonnage; chronic load is the
+    last 28 days' tonnage averaged per week. The frame must start at least
+    28 days before date_from.
+    """
+    start = date_from.toordinal() - CHRONIC_DAYS
+    span = date_to.toordinal() - start + 1
+    offsets = frame.day - start
+    valid = (offsets >= 0) & (offsets < span)
+    daily = np.bincount(offsets[valid], weights=tonnage(frame)[valid], minlength=span)
+
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    end = np.arange(CHRONIC_DAYS, span)
+    acute = cumulative[end + 1] - cumulative[end + 1 - ACUTE_DAYS]
+    chronic = (cumulative[end + 1] - cumulative[end + 1 - CHRONIC_DAYS]) / (CHRONIC_DAYS / ACUTE_DAYS)
+    ratio = np.divide(acute, chronic, out=np.full_like(acute, np.nan), where=chronic > 0)
+
+    ordinals = start + end
+    # Sundays close a week; always include the last day of the range too.
+    keep = ((ordinals % 7) == 0) | (ordinals == date_to.toordinal())
+    return [
+        {
+            "date": date.fromordinal(int(ordinal)),
+            "acute": round(float(a), 1),
+            "chronic": round(float(c), 1),
+            "ratio": None if np.isnan(r) else round(float(r), 2)
+        }
+        for ordinal, a, c, r in zip(ordinals[keep], acute[keep], chronic[keep], ratio[keep])
+    ]
+
+
+def estimated_1rm(weight, reps):
+    """Epley estimate; a single is its own 1RM. NaN where it is undefined."""
+    e1rm = np.where(reps == 1, weight, weight * (1 + reps / 30.0))
+    return np.where((reps > 0) & (weight > 0), e1rm, np.nan)
+
+
+def progression(frame, exercise_ids=None, limit=5, points=100):
+    """
+    Best estimated 1RM and top set weight per exercise per training day,
+    with first/best/latest values and a least-squares trend in kg per week.
+    Covers `exercise_ids`, or the `limit` exercises trained on the most
+    days. Each series is downsampled to at most `points` points.
+    """
+    e1rm = estimated_1rm(frame.weight, frame.reps)
+    valid = ~np.isnan(e1rm)
+    if exercise_ids is not None:
+        valid &= np.isin(frame.exercise_id, list(exercise_ids))
+    if not valid.any():
+        return []
+
+    ex = frame.exercise_id[valid]
+    day = frame.day[valid]
+    key = ex * 10_000_000 + day
+    sessions, inverse = np.unique(key, return_inverse=True)
+    best = np.full(len(sessions), -np.inf)
+    np.maximum.at(best, inverse, e1rm[valid])
+    top_weight = np.zeros(len(sessions))
+    np.maximum.at(top_weight, inverse, frame.weight[valid])
+
+    session_ex = sessions // 10_000_000
+    session_day = sessions % 10_000_000
+    chosen, counts = np.unique(session_ex, return_counts=True)
+    if exercise_ids is None:
+        chosen = chosen[np.argsort(-counts, kind='stable')[:limit]]
+
+    names = dict(db.session.execute(
+        select(Exercise.id, Exercise.name).where(Exercise.id.in_(chosen.tolist()))
+    ).all())
+
+    results = []
+    for exercise_id in chosen:
+        mask = session_ex == exercise_id
+        days, values, tops = session_day[mask], best[mask], top_weight[mask]
+        trend = float(np.polyfit(days - days[0], values, 1)[0] * 7) if len(days) > 1 and days[-1] > days[0] else None
+        series = [
+            {"date": date.fromordinal(int(d)), "e1rm": round(float(v), 1), "top_weight": float(t)}
+            for d, v, t in zip(days, values, tops)
+        ]
+        results.append({
+            "exercise_id": int(exercise_id),
+            "name": names.get(int(exercise_id)),
+            "sessions": int(mask.sum()),
+            "first_e1rm": series[0]["e1rm"],
+            "best_e1rm": round(float(values.max()), 1),
+            "latest_e1rm": series[-1]["e1rm"],
+            "trend_kg_per_week": None if trend is None else round(trend, 2),
+            "series": lttb(series, points, key='e1rm')
+        })
+    return results
+
+
+def volume_report(user_id, date_from, date_to):
+    """Weekly volume per muscle group and the workload ratio for /analytics/volume."""
+    frame = load_training_frame(user_id, date_from - timedelta(days=CHRONIC_DAYS), date_to)
+    in_range = frame.day >= date_from.toordinal()
+    return {
+        "total_tonnage": round(float(tonnage(frame)[in_range].sum()), 1),
+        "weekly": weekly_volume(frame, date_from),
+        "workload": workload_ratio(frame, date_from, date_to)
+    }
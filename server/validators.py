@@ -33,13 +33,26 @@ def validate_user_login(data):
     
     return errors if errors else None
 
+# Lowest accepted value of each numeric workout exercise field, shared with
+# the history importer so both entry points accept the same rows.
+EXERCISE_FIELD_MINIMUMS = {'sets': 1, 'reps': 1, 'weight_lifted': 0}
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
 def validate_workout_data(data):
     errors = []
+
+    if not isinstance(data, dict):
+        return ["Workout must be an object"]
     
-    if 'name' not in data or not data['name'].strip():
+    if not isinstance(data.get('name'), str) or not data['name'].strip():
         errors.append("Workout name is required")
     
-    if 'date' not in data or not data['date'].strip():
+    if not isinstance(data.get('date'), str) or not data['date'].strip():
         errors.append("Workout date is required")
     else:
         try:
@@ -53,23 +66,73 @@ def validate_workout_data(data):
         errors.append("At least one exercise is required")
     else:
         for idx, exercise_data in enumerate(data['workout_exercises']):
+            if not isinstance(exercise_data, dict):
+                errors.append(f"Exercise {idx + 1} must be an object")
+                continue
+
             if 'exercise_id' not in exercise_data:
                 errors.append(f"Exercise ID is required for exercise {idx + 1}")
-            elif not isinstance(exercise_data['exercise_id'], int) or exercise_data['exercise_id'] <= 0:
+            elif not _is_integer(exercise_data['exercise_id']) or exercise_data['exercise_id'] <= 0:
                 errors.append(f"Valid exercise ID is required for exercise {idx + 1}")
             
             if 'sets' not in exercise_data:
                 errors.append(f"Sets are required for exercise {idx + 1}")
-            elif not isinstance(exercise_data['sets'], int) or exercise_data['sets'] <= 0:
+            elif not _is_integer(exercise_data['sets']) or exercise_data['sets'] < EXERCISE_FIELD_MINIMUMS['sets']:
                 errors.append(f"Valid sets (positive integer) are required for exercise {idx + 1}")
             
             if 'reps' not in exercise_data:
                 errors.append(f"Reps are required for exercise {idx + 1}")
-            elif not isinstance(exercise_data['reps'], int) or exercise_data['reps'] <= 0:
+            elif not _is_integer(exercise_data['reps']) or exercise_data['reps'] < EXERCISE_FIELD_MINIMUMS['reps']:
                 errors.append(f"Valid reps (positive integer) are required for exercise {idx + 1}")
+
+            weight = exercise_data.get('weight_lifted')
+            if weight is not None and (not _is_number(weight) or weight < EXERCISE_FIELD_MINIMUMS['weight_lifted']):
+                errors.append(f"Weight lifted must be a non-negative number for exercise {idx + 1}")
     
     return errors if errors else None
 
+def validate_water_entry(data):
+    errors = []
+
+    if not isinstance(data, dict):
+        return ["Entry must be an object"]
+
+    amount_ml = data.get('amount_ml')
+    if amount_ml is None:
+        errors.append("Missing 'amount_ml'")
+    elif not isinstance(amount_ml, int) or isinstance(amount_ml, bool) or amount_ml <= 0:
+        errors.append("Invalid water amount. Must be a positive integer in ml.")
+
+    timestamp = data.get('timestamp')
+    if timestamp is not None:
+        try:
+            datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ')
+        except (TypeError, ValueError):
+            errors.append("Invalid timestamp format. Use ISO 8601 (e.g., YYYY-MM-DDTHH:MM:SS.fZ).")
+
+    return errors if errors else None
+
+def validate_weight_entry(data):
+    errors = []
+
+    if not isinstance(data, dict):
+        return ["Entry must be an object"]
+
+    weight_kg = data.get('weight_kg')
+    if weight_kg is None:
+        errors.append("Missing 'weight_kg'")
+    elif not isinstance(weight_kg, (int, float)) or isinstance(weight_kg, bool) or weight_kg <= 0:
+        errors.append("Invalid weight. Must be a positive number in kg.")
+
+    log_date = data.get('date')
+    if log_date is not None:
+        try:
+            datetime.strptime(log_date, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            errors.append("Invalid date format. Use YYYY-MM-DD.")
+
+    return errors if errors else None
+
 def validate_email(email):
     if not email or not isinstance(email, str):
         return False, "Email is required and must be a string"